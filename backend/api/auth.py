@@ -1,4 +1,6 @@
 from flask import Blueprint, jsonify, request
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
 from flask_jwt_extended import (
     create_access_token, create_refresh_token, jwt_required, 
     get_jwt_identity, unset_jwt_cookies, set_access_cookies, 
@@ -24,17 +26,23 @@ def register():
     if not username or not email or not password:
         return jsonify({"msg": "Missing fields"}), 400
 
-    if User.query.filter_by(username=username).first() or User.query.filter_by(email=email).first():
+    if User.query.filter(or_(User.username == username, User.email == email)).first():
         return jsonify({"msg": "User already exists"}), 409
 
     hashed_password = generate_password_hash(password)
+    # User, categories and wallets in one transaction
     user = User(username=username, email=email, password=hashed_password)
     db.session.add(user)
-    db.session.commit()
-    
-    create_default_categories_for_user(user.id)
-    create_default_wallets_for_user(user.id)
-    
+    try:
+        db.session.flush()  # user.id for the defaults
+        create_default_categories_for_user(user.id, commit=False)
+        create_default_wallets_for_user(user.id, commit=False)
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent registration took the username/email after the check above
+        db.session.rollback()
+        return jsonify({"msg": "User already exists"}), 409
+
     return jsonify({"msg": "Registration successful"}), 201
 
 
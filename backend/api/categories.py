@@ -1,6 +1,12 @@
 from flask import Blueprint, jsonify, abort, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Category, Transaction
+from models import (
+    db, Category, Transaction, MonthlyRollup, compute_wallet_balances, apply_balance_deltas, record_tombstones
+)
+
+from cache import cached_by_user, invalidate_user_cache
+
+from .conditional import conditional_on_data_version
 
 bp = Blueprint('categories', __name__, url_prefix='/api/categories')
 
@@ -8,6 +14,8 @@ PROTECTED_CATEGORY_NAMES = {'Uncategorized', 'Adjust Balance'}
 
 @bp.route('', methods=['GET'])
 @jwt_required(locations=['cookies'])
+@conditional_on_data_version
+@cached_by_user()
 def get_categories():
     """Отримати категорії користувача"""
     user_id = int(get_jwt_identity())
@@ -41,6 +49,7 @@ def create_category():
     
     db.session.add(category)
     db.session.commit()
+    invalidate_user_cache(user_id)
     
     return jsonify(category.to_dict()), 201
 
@@ -61,9 +70,18 @@ def delete_category(category_id):
     if category.name in PROTECTED_CATEGORY_NAMES:
         return jsonify({"msg": "Cannot delete category"}), 400
     
+    # Bulk delete bypasses the ORM flush hooks, so reverse the balances, drop the
+    # category's rollups and leave tombstones for the sync endpoint explicitly
+    connection = db.session.connection()
+    removed = compute_wallet_balances(category_id=category.id)
+    apply_balance_deltas(connection, {wallet_id: -total for wallet_id, total in removed.items()})
+    transaction_ids = [t_id for (t_id,) in db.session.query(Transaction.id).filter_by(category_id=category.id)]
+    record_tombstones(connection, user_id, 'transaction', transaction_ids)
     Transaction.query.filter_by(category_id=category.id).delete()
+    MonthlyRollup.query.filter_by(category_id=category.id).delete()
     db.session.delete(category)
     db.session.commit()
+    invalidate_user_cache(user_id)
     
     return jsonify({"msg": "Category deleted"}), 200
 
@@ -93,5 +111,6 @@ def update_category(category_id):
         category.type = data['type']
     
     db.session.commit()
+    invalidate_user_cache(user_id)
     
     return jsonify(category.to_dict())
@@ -0,0 +1,41 @@
+from functools import wraps
+
+from flask import make_response, request
+from flask_jwt_extended import get_jwt_identity
+from models import db, User
+
+
+def data_version(user_id):
+    """Поточна версія даних користувача (User.data_version), один запит на HTTP-запит"""
+    # Request-scoped memo (g may outlive a request when an app context is already pushed)
+    versions = request.environ.setdefault('budget.data_versions', {})
+    if user_id not in versions:
+        versions[user_id] = db.session.query(User.data_version).filter(User.id == user_id).scalar() or 0
+    return versions[user_id]
+
+
+def user_etag(user_id):
+    return f'u{user_id}-v{data_version(user_id)}'
+
+
+def conditional_on_data_version(view):
+    """ETag = (user, data version) для GET-ендпоінтів зі списками.
+
+    Якщо If-None-Match збігається, повертається 304 без виклику view, тобто
+    без запитів до таблиць з даними. Ставити під @jwt_required.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = user_etag(int(get_jwt_identity()))
+        # Weak comparison: compression turns the ETag weak (see compression.py)
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        # Always revalidate; the response is user-specific
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return wrapper
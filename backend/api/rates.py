@@ -1,7 +1,13 @@
 from flask import Blueprint, jsonify, request
+from bisect import bisect_right
+from datetime import date, datetime, timezone
+import json
+import threading
 import time
 import requests
 
+from models import db, ExchangeRate
+
 EXCHANGE_RATES = {
     'USD': 1.0,
     'UAH': 42.0,
@@ -12,7 +18,15 @@ EXCHANGE_RATES = {
 SUPPORTED_CURRENCIES = list(EXCHANGE_RATES.keys())  # Will be updated from API
 _RATES_SCHEMA = 'UNITS_PER_USD'
 _RATES_LAST_UPDATED = 0.0
-_RATES_TTL_SECONDS = 6 * 60 * 60 
+_RATES_GENERATION = 0  # bumped whenever current rates or rate history change (cache keys)
+_RATES_TTL_SECONDS = 6 * 60 * 60
+_RATES_RETRY_SECONDS = 60  # after a failed fetch, wait before trying again
+_RATES_SOURCE = None  # None -> public currency API; otherwise URL, JSON file path or callable
+_RATES_ON_REFRESH = None  # called with the new rates after every successful refresh
+
+# Single-flight guard: at most one fetch in progress per process
+_refresh_lock = threading.Lock()
+_RATES_LAST_ATTEMPT = 0.0
 
 bp = Blueprint('rates', __name__, url_prefix='/api/rates')
 
@@ -25,7 +39,7 @@ def get_rates():
     """
     refresh = request.args.get('refresh', 'false').lower() in ('1', 'true', 'yes')
     rates, source, ts = _ensure_rates_uptodate(force=refresh)
-    return jsonify({
+    response = jsonify({
         'base': 'USD',
         'schema': _RATES_SCHEMA,
         'source': source,
@@ -33,13 +47,45 @@ def get_rates():
         'rates': rates,
         'supported': sorted(rates.keys()),
     })
+    # Same for every user: shared caches may keep it until the rates expire here
+    fresh_for = int(min(_RATES_TTL_SECONDS, max(0, ts + _RATES_TTL_SECONDS - time.time())))
+    response.headers['Cache-Control'] = f'public, max-age={fresh_for}, stale-while-revalidate={_RATES_RETRY_SECONDS}'
+    response.vary.add('Accept-Encoding')
+    return response
+
+def rates_generation() -> int:
+    """Changes whenever conversions may give different results (for cache keys)."""
+    return _RATES_GENERATION
+
+def _bump_rates_generation() -> None:
+    global _RATES_GENERATION
+    _RATES_GENERATION += 1
+
+_UNCHANGED = object()
+
+def configure_rates(source=_UNCHANGED, ttl_seconds=_UNCHANGED, on_refresh=_UNCHANGED):
+    """Set where rates come from and how long they stay fresh; omitted arguments stay as they are.
+
+    source: None (public currency API), an http(s) URL or a JSON file path
+    (same shape as the public API: {"usd": {"eur": 0.9, ...}}), or a
+    callable returning a UNITS_PER_USD mapping. Useful for tests and local
+    stand-ins.
+    on_refresh: callable(rates) run after each successful refresh (e.g. to persist them), None disables it.
+    """
+    global _RATES_SOURCE, _RATES_TTL_SECONDS, _RATES_ON_REFRESH
+    if source is not _UNCHANGED:
+        _RATES_SOURCE = source
+    if ttl_seconds is not _UNCHANGED and ttl_seconds is not None:
+        _RATES_TTL_SECONDS = ttl_seconds
+    if on_refresh is not _UNCHANGED:
+        _RATES_ON_REFRESH = on_refresh
 
 def convert_amount(amount: float, from_currency: str, to_currency: str) -> float:
     """Конвертує суму, використовуючи глобальні EXCHANGE_RATES."""
     if amount is None:
         return 0.0
-    from_currency = (from_currency or 'USD').upper()
-    to_currency = (to_currency or 'USD').upper()
+    from_currency = _normalize_currency(from_currency)
+    to_currency = _normalize_currency(to_currency)
     if from_currency == to_currency:
         return float(amount)
 
@@ -52,19 +98,104 @@ def convert_amount(amount: float, from_currency: str, to_currency: str) -> float
     converted = amount_in_usd * rates[to_currency]
     return float(converted)
 
+def _normalize_currency(code) -> str:
+    return (code or 'USD').upper()
+
+def _pair_factor(rates: dict, from_currency: str, to_currency: str) -> float:
+    """Multiplier from one (normalized) currency to another; 1.0 if unknown."""
+    if from_currency == to_currency or from_currency not in rates or to_currency not in rates:
+        return 1.0
+    return rates[to_currency] / rates[from_currency]
+
+def conversion_factors(currencies, to_currency: str, rates: dict = None) -> dict:
+    """{currency: factor to to_currency} for the given currencies (raw codes as keys)."""
+    if rates is None:
+        rates, _, _ = _ensure_rates_uptodate(force=False)
+    target = _normalize_currency(to_currency)
+    return {c: _pair_factor(rates, _normalize_currency(c), target) for c in set(currencies)}
+
+def convert_amounts(amounts, currencies, to_currency: str, rates: dict = None) -> list:
+    """Convert a column of amounts (with a parallel column of currencies) in one pass.
+
+    The rate table is read once and each distinct currency is resolved once,
+    instead of per element as convert_amount() does.
+    """
+    currencies = list(currencies)
+    factors = conversion_factors(currencies, to_currency, rates)
+    return [float(a or 0.0) * factors[c] for a, c in zip(amounts, currencies)]
+
 def _ensure_rates_uptodate(force: bool = False) -> tuple[dict, str, float]:
-    global EXCHANGE_RATES, _RATES_LAST_UPDATED, SUPPORTED_CURRENCIES
+    """Return (rates, source, last_updated) without blocking on the network.
+
+    Fresh rates are served from cache. Expired rates are served as 'stale'
+    while a single background thread refreshes them. force=True refreshes
+    synchronously; callers that arrive while a refresh is running wait for
+    it and reuse its result instead of fetching again.
+    """
+    if force:
+        started_from = _RATES_LAST_UPDATED
+        with _refresh_lock:
+            refreshed = _RATES_LAST_UPDATED != started_from or _refresh_rates()
+        return EXCHANGE_RATES, 'live' if refreshed else 'stale', _RATES_LAST_UPDATED
+
     now = time.time()
-    source = 'cache'
-    if force or (now - _RATES_LAST_UPDATED) > _RATES_TTL_SECONDS:
+    if (now - _RATES_LAST_UPDATED) <= _RATES_TTL_SECONDS:
+        return EXCHANGE_RATES, 'cache', _RATES_LAST_UPDATED
+
+    if (now - _RATES_LAST_ATTEMPT) > _RATES_RETRY_SECONDS:
+        _refresh_in_background()
+    return EXCHANGE_RATES, 'stale', _RATES_LAST_UPDATED
+
+def _refresh_rates() -> bool:
+    """Fetch and publish new rates. Caller must hold _refresh_lock."""
+    global EXCHANGE_RATES, _RATES_LAST_UPDATED, _RATES_LAST_ATTEMPT
+    _RATES_LAST_ATTEMPT = time.time()
+    try:
+        live = _fetch_rates_from_source()
+    except Exception:
+        return False
+    # Publish by swapping the reference so readers never see a half-updated dict
+    EXCHANGE_RATES = live
+    _RATES_LAST_UPDATED = time.time()
+    _bump_rates_generation()
+    if _RATES_ON_REFRESH is not None:
         try:
-            live = _fetch_live_rates_units_per_usd()
-            EXCHANGE_RATES = live
-            _RATES_LAST_UPDATED = now
-            source = 'live'
+            _RATES_ON_REFRESH(live)
         except Exception:
-            source = 'stale'
-    return EXCHANGE_RATES, source, _RATES_LAST_UPDATED
+            pass  # persisting is best-effort; the fresh rates are already in use
+    return True
+
+def _refresh_in_background() -> None:
+    """Start a refresh thread unless one is already running."""
+    if not _refresh_lock.acquire(blocking=False):
+        return
+
+    def run():
+        try:
+            _refresh_rates()
+        finally:
+            _refresh_lock.release()
+
+    try:
+        threading.Thread(target=run, name='rates-refresh', daemon=True).start()
+    except Exception:
+        _refresh_lock.release()
+        raise
+
+def _fetch_rates_from_source() -> dict:
+    """Fetch rates from the configured source (see configure_rates)."""
+    source = _RATES_SOURCE
+    if source is None:
+        return _fetch_live_rates_units_per_usd()
+    if callable(source):
+        return dict(source())
+    if source.startswith(('http://', 'https://')):
+        resp = requests.get(source, timeout=10)
+        resp.raise_for_status()
+        return _parse_rates_payload(resp.json())
+    path = source[len('file://'):] if source.startswith('file://') else source
+    with open(path, encoding='utf-8') as f:
+        return _parse_rates_payload(json.load(f))
 
 def _fetch_live_rates_units_per_usd() -> dict:
     """Fetch live rates (USD base) and return mapping in UNITS_PER_USD schema."""
@@ -82,15 +213,175 @@ def _fetch_live_rates_units_per_usd() -> dict:
     except Exception:
         data = _get(fallback)
 
+    return _parse_rates_payload(data)
+
+def _parse_rates_payload(data) -> dict:
+    """{'date': ..., 'usd': {...}} -> UNITS_PER_USD mapping.
+
+    Currencies missing from the response keep their previous rate.
+    """
     # Expected shape: { 'date': 'YYYY-MM-DD', 'usd': { ... } }
     usd_map = data.get('usd', {}) if isinstance(data, dict) else {}
     if not usd_map:
         raise RuntimeError('Unexpected live rates response shape')
 
-    rates = {k.upper(): float(v) for k, v in usd_map.items()}
+    rates = dict(EXCHANGE_RATES)
+    rates.update({k.upper(): float(v) for k, v in usd_map.items()})
     rates['USD'] = 1.0  # Ensure USD present
 
     global SUPPORTED_CURRENCIES
     SUPPORTED_CURRENCIES = sorted(rates.keys())
 
-    return rates
\ No newline at end of file
+    return rates
+
+# MARK: Rate history
+class RateHistory:
+    """In-memory interval index over persisted rates.
+
+    For each currency keeps dates in ascending order; a rate is valid from its
+    date until the next stored date. Lookups are a bisect per (currency, day).
+    """
+
+    def __init__(self, rows):
+        by_currency = {}
+        for day, currency, rate in sorted(rows, key=lambda r: (r[1], r[0])):
+            dates, rates = by_currency.setdefault(currency.upper(), ([], []))
+            dates.append(day)
+            rates.append(rate)
+        self._index = by_currency
+        # Months whose rate changes after the 1st: their days do not share one rate
+        self.changing_months = sorted({
+            day.replace(day=1)
+            for dates, rates in by_currency.values()
+            for day, rate, previous in zip(dates[1:], rates[1:], rates)
+            if day.day != 1 and rate != previous
+        })
+
+    def __bool__(self):
+        return bool(self._index)
+
+    def rate_on(self, currency: str, day: date):
+        """UNITS_PER_USD rate of currency on day, or None if never stored (or day is None).
+
+        Days before the first stored date use the earliest known rate.
+        """
+        entry = self._index.get(_normalize_currency(currency))
+        if entry is None or day is None:
+            return None
+        dates, rates = entry
+        pos = bisect_right(dates, day) - 1
+        return rates[max(pos, 0)]
+
+    def factor(self, from_currency: str, to_currency: str, day: date, fallback: dict) -> float:
+        """Multiplier from one currency to another on day (fallback: current rate table)."""
+        from_currency = _normalize_currency(from_currency)
+        to_currency = _normalize_currency(to_currency)
+        if from_currency == to_currency:
+            return 1.0
+        rate_from = self.rate_on(from_currency, day) or fallback.get(from_currency)
+        rate_to = self.rate_on(to_currency, day) or fallback.get(to_currency)
+        if not rate_from or not rate_to:
+            return 1.0
+        return rate_to / rate_from
+
+
+_RATE_HISTORY = None
+_history_lock = threading.Lock()
+
+def get_rate_history() -> RateHistory:
+    """Persisted rates as a RateHistory (loaded once, rebuilt after new rates are stored)."""
+    global _RATE_HISTORY
+    history = _RATE_HISTORY
+    if history is None:
+        with _history_lock:
+            if _RATE_HISTORY is None:
+                rows = db.session.query(ExchangeRate.date, ExchangeRate.currency, ExchangeRate.rate).all()
+                _RATE_HISTORY = RateHistory(rows)
+            history = _RATE_HISTORY
+    return history
+
+def _invalidate_rate_history() -> None:
+    global _RATE_HISTORY
+    _RATE_HISTORY = None
+    _bump_rates_generation()
+
+def convert_amounts_on(amounts, currencies, days, to_currency: str) -> list:
+    """Like convert_amounts(), but each amount uses the rate of its own day.
+
+    days are date objects, 'YYYY-MM-DD' strings or None (current rate).
+    Each distinct (currency, day) pair is resolved once. Without stored
+    history the current rate table is used.
+    """
+    history = get_rate_history()
+    currencies = list(currencies)
+    if not history:
+        return convert_amounts(amounts, currencies, to_currency)
+
+    current, _, _ = _ensure_rates_uptodate(force=False)
+    factors = {}
+    result = []
+    for amount, currency, day in zip(amounts, currencies, days):
+        key = (currency, day)
+        if key not in factors:
+            on = date.fromisoformat(day) if isinstance(day, str) else day
+            factors[key] = history.factor(currency, to_currency, on, current)
+        result.append(float(amount or 0.0) * factors[key])
+    return result
+
+def load_exchange_rates(rows, chunk_size: int = 5000) -> int:
+    """Bulk upsert (date, currency, rate) rows into the rates table.
+
+    Rows are written with executemany in chunks inside one transaction;
+    an existing (date, currency) pair is overwritten. Returns the row count.
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    stmt = insert(ExchangeRate.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['date', 'currency'],
+        set_={'rate': stmt.excluded.rate, 'fetched_at': stmt.excluded.fetched_at},
+    )
+
+    now = datetime.utcnow()
+    count = 0
+    chunk = []
+    for day, currency, rate in rows:
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        chunk.append({'date': day, 'currency': currency.upper(), 'rate': float(rate), 'fetched_at': now})
+        if len(chunk) >= chunk_size:
+            db.session.execute(stmt, chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(stmt, chunk)
+        count += len(chunk)
+    db.session.commit()
+    _invalidate_rate_history()
+    return count
+
+def save_rates_snapshot(rates: dict, day: date = None) -> int:
+    """Persist a full rate table as the rates of `day` (default: today)."""
+    day = day or date.today()
+    return load_exchange_rates((day, currency, rate) for currency, rate in rates.items())
+
+def restore_rates_from_db() -> bool:
+    """Load the latest persisted rate table so a restart does not need a network fetch."""
+    global EXCHANGE_RATES, _RATES_LAST_UPDATED, SUPPORTED_CURRENCIES
+    latest_day = db.session.query(db.func.max(ExchangeRate.date)).scalar()
+    if latest_day is None:
+        return False
+    rows = ExchangeRate.query.filter_by(date=latest_day).all()
+    rates = dict(EXCHANGE_RATES)
+    rates.update({r.currency: r.rate for r in rows})
+    rates['USD'] = 1.0
+    fetched_at = max(r.fetched_at for r in rows)
+    EXCHANGE_RATES = rates
+    SUPPORTED_CURRENCIES = sorted(rates.keys())
+    _RATES_LAST_UPDATED = fetched_at.replace(tzinfo=timezone.utc).timestamp()
+    _bump_rates_generation()
+    return True
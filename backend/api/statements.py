@@ -0,0 +1,187 @@
+"""Розбір банківських виписок (CSV / OFX) для імпорту транзакцій.
+
+Обидва парсери читають файл потоком і віддають рядки по одному:
+{'date': datetime, 'amount': float (зі знаком), 'title': str, 'description': str | None,
+ 'category': str | None} або StatementError для рядка, який не вдалося розібрати.
+"""
+import codecs
+import csv
+import io
+import math
+import re
+from datetime import datetime
+
+# Header aliases (lower-case) seen in common bank exports
+CSV_COLUMNS = {
+    'date': ('date', 'transaction date', 'booking date', 'posted date', 'дата'),
+    'amount': ('amount', 'sum', 'value', 'сума'),
+    'debit': ('debit', 'withdrawal', 'paid out'),
+    'credit': ('credit', 'deposit', 'paid in'),
+    'title': ('title', 'payee', 'name', 'merchant', 'description', 'details', 'опис'),
+    'description': ('memo', 'note', 'notes', 'reference'),
+    'category': ('category', 'категорія'),
+}
+DATE_FORMATS = ('%Y-%m-%d', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S', '%d.%m.%Y', '%d.%m.%Y %H:%M:%S', '%d/%m/%Y')
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class StatementError(ValueError):
+    """Рядок виписки, який не вдалося розібрати (line — номер рядка/запису)."""
+
+    def __init__(self, line, msg):
+        super().__init__(msg)
+        self.line = line
+        self.msg = msg
+
+
+def parse_statement_date(value, date_format=None):
+    value = (value or '').strip()
+    formats = (date_format,) if date_format else DATE_FORMATS
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date: {value!r}")
+
+
+_THOUSANDS_ONLY = re.compile(r'[-+]?[1-9]\d{0,2}(,\d{3})+')
+
+
+def parse_statement_amount(value):
+    """'1 234,56' / '-1,234.56' / '1.234,56' / '1,234' / '(12.00)' -> float"""
+    value = (value or '').strip().replace(' ', '').replace(' ', '')
+    if not value:
+        raise ValueError("Missing amount")
+    negative = value.startswith('(') and value.endswith(')')
+    value = value.strip('()')
+    if ',' in value and '.' in value:
+        # Whichever comes last is the decimal point
+        if value.rfind(',') > value.rfind('.'):
+            value = value.replace('.', '').replace(',', '.')
+        else:
+            value = value.replace(',', '')
+    elif _THOUSANDS_ONLY.fullmatch(value):
+        value = value.replace(',', '')  # '1,234' / '1,234,567': groups of three digits
+    else:
+        value = value.replace(',', '.')
+    amount = float(value)
+    if not math.isfinite(amount):
+        raise ValueError(f"Invalid amount: {value!r}")
+    return -amount if negative else amount
+
+
+def _require_nonzero(amount):
+    if not amount:
+        raise ValueError("Zero amount")
+    return amount
+
+
+def _map_csv_header(fieldnames):
+    """{поле: назва колонки у файлі} за CSV_COLUMNS"""
+    mapping = {}
+    normalized = {(name or '').strip().lower(): name for name in fieldnames or ()}
+    for field, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in normalized and normalized[alias] not in mapping.values():
+                mapping[field] = normalized[alias]
+                break
+    return mapping
+
+
+def iter_csv_statement(stream, date_format=None, encoding='utf-8-sig'):
+    """Рядки CSV-виписки; stream — бінарний файловий об'єкт, читається построково.
+
+    Сума береться з колонки amount (зі знаком) або як credit - debit.
+    """
+    text = io.TextIOWrapper(stream, encoding=encoding, newline='')
+    sample = text.readline()
+    delimiter = max(',;\t', key=sample.count)
+    header = next(csv.reader([sample], delimiter=delimiter), [])
+    columns = _map_csv_header(header)
+    if 'date' not in columns or not ({'amount', 'debit', 'credit'} & columns.keys()):
+        raise ValueError("CSV must have a date column and an amount (or debit/credit) column")
+
+    for line, row in enumerate(csv.DictReader(text, fieldnames=header, delimiter=delimiter), 2):
+        if not any((v or '').strip() for v in row.values() if isinstance(v, str)):
+            continue
+        try:
+            if 'amount' in columns:
+                amount = parse_statement_amount(row.get(columns['amount']))
+            else:
+                credit = row.get(columns.get('credit')) or ''
+                debit = row.get(columns.get('debit')) or ''
+                amount = (parse_statement_amount(credit) if credit.strip() else 0.0) - \
+                    (abs(parse_statement_amount(debit)) if debit.strip() else 0.0)
+            yield {
+                'date': parse_statement_date(row.get(columns['date']), date_format),
+                'amount': _require_nonzero(amount),
+                'title': (row.get(columns.get('title')) or '').strip()[:100] or None,
+                'description': (row.get(columns.get('description')) or '').strip()[:255] or None,
+                'category': (row.get(columns.get('category')) or '').strip() or None,
+            }
+        except ValueError as exc:
+            yield StatementError(line, str(exc))
+
+
+_OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+def _iter_ofx_tags(stream):
+    """(closing, TAG, value) з OFX (SGML або XML), читаючи файл шматками"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    carry = ''
+    while True:
+        raw = stream.read(READ_CHUNK_SIZE)
+        chunk = decoder.decode(raw, final=not raw) if isinstance(raw, bytes) else raw
+        data = carry + chunk
+        # Keep the last (possibly incomplete) tag for the next round
+        cut = data.rfind('<') if raw else len(data)
+        for match in _OFX_TAG.finditer(data, 0, max(cut, 0)):
+            yield match.group(1) == '/', match.group(2).upper(), match.group(3).strip()
+        carry = data[cut:] if raw and cut >= 0 else ''
+        if not raw:
+            break
+
+
+def iter_ofx_statement(stream):
+    """Записи <STMTTRN> з OFX-виписки"""
+    record = None
+    number = 0
+    for closing, tag, value in _iter_ofx_tags(stream):
+        if tag == 'STMTTRN':
+            if not closing:
+                record = {}
+                number += 1
+                continue
+            if record is not None:
+                yield _ofx_record(number, record)
+            record = None
+        elif record is not None and not closing:
+            record[tag] = value
+
+
+def _ofx_record(number, record):
+    try:
+        # DTPOSTED: YYYYMMDD[HHMMSS[.XXX]][[+-TZ]]
+        posted = re.match(r'\d{8}(\d{6})?', record.get('DTPOSTED', ''))
+        if not posted:
+            raise ValueError("Missing DTPOSTED")
+        when = datetime.strptime(posted.group(0), '%Y%m%d%H%M%S' if posted.group(1) else '%Y%m%d')
+        title = record.get('NAME') or record.get('PAYEE') or record.get('MEMO')
+        memo = record.get('MEMO') if record.get('MEMO') != title else None
+        return {
+            'date': when,
+            'amount': _require_nonzero(parse_statement_amount(record.get('TRNAMT'))),
+            'title': (title or '')[:100] or None,
+            'description': (memo or '')[:255] or None,
+            'category': None,
+        }
+    except ValueError as exc:
+        return StatementError(number, str(exc))
+
+
+def iter_statement(stream, statement_format, date_format=None):
+    if statement_format == 'ofx':
+        return iter_ofx_statement(stream)
+    return iter_csv_statement(stream, date_format=date_format)
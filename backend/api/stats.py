@@ -1,47 +1,204 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import Transaction
-from sqlalchemy.orm import selectinload
+from models import db, Transaction, Wallet, Category, MonthlyRollup
+from sqlalchemy import and_, func, or_, true
 
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
-from .rates import convert_amount
+from cache import cached_by_user
+
+from .rates import convert_amounts_on, get_rate_history, rates_generation
+from .transactions import apply_transaction_filters
 
 bp = Blueprint('statistics', __name__, url_prefix='/api/statistics')
 
+
+SERIES_INTERVALS = ('day', 'week', 'month')
+
+
+def _bucket_expression(interval):
+    """SQL-вираз початку періоду ('YYYY-MM-DD') для Transaction.date"""
+    if db.engine.dialect.name == 'postgresql':
+        return func.to_char(func.date_trunc(interval, Transaction.date), 'YYYY-MM-DD')
+    if interval == 'day':
+        return func.strftime('%Y-%m-%d', Transaction.date)
+    if interval == 'week':
+        # Monday of the week: next Sunday (or same day), minus 6 days
+        return func.date(Transaction.date, 'weekday 0', '-6 days')
+    return func.strftime('%Y-%m-01', Transaction.date)
+
+
+def _bucket_start(day, interval):
+    """Python-відповідник _bucket_expression для однієї дати"""
+    if interval == 'week':
+        return day - timedelta(days=day.weekday())
+    if interval == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(day, interval):
+    if interval == 'week':
+        return day + timedelta(days=7)
+    if interval == 'month':
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def _date_bounds(args, before=None):
+    """(нижня межа включно, верхня межа виключно) за start_date/end_date і before"""
+    lower = datetime.fromisoformat(args['start_date']) if args.get('start_date') else None
+    upper = None
+    if args.get('end_date'):
+        # end_date is inclusive (Transaction.date <= end_date)
+        upper = datetime.fromisoformat(args['end_date']) + timedelta(microseconds=1)
+    if before is not None:
+        upper = min(upper, before) if upper is not None else before
+    return lower, upper
+
+
+def _full_months(lower, upper):
+    """[first, last) — початки місяців, що повністю лежать у [lower, upper); None — без межі"""
+    first = last = None
+    if lower is not None:
+        first = datetime(lower.year, lower.month, 1)
+        if first < lower:
+            first = _next_bucket(first, 'month')
+    if upper is not None:
+        last = datetime(upper.year, upper.month, 1)
+    return first, last
+
+
+def _date_range_condition(ranges):
+    """OR з півінтервалів [lo, hi) по Transaction.date (None — без межі)"""
+    conditions = []
+    for lo, hi in ranges:
+        parts = []
+        if lo is not None:
+            parts.append(Transaction.date >= lo)
+        if hi is not None:
+            parts.append(Transaction.date < hi)
+        conditions.append(and_(*parts) if parts else true())
+    return or_(*conditions)
+
+
+def _month_ranges(months):
+    """Відсортовані початки місяців -> злиті півінтервали [початок, кінець) з datetime"""
+    ranges = []
+    for month in months:
+        start = datetime(month.year, month.month, 1)
+        end = _next_bucket(start, 'month')
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
+
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def aggregate_totals(user_id, args, group_by=(), period=None, before=None):
+    """Суми транзакцій користувача з фільтрами args, згруповані для конвертації валют.
+
+    Повертає [(*group_by values, [period], currency, type, total, count, rate_day), ...]:
+    group_by — імена колонок ('wallet_id', 'category_id'); period ('day'|'week'|'month')
+    додає початок періоду 'YYYY-MM-DD' (з історією курсів — день, див. _bucket_start);
+    rate_day — день для курсу або None, якщо історії курсів немає.
+
+    Повні місяці діапазону читаються з MonthlyRollup, сирі транзакції — лише
+    для неповних місяців на краях. Пошук (search) і періоди day/week
+    потребують сирих рядків і рахуються по Transaction повністю.
+    """
+    has_history = bool(get_rate_history())
+    lower, upper = _date_bounds(args, before)
+    filter_args = {k: v for k, v in args.items() if k not in ('start_date', 'end_date')}
+
+    first = last = None
+    use_rollups = not (args.get('search') or '').strip() and period in (None, 'month')
+    if use_rollups:
+        first, last = _full_months(lower, upper)
+        use_rollups = first is None or last is None or first < last
+
+    changing = []
+    if use_rollups:
+        raw_ranges = ([(lower, first)] if lower is not None else []) + ([(last, upper)] if upper is not None else [])
+        if has_history:
+            # A rollup month converts at a single rate; months where the rate changes
+            # mid-month are read from raw rows and converted day by day instead
+            changing = [m for m in get_rate_history().changing_months
+                        if (first is None or m >= first.date()) and (last is None or m < last.date())]
+            raw_ranges += _month_ranges(changing)
+    else:
+        raw_ranges = [(lower, upper)]
+
+    rows = []
+    if raw_ranges:
+        groups = [getattr(Transaction, name) for name in group_by]
+        if period:
+            groups.append(_bucket_expression('day' if has_history else period))
+        day = _bucket_expression('day') if has_history else db.null()
+        query = db.session.query(
+            *groups, Wallet.currency, Transaction.type, func.sum(Transaction.amount), func.count(Transaction.id), day
+        ).join(Wallet, Transaction.wallet_id == Wallet.id).filter(
+            Transaction.user_id == user_id, _date_range_condition(raw_ranges)
+        )
+        query = apply_transaction_filters(query, filter_args)
+        rows += query.group_by(*groups, Wallet.currency, Transaction.type, *([day] if has_history else [])).all()
+
+    if use_rollups:
+        groups = [getattr(MonthlyRollup, name) for name in group_by]
+        if period:
+            groups.append(MonthlyRollup.month)
+        # Whole months without a mid-month rate change convert at the rate of the month's first day
+        day = MonthlyRollup.month if has_history else db.null()
+        query = db.session.query(
+            *groups, Wallet.currency, MonthlyRollup.type,
+            func.sum(MonthlyRollup.total), func.sum(MonthlyRollup.count), day
+        ).join(Wallet, MonthlyRollup.wallet_id == Wallet.id).filter(MonthlyRollup.user_id == user_id)
+        if first is not None:
+            query = query.filter(MonthlyRollup.month >= first.date())
+        if last is not None:
+            query = query.filter(MonthlyRollup.month < last.date())
+        if changing:
+            query = query.filter(MonthlyRollup.month.notin_(changing))
+        query = apply_transaction_filters(query, filter_args, model=MonthlyRollup)
+        query = query.group_by(*groups, Wallet.currency, MonthlyRollup.type, *([day] if has_history else []))
+        rows += query.having(func.sum(MonthlyRollup.count) > 0).all()
+
+    return [tuple(_iso(value) for value in row) for row in rows]
+
+
 @bp.route('', methods=['GET'])
 @jwt_required(locations=['cookies'])
+@cached_by_user(rates_generation)
 def get_statistics():
     """Отримати статистику.
 
     Optionally accepts base_currency query param (UAH|USD|EUR) to convert sums.
+    Accepts the same filters as GET /api/transactions.
     """
     user_id = int(get_jwt_identity())
 
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
     base_currency = (request.args.get('base_currency') or 'USD').upper()
 
-    query = Transaction.query.filter_by(user_id=user_id)
-
-    if start_date:
-        query = query.filter(Transaction.date >= datetime.fromisoformat(start_date))
-    if end_date:
-        query = query.filter(Transaction.date <= datetime.fromisoformat(end_date))
-
-    # transactions = query.all()
-    transactions = query.options(selectinload(Transaction.wallet)).all()
-
     total_expenses = 0.0
     total_incomes = 0.0
-    for t in transactions:
-        # Determine currency of the transaction via its wallet
-        tx_currency = t.wallet.currency if t.wallet and t.wallet.currency else 'USD'
-        converted = convert_amount(t.amount, tx_currency, base_currency)
-        if t.type == 'expense':
+    expense_count = 0
+    income_count = 0
+    # Convert once per (currency, type, day) group instead of once per transaction
+    rows = aggregate_totals(user_id, request.args)
+    converted_totals = convert_amounts_on(
+        [r[2] for r in rows], [r[0] for r in rows], [r[4] for r in rows], base_currency
+    )
+    for (currency, t_type, total, count, _), converted in zip(rows, converted_totals):
+        if t_type == 'expense':
             total_expenses += converted
-        elif t.type == 'income':
+            expense_count += count
+        elif t_type == 'income':
             total_incomes += converted
+            income_count += count
 
     balance = total_incomes - total_expenses
 
@@ -49,5 +206,174 @@ def get_statistics():
         'total_expenses': round(total_expenses, 2),
         'total_incomes': round(total_incomes, 2),
         'balance': round(balance, 2),
+        'expense_count': expense_count,
+        'income_count': income_count,
+        'base_currency': base_currency,
+    })
+
+
+@bp.route('/series', methods=['GET'])
+@jwt_required(locations=['cookies'])
+@cached_by_user(rates_generation)
+def get_statistics_series():
+    """Часовий ряд доходів, витрат і накопиченого балансу (net worth).
+
+    Query params:
+      interval=day|week|month (default day)
+      base_currency=USD
+      + ті ж фільтри, що й GET /api/transactions
+
+    Періоди без транзакцій заповнюються нулями до поточної дати (або end_date).
+    Якщо задано start_date, net_worth починається з балансу на цю дату.
+    """
+    user_id = int(get_jwt_identity())
+
+    interval = (request.args.get('interval') or 'day').lower()
+    if interval not in SERIES_INTERVALS:
+        return jsonify({"msg": "interval must be one of: day, week, month"}), 400
+    base_currency = (request.args.get('base_currency') or 'USD').upper()
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+
+    # Periods may come back per day (rate history); they are rolled up into buckets here
+    rows = aggregate_totals(user_id, request.args, period=interval)
+
+    opening_rows = []
+    if start_date:
+        # Balance carried into the range: same filters, everything before start_date
+        opening_args = {k: v for k, v in request.args.items() if k not in ('start_date', 'end_date')}
+        opening_rows = aggregate_totals(user_id, opening_args, before=datetime.fromisoformat(start_date))
+
+    opening_converted = convert_amounts_on(
+        [r[2] for r in opening_rows], [r[0] for r in opening_rows], [r[4] for r in opening_rows], base_currency
+    )
+    opening_balance = 0.0
+    for (currency, t_type, *_), converted in zip(opening_rows, opening_converted):
+        sign = 1 if t_type == 'income' else -1 if t_type == 'expense' else 0
+        opening_balance += sign * converted
+
+    converted_totals = convert_amounts_on(
+        [r[3] for r in rows], [r[1] for r in rows], [r[5] for r in rows], base_currency
+    )
+    sums = {}
+    for (period, currency, t_type, *_), converted in zip(rows, converted_totals):
+        period = _bucket_start(date.fromisoformat(period), interval).isoformat()
+        entry = sums.setdefault(period, {'income': 0.0, 'expense': 0.0})
+        if t_type in entry:
+            entry[t_type] += converted
+
+    buckets = []
+    if sums or start_date:
+        first = _bucket_start(
+            datetime.fromisoformat(start_date).date() if start_date else date.fromisoformat(min(sums)),
+            interval
+        )
+        last_day = datetime.fromisoformat(end_date).date() if end_date else date.today()
+        if sums and not end_date:
+            last_day = max(last_day, date.fromisoformat(max(sums)))
+        last = _bucket_start(last_day, interval)
+
+        net_worth = opening_balance
+        period = first
+        while period <= last:
+            entry = sums.get(period.isoformat(), {'income': 0.0, 'expense': 0.0})
+            net = entry['income'] - entry['expense']
+            net_worth += net
+            buckets.append({
+                'period': period.isoformat(),
+                'income': round(entry['income'], 2),
+                'expense': round(entry['expense'], 2),
+                'net': round(net, 2),
+                'net_worth': round(net_worth, 2),
+            })
+            period = _next_bucket(period, interval)
+
+    return jsonify({
+        'interval': interval,
         'base_currency': base_currency,
+        'opening_balance': round(opening_balance, 2),
+        'buckets': buckets,
     })
+
+
+@bp.route('/by-category', methods=['GET'])
+@jwt_required(locations=['cookies'])
+@cached_by_user(rates_generation)
+def get_statistics_by_category():
+    """Суми по категоріях (окремо для expense/income), сконвертовані в base_currency.
+
+    Приймає ті ж фільтри, що й GET /api/transactions.
+    """
+    user_id = int(get_jwt_identity())
+    base_currency = (request.args.get('base_currency') or 'USD').upper()
+
+    rows = aggregate_totals(user_id, request.args, group_by=('category_id',))
+    categories = {c.id: c for c in db.session.query(Category.id, Category.name, Category.icon).filter(
+        Category.id.in_({r[0] for r in rows}))}
+
+    converted_totals = convert_amounts_on(
+        [r[3] for r in rows], [r[1] for r in rows], [r[5] for r in rows], base_currency
+    )
+    items = {}
+    for (category_id, currency, t_type, total, count, _), converted in zip(rows, converted_totals):
+        category = categories.get(category_id)
+        if category is None:
+            continue
+        item = items.setdefault((category_id, t_type), {
+            'category_id': category_id,
+            'name': category.name,
+            'icon': category.icon,
+            'type': t_type,
+            'total': 0.0,
+            'count': 0,
+        })
+        item['total'] += converted
+        item['count'] += count
+
+    result = sorted(items.values(), key=lambda item: item['total'], reverse=True)
+    for item in result:
+        item['total'] = round(item['total'], 2)
+    return jsonify({'base_currency': base_currency, 'items': result})
+
+
+@bp.route('/by-wallet', methods=['GET'])
+@jwt_required(locations=['cookies'])
+@cached_by_user(rates_generation)
+def get_statistics_by_wallet():
+    """Доходи/витрати по гаманцях, сконвертовані в base_currency.
+
+    Приймає ті ж фільтри, що й GET /api/transactions.
+    """
+    user_id = int(get_jwt_identity())
+    base_currency = (request.args.get('base_currency') or 'USD').upper()
+
+    rows = aggregate_totals(user_id, request.args, group_by=('wallet_id',))
+    wallets = {w.id: w for w in db.session.query(Wallet.id, Wallet.name, Wallet.icon).filter(
+        Wallet.id.in_({r[0] for r in rows}))}
+
+    converted_totals = convert_amounts_on(
+        [r[3] for r in rows], [r[1] for r in rows], [r[5] for r in rows], base_currency
+    )
+    items = {}
+    for (wallet_id, currency, t_type, total, count, _), converted in zip(rows, converted_totals):
+        wallet = wallets[wallet_id]
+        item = items.setdefault(wallet_id, {
+            'wallet_id': wallet_id,
+            'name': wallet.name,
+            'icon': wallet.icon,
+            'currency': currency,
+            'income': 0.0,
+            'expense': 0.0,
+            'count': 0,
+        })
+        if t_type in ('income', 'expense'):
+            item[t_type] += converted
+        item['count'] += count
+
+    result = list(items.values())
+    for item in result:
+        item['net'] = round(item['income'] - item['expense'], 2)
+        item['income'] = round(item['income'], 2)
+        item['expense'] = round(item['expense'], 2)
+    result.sort(key=lambda item: item['wallet_id'])
+    return jsonify({'base_currency': base_currency, 'items': result})
@@ -0,0 +1,75 @@
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import db, Transaction, Wallet, Category, Tombstone
+
+import base64
+import json
+from datetime import datetime, timedelta
+
+bp = Blueprint('sync', __name__, url_prefix='/api/sync')
+
+# Rows committed slightly after their modified_at was set must not be missed,
+# so every delta re-sends the last few seconds (clients upsert by id anyway)
+SYNC_OVERLAP = timedelta(seconds=5)
+# Tombstones older than this may be pruned; older tokens get a full resync
+TOMBSTONE_RETENTION = timedelta(days=90)
+_DELETED_KEYS = {'transaction': 'transactions', 'wallet': 'wallets', 'category': 'categories'}
+
+
+def encode_sync_token(moment):
+    return base64.urlsafe_b64encode(json.dumps({'t': moment.isoformat()}).encode()).decode()
+
+
+def decode_sync_token(token):
+    """Кидає ValueError для некоректного токена"""
+    try:
+        return datetime.fromisoformat(json.loads(base64.urlsafe_b64decode(token.encode()))['t'])
+    except Exception as exc:
+        raise ValueError('Invalid sync token') from exc
+
+
+@bp.route('', methods=['GET'])
+@jwt_required(locations=['cookies'])
+def get_changes():
+    """Дельта-синхронізація.
+
+    Без since (або з застарілим токеном) -> усі дані, full=true: клієнт замінює кеш.
+    З since -> лише створені/змінені рядки і id видалених (deleted) з моменту токена.
+    Клієнт спершу застосовує deleted, потім upsert за id, і зберігає новий token.
+    Транзакції — у compact-формі (wallet_id/category_id без вкладених об'єктів).
+    """
+    user_id = int(get_jwt_identity())
+    now = datetime.utcnow()
+
+    since = request.args.get('since')
+    lower = None
+    if since:
+        try:
+            since_moment = decode_sync_token(since)
+        except ValueError:
+            return jsonify({"msg": "Invalid sync token"}), 400
+        if since_moment >= now - TOMBSTONE_RETENTION:
+            lower = since_moment - SYNC_OVERLAP
+
+    transactions = Transaction.query.filter(Transaction.user_id == user_id)
+    wallets = Wallet.query.filter(Wallet.user_id == user_id)
+    categories = Category.query.filter(Category.user_id == user_id)
+    deleted = {'transactions': [], 'wallets': [], 'categories': []}
+    if lower is not None:
+        transactions = transactions.filter(Transaction.modified_at >= lower)
+        wallets = wallets.filter(Wallet.modified_at >= lower)
+        categories = categories.filter(Category.modified_at >= lower)
+        tombstones = db.session.query(Tombstone.entity, Tombstone.entity_id).filter(
+            Tombstone.user_id == user_id, Tombstone.deleted_at >= lower
+        )
+        for entity, entity_id in tombstones:
+            deleted[_DELETED_KEYS[entity]].append(entity_id)
+
+    return jsonify({
+        'token': encode_sync_token(now),
+        'full': lower is None,
+        'transactions': [t.to_dict(compact=True) for t in transactions],
+        'wallets': [w.to_dict() for w in wallets],
+        'categories': [c.to_dict() for c in categories],
+        'deleted': deleted,
+    })
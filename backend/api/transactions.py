@@ -1,12 +1,38 @@
-from flask import Blueprint, jsonify, abort, request
+from flask import Blueprint, Response, jsonify, abort, request, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Transaction
-from sqlalchemy.orm import selectinload
+from models import (
+    db, Transaction, Wallet, Category,
+    signed_amount, apply_balance_deltas, bump_data_versions, apply_rollup_deltas, add_rollup_delta
+)
+from sqlalchemy import String, cast, func, or_, tuple_
+
+import base64
+import csv
+import io
+import json
+import math
+import os
+import re
+from collections import Counter
+
+from cache import invalidate_user_cache
+from read_models import transaction_rows, serialize_transaction_rows
+
+from .statements import StatementError, iter_statement
+from .conditional import conditional_on_data_version
 
 bp = Blueprint('transactions', __name__, url_prefix='/api/transactions')
 
 from datetime import datetime
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+BULK_CHUNK_SIZE = 1000
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FIELDS = ('id', 'date', 'type', 'amount', 'currency', 'wallet', 'category', 'title', 'description')
+MAX_BULK_ROWS = 100_000
+_NUMERIC_SEARCH = re.compile(r'\d+([.,]\d*)?')
+
 def parse_local_datetime(dt_str):
     """Парсити дату у форматі YYYY-MM-DDTHH:MM:SS як локальний час"""
     try:
@@ -14,40 +40,209 @@ def parse_local_datetime(dt_str):
     except Exception:
         return datetime.fromisoformat(dt_str)
 
-@bp.route('', methods=['GET'])
-@jwt_required(locations=['cookies'])
-def get_transactions():
-    """Отримати всі транзакції з фільтрацією"""
-    user_id = int(get_jwt_identity())
-    
-    category_id = request.args.get('category_id')
-    wallet_id = request.args.get('wallet_id')
-    transaction_type = request.args.get('type')  # 'expense', 'income', або None
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    
-    query = Transaction.query.filter_by(user_id=user_id)
-    
+def parse_amount(value):
+    """Сума транзакції: скінченне додатне число (NaN/inf зіпсували б баланси й ролапи), інакше ValueError"""
+    amount = float(value)
+    if not math.isfinite(amount) or amount <= 0:
+        raise ValueError(f'Invalid amount: {value!r}')
+    return amount
+
+def _parse_list(value):
+    """'1,2' або '1' -> ['1', '2']"""
+    return [v.strip() for v in value.split(',') if v.strip()]
+
+
+def apply_transaction_filters(query, args, model=Transaction):
+    """Застосувати фільтри get_transactions() до запиту по Transaction.
+
+    category_id, wallet_id і type приймають одне значення або список через кому.
+    model=MonthlyRollup: ті ж фільтри гаманця/категорії/типу для ролапів
+    (дат і пошуку в них немає, тож start_date/end_date/search не передавати).
+    """
+    category_id = args.get('category_id')
+    wallet_id = args.get('wallet_id')
+    transaction_type = args.get('type')  # 'expense', 'income', або None
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
+    search = (args.get('search') or '').strip()
+
     if category_id:
-        query = query.filter_by(category_id=int(category_id))
+        query = query.filter(model.category_id.in_([int(c) for c in _parse_list(category_id)]))
     if wallet_id:
-        query = query.filter_by(wallet_id=int(wallet_id))
+        query = query.filter(model.wallet_id.in_([int(w) for w in _parse_list(wallet_id)]))
     if transaction_type:
-        query = query.filter_by(type=transaction_type)
+        query = query.filter(model.type.in_(_parse_list(transaction_type)))
     if start_date:
         query = query.filter(Transaction.date >= datetime.fromisoformat(start_date))
     if end_date:
         query = query.filter(Transaction.date <= datetime.fromisoformat(end_date))
-    
-    transactions = query.options(
-        selectinload(Transaction.category),
-        selectinload(Transaction.wallet)
-    ).order_by(
+    if search:
+        pattern = f'%{search}%'
+        conditions = [Transaction.title.ilike(pattern), Transaction.description.ilike(pattern)]
+        if _NUMERIC_SEARCH.fullmatch(search):
+            # Numbers also match the amount as text, like the old client-side search did
+            conditions.append(cast(Transaction.amount, String).like(f"%{search.replace(',', '.')}%"))
+        query = query.filter(or_(*conditions))
+    return query
+
+
+def encode_cursor(transaction):
+    """Непрозорий курсор на позицію транзакції у порядку (date, modified_at, id) desc"""
+    key = [transaction.date.isoformat(), transaction.modified_at.isoformat(), transaction.id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Розібрати курсор з encode_cursor(). Кидає ValueError для некоректного курсора."""
+    try:
+        date_str, modified_str, transaction_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(date_str), datetime.fromisoformat(modified_str), int(transaction_id)
+    except Exception as exc:
+        raise ValueError('Invalid cursor') from exc
+
+
+@bp.route('', methods=['GET'])
+@jwt_required(locations=['cookies'])
+@conditional_on_data_version
+def get_transactions():
+    """Отримати транзакції з фільтрацією
+
+    compact=true -> транзакції посилаються на гаманці/категорії за id, а самі
+    гаманці/категорії повертаються один раз у бічних таблицях.
+
+    limit=N [cursor=...] -> keyset-пагінація: повертає об'єкт з 'transactions'
+    і 'next_cursor' (None на останній сторінці). Без limit повертається вся історія.
+    """
+    user_id = int(get_jwt_identity())
+    compact = request.args.get('compact', 'false').lower() in ('1', 'true', 'yes')
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor')
+
+    query = apply_transaction_filters(Transaction.query.filter_by(user_id=user_id), request.args)
+
+    if limit is not None:
+        try:
+            limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        except ValueError:
+            limit = DEFAULT_PAGE_SIZE
+        if cursor:
+            try:
+                key = decode_cursor(cursor)
+            except ValueError:
+                return jsonify({"msg": "Invalid cursor"}), 400
+            query = query.filter(tuple_(Transaction.date, Transaction.modified_at, Transaction.id) < tuple_(*key))
+
+    # Column rows instead of ORM instances; wallets/categories are read once per request
+    query = transaction_rows(query).order_by(
         Transaction.date.desc(),
-        Transaction.modified_at.desc()
-    ).all()
-    
-    return jsonify([t.to_dict() for t in transactions])
+        Transaction.modified_at.desc(),
+        Transaction.id.desc()
+    )
+
+    if limit is None:
+        return jsonify(serialize_transaction_rows(query.all(), user_id, compact=compact))
+
+    transactions = query.limit(limit + 1).all()
+    has_more = len(transactions) > limit
+    transactions = transactions[:limit]
+
+    payload = serialize_transaction_rows(transactions, user_id, compact=compact)
+    if not compact:
+        payload = {'transactions': payload}
+    payload['next_cursor'] = encode_cursor(transactions[-1]) if has_more else None
+    return jsonify(payload)
+
+
+@bp.route('/bounds', methods=['GET'])
+@jwt_required(locations=['cookies'])
+@conditional_on_data_version
+def get_transaction_bounds():
+    """Дата найстарішої та найновішої транзакції (для вибору місяця без завантаження історії)"""
+    user_id = int(get_jwt_identity())
+    first_date, last_date = db.session.query(
+        func.min(Transaction.date), func.max(Transaction.date)
+    ).filter(Transaction.user_id == user_id).one()
+    return jsonify({
+        'first_date': first_date.isoformat() if first_date else None,
+        'last_date': last_date.isoformat() if last_date else None,
+    })
+
+
+def _export_rows(query):
+    """Рядки експорту як dict; БД віддає їх пачками по EXPORT_BATCH_SIZE (yield_per)."""
+    for row in query.execution_options(yield_per=EXPORT_BATCH_SIZE):
+        yield {
+            'id': row.id,
+            'date': row.date.isoformat(),
+            'type': row.type,
+            'amount': row.amount,
+            'currency': row.currency,
+            'wallet': row.wallet,
+            'category': row.category,
+            'title': row.title,
+            'description': row.description,
+        }
+
+
+def _csv_chunks(rows):
+    """CSV з заголовком; рядки збираються в буфер і віддаються шматками"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for index, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if index % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson_chunks(rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, ensure_ascii=False))
+        if len(lines) == EXPORT_BATCH_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+@bp.route('/export', methods=['GET'])
+@jwt_required(locations=['cookies'])
+def export_transactions():
+    """Експорт транзакцій потоком: format=csv (default) | ndjson.
+
+    Приймає ті ж фільтри, що й GET /api/transactions. Рядки читаються з БД
+    пачками і одразу віддаються клієнту, тож пам'ять не залежить від обсягу історії.
+    """
+    user_id = int(get_jwt_identity())
+    export_format = (request.args.get('format') or 'csv').lower()
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({"msg": "format must be one of: csv, ndjson"}), 400
+
+    query = db.session.query(
+        Transaction.id, Transaction.date, Transaction.type, Transaction.amount,
+        Transaction.title, Transaction.description,
+        Wallet.currency, Wallet.name.label('wallet'), Category.name.label('category')
+    ).join(Wallet, Transaction.wallet_id == Wallet.id).join(
+        Category, Transaction.category_id == Category.id
+    ).filter(Transaction.user_id == user_id)
+    query = apply_transaction_filters(query, request.args).order_by(
+        Transaction.date.desc(), Transaction.modified_at.desc(), Transaction.id.desc()
+    )
+
+    if export_format == 'csv':
+        chunks, mimetype = _csv_chunks(_export_rows(query)), 'text/csv'
+    else:
+        chunks, mimetype = _ndjson_chunks(_export_rows(query)), 'application/x-ndjson'
+
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=transactions.{export_format}'},
+    )
 
 
 @bp.route('', methods=['POST'])
@@ -64,9 +259,13 @@ def create_transaction():
         return jsonify({"msg": "Valid transaction type is required (expense or income)"}), 400
     if not data.get('category_id'):
         return jsonify({"msg": "Category is required"}), 400
+    try:
+        amount = parse_amount(data.get('amount'))
+    except (TypeError, ValueError):
+        return jsonify({"msg": "Valid amount is required"}), 400
 
     transaction = Transaction(
-        amount=float(data.get('amount')),
+        amount=amount,
         date=parse_local_datetime(data.get('date')),
         title=data.get('title'),
         description=data.get('description'),
@@ -79,10 +278,256 @@ def create_transaction():
 
     db.session.add(transaction)
     db.session.commit()
+    invalidate_user_cache(user_id)
 
     return jsonify(transaction.to_dict()), 201
 
 
+def validate_bulk_row(data, user_id, wallet_ids, category_ids, now):
+    """Перевірити один рядок імпорту. Повертає (values, None) або (None, повідомлення)."""
+    if not isinstance(data, dict):
+        return None, "Row must be an object"
+    if data.get('type') not in ('expense', 'income'):
+        return None, "Valid transaction type is required (expense or income)"
+    try:
+        wallet_id = int(data.get('wallet_id'))
+    except (TypeError, ValueError):
+        return None, "Wallet is required"
+    if wallet_id not in wallet_ids:
+        return None, "Wallet not found"
+    try:
+        category_id = int(data.get('category_id'))
+    except (TypeError, ValueError):
+        return None, "Category is required"
+    if category_id not in category_ids:
+        return None, "Category not found"
+    try:
+        amount = parse_amount(data.get('amount'))
+    except (TypeError, ValueError):
+        return None, "Valid amount is required"
+    try:
+        tx_date = parse_local_datetime(data.get('date'))
+    except (TypeError, ValueError):
+        return None, "Valid date is required"
+
+    return {
+        'amount': amount,
+        'date': tx_date,
+        'title': data.get('title'),
+        'description': data.get('description'),
+        'type': data['type'],
+        'category_id': category_id,
+        'wallet_id': wallet_id,
+        'user_id': user_id,
+        'modified_at': now,
+    }, None
+
+
+def insert_transactions(rows, chunk_size=BULK_CHUNK_SIZE):
+    """Вставити вже перевірені рядки (dict колонок) пачками через executemany.
+
+    ORM-події не спрацьовують, тому баланси гаманців (одним UPDATE на гаманець),
+    місячні ролапи і версії даних користувачів оновлюються тут. Коміт — на стороні виклику (усе в одній транзакції).
+    """
+    connection = db.session.connection()
+    table = Transaction.__table__
+    deltas = {}
+    rollup_deltas = {}
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        connection.execute(table.insert(), chunk)
+        for row in chunk:
+            deltas[row['wallet_id']] = deltas.get(row['wallet_id'], 0.0) + signed_amount(row['type'], row['amount'])
+            add_rollup_delta(rollup_deltas, row['user_id'], row['wallet_id'], row['category_id'],
+                              row['date'], row['type'], row['amount'], 1)
+    apply_balance_deltas(connection, deltas)
+    apply_rollup_deltas(connection, rollup_deltas)
+    bump_data_versions(connection, {row['user_id'] for row in rows})
+    # Loaded Wallet objects no longer match the updated balance column
+    for obj in db.session.identity_map.values():
+        if isinstance(obj, Wallet) and obj.id in deltas:
+            db.session.expire(obj, ['balance'])
+    return len(rows)
+
+
+def _iter_bulk_payload():
+    """Рядки тіла запиту: JSON-масив або NDJSON (один об'єкт на рядок).
+
+    NDJSON читається з потоку построково, без завантаження всього тіла.
+    Некоректний JSON у рядку NDJSON повертається як помилка цього рядка.
+    """
+    if request.mimetype in ('application/x-ndjson', 'application/ndjson', 'application/jsonl'):
+        for line in io.TextIOWrapper(request.stream, encoding='utf-8'):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line), None
+            except ValueError:
+                yield None, "Invalid JSON"
+        return
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('transactions')
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON array of transactions or NDJSON")
+    for item in data:
+        yield item, None
+
+
+@bp.route('/bulk', methods=['POST'])
+@jwt_required(locations=['cookies'])
+def create_transactions_bulk():
+    """Масовий імпорт транзакцій.
+
+    Тіло: JSON-масив (або {"transactions": [...]}) чи NDJSON
+    (Content-Type: application/x-ndjson). Поля як у POST /api/transactions.
+    Власність гаманців/категорій перевіряється одним запитом на весь імпорт;
+    коректні рядки вставляються пачками в одній транзакції БД.
+
+    all_or_nothing=true -> нічого не вставляти, якщо є хоч одна помилка.
+    Відповідь: {"inserted": N, "errors": [{"index": i, "msg": ...}]}
+    """
+    user_id = int(get_jwt_identity())
+    all_or_nothing = request.args.get('all_or_nothing', 'false').lower() in ('1', 'true', 'yes')
+
+    wallet_ids = {w for (w,) in db.session.query(Wallet.id).filter(Wallet.user_id == user_id)}
+    category_ids = {c for (c,) in db.session.query(Category.id).filter(Category.user_id == user_id)}
+    now = datetime.utcnow()
+
+    rows = []
+    errors = []
+    try:
+        for index, (item, error) in enumerate(_iter_bulk_payload()):
+            if index >= MAX_BULK_ROWS:
+                return jsonify({"msg": f"Too many rows (max {MAX_BULK_ROWS})"}), 413
+            if error is None:
+                values, error = validate_bulk_row(item, user_id, wallet_ids, category_ids, now)
+            if error is not None:
+                errors.append({'index': index, 'msg': error})
+            else:
+                rows.append(values)
+    except ValueError as exc:
+        return jsonify({"msg": str(exc)}), 400
+
+    if errors and (all_or_nothing or not rows):
+        return jsonify({"msg": "No transactions imported", "inserted": 0, "errors": errors}), 400
+
+    inserted = insert_transactions(rows)
+    db.session.commit()
+    invalidate_user_cache(user_id)
+    return jsonify({"inserted": inserted, "errors": errors}), 201
+
+
+def _statement_category_resolver(user_id, default_category_id):
+    """name, type -> category_id серед категорій користувача (інакше default)"""
+    by_name = {}
+    for category in Category.query.filter_by(user_id=user_id):
+        by_name.setdefault((category.name.lower(), category.type), category.id)
+
+    def resolve(name, t_type):
+        if name:
+            key = name.lower()
+            return by_name.get((key, t_type)) or by_name.get((key, 'both')) or default_category_id
+        return default_category_id
+    return resolve
+
+
+def _dedup_key(row):
+    return row['date'], round(row['amount'], 2), row['type'], row['title']
+
+
+@bp.route('/import', methods=['POST'])
+@jwt_required(locations=['cookies'])
+def import_statement():
+    """Імпорт банківської виписки (multipart/form-data).
+
+    Поля: file (CSV або OFX/QFX), wallet_id, format=csv|ofx (інакше за розширенням),
+    category_id (для рядків без відомої категорії; default Uncategorized), date_format (strptime).
+    Файл розбирається потоком. Рядки, що вже є в гаманці (date, amount, type, title),
+    пропускаються, тож повторний імпорт перекривної виписки нічого не дублює.
+    Відповідь: {"inserted": N, "duplicates": M, "errors": [{"line": n, "msg": ...}]}
+    """
+    user_id = int(get_jwt_identity())
+    upload = request.files.get('file')
+    if not upload:
+        return jsonify({"msg": "File is required"}), 400
+
+    wallet = db.session.get(Wallet, request.form.get('wallet_id', type=int) or 0)
+    if not wallet or wallet.user_id != user_id:
+        return jsonify({"msg": "Wallet not found"}), 404
+
+    statement_format = (request.form.get('format') or os.path.splitext(upload.filename or '')[1].lstrip('.')).lower()
+    statement_format = 'ofx' if statement_format in ('ofx', 'qfx') else 'csv'
+
+    default_category = Category.query.filter_by(user_id=user_id, name='Uncategorized').first()
+    default_category_id = request.form.get('category_id', type=int)
+    if default_category_id is not None:
+        if not Category.query.filter_by(id=default_category_id, user_id=user_id).first():
+            return jsonify({"msg": "Category not found"}), 404
+    elif default_category:
+        default_category_id = default_category.id
+    else:
+        return jsonify({"msg": "Category is required"}), 400
+    resolve_category = _statement_category_resolver(user_id, default_category_id)
+
+    now = datetime.utcnow()
+    rows = []
+    errors = []
+    try:
+        for item in iter_statement(upload.stream, statement_format, request.form.get('date_format')):
+            if isinstance(item, StatementError):
+                errors.append({'line': item.line, 'msg': item.msg})
+                continue
+            t_type = 'income' if item['amount'] > 0 else 'expense'
+            rows.append({
+                'amount': abs(item['amount']),
+                'date': item['date'],
+                'title': item['title'],
+                'description': item['description'],
+                'type': t_type,
+                'category_id': resolve_category(item['category'], t_type),
+                'wallet_id': wallet.id,
+                'user_id': user_id,
+                'modified_at': now,
+            })
+    except (ValueError, UnicodeDecodeError) as exc:
+        return jsonify({"msg": str(exc)}), 400
+
+    # Existing rows in the statement's date range, as a multiset: a statement may
+    # legitimately contain identical rows, and only as many as already stored are skipped
+    existing = Counter()
+    if rows:
+        stored = db.session.query(
+            Transaction.date, Transaction.amount, Transaction.type, Transaction.title
+        ).filter(
+            Transaction.wallet_id == wallet.id,
+            Transaction.date >= min(r['date'] for r in rows),
+            Transaction.date <= max(r['date'] for r in rows),
+        )
+        existing.update(
+            (date, round(amount, 2), t_type, title) for date, amount, t_type, title in stored
+        )
+
+    new_rows = []
+    for row in rows:
+        key = _dedup_key(row)
+        if existing[key] > 0:
+            existing[key] -= 1
+        else:
+            new_rows.append(row)
+
+    inserted = insert_transactions(new_rows)
+    db.session.commit()
+    invalidate_user_cache(user_id)
+    return jsonify({
+        "inserted": inserted,
+        "duplicates": len(rows) - inserted,
+        "errors": errors,
+    }), 201
+
+
 @bp.route('/<int:transaction_id>', methods=['PUT'])
 @jwt_required(locations=['cookies'])
 def update_transaction(transaction_id):
@@ -107,7 +552,10 @@ def update_transaction(transaction_id):
         return jsonify({"msg": "Category is required"}), 400
 
     if 'amount' in data:
-        transaction.amount = float(data['amount'])
+        try:
+            transaction.amount = parse_amount(data['amount'])
+        except (TypeError, ValueError):
+            return jsonify({"msg": "Valid amount is required"}), 400
     if 'date' in data:
         transaction.date = parse_local_datetime(data['date'])
     if 'title' in data:
@@ -124,6 +572,7 @@ def update_transaction(transaction_id):
     transaction.modified_at = datetime.utcnow()
 
     db.session.commit()
+    invalidate_user_cache(user_id)
 
     return jsonify(transaction.to_dict())
 
@@ -143,5 +592,6 @@ def delete_transaction(transaction_id):
     
     db.session.delete(transaction)
     db.session.commit()
+    invalidate_user_cache(user_id)
     
     return jsonify({"msg": "Transaction deleted"}), 200
\ No newline at end of file
@@ -2,17 +2,21 @@ from flask import Blueprint, jsonify, abort, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, Wallet, Category, Transaction
 from datetime import datetime
-from sqlalchemy.orm import selectinload
+
+from cache import cached_by_user, invalidate_user_cache
+from read_models import wallet_dict, wallet_rows
+
+from .conditional import conditional_on_data_version
 
 bp = Blueprint('wallets', __name__, url_prefix='/api/wallets')
 
 @bp.route('', methods=['GET'])
 @jwt_required(locations=['cookies'])
+@conditional_on_data_version
+@cached_by_user()
 def get_wallets():
     user_id = int(get_jwt_identity())
-    # wallets = Wallet.query.filter_by(user_id=user_id).all()
-    wallets = Wallet.query.options(selectinload(Wallet.transactions)).filter_by(user_id=user_id).all()
-    return jsonify([wallet.to_dict() for wallet in wallets])
+    return jsonify([wallet_dict(row) for row in wallet_rows(user_id)])
 
 
 @bp.route('', methods=['POST'])
@@ -55,6 +59,7 @@ def create_wallet():
         db.session.add(transaction)
         db.session.commit()
 
+    invalidate_user_cache(user_id)
     return jsonify(wallet.to_dict()), 201
 
 
@@ -112,6 +117,7 @@ def update_wallet(wallet_id):
         wallet.currency = data['currency']
     
     db.session.commit()
+    invalidate_user_cache(user_id)
     
     return jsonify(wallet.to_dict())
 
@@ -136,6 +142,7 @@ def delete_wallet(wallet_id):
     
     db.session.delete(wallet)
     db.session.commit()
+    invalidate_user_cache(user_id)
     
     return jsonify({"msg": "Wallet deleted"}), 200
 
@@ -1,5 +1,6 @@
 from flask import (
     Flask,
+    Response,
     jsonify,
     request,
 )
@@ -21,13 +22,28 @@ from flask_jwt_extended import (
 )
 
 from config import Config
+from database import configure_database
+from cache import configure_cache, read_cache
+from json_provider import configure_json
+from compression import configure_compression
+from seed import seed_database
+from instrumentation import configure_instrumentation, render_prometheus
 
 from datetime import datetime, timedelta
+import os
 import random
+import time
+import click
+import csv
 from models import (
     db, User, Transaction, Category, Wallet,
     create_default_categories_for_user, 
-    create_default_wallets_for_user
+    create_default_wallets_for_user,
+    rebuild_wallet_balances,
+    verify_wallet_balances,
+    prune_tombstones,
+    rebuild_monthly_rollups,
+    upgrade_schema
 )
 
 from api.auth import bp as auth_bp
@@ -35,7 +51,14 @@ from api.wallets import bp as wallets_bp
 from api.categories import bp as categories_bp
 from api.transactions import bp as transactions_bp
 from api.stats import bp as stats_bp
-from api.rates import bp as rates_bp
+from api.sync import bp as sync_bp, TOMBSTONE_RETENTION
+from api.rates import (
+    bp as rates_bp,
+    configure_rates,
+    load_exchange_rates,
+    restore_rates_from_db,
+    save_rates_snapshot,
+)
 
 app = Flask(__name__)
 
@@ -43,18 +66,48 @@ app.config.from_object(Config)
 
 # CORS(app)  # Allows all domains (for development)
 # CORS(app, supports_credentials=True, origins=["http://localhost:3000", "http://localhost:5173"])
-CORS(app, supports_credentials=True)
+CORS(app, supports_credentials=True, expose_headers=['ETag'])
 
+configure_database(app)
 db.init_app(app)
 jwt = JWTManager(app)
+configure_cache(app.config)
+configure_json(app)
+configure_compression(app)
+configure_instrumentation(app)
+
+
+def persist_rates(rates):
+    """Store a freshly fetched rate table (may run in the background refresh thread)."""
+    if not app.config.get('RATES_PERSIST'):
+        return
+    with app.app_context():
+        save_rates_snapshot(rates)
+
+
+configure_rates(source=app.config.get('RATES_SOURCE'), on_refresh=persist_rates)
 
 app.register_blueprint(auth_bp)
 app.register_blueprint(wallets_bp)
 app.register_blueprint(categories_bp)
 app.register_blueprint(transactions_bp)
 app.register_blueprint(stats_bp)
+app.register_blueprint(sync_bp)
 app.register_blueprint(rates_bp)
 
+
+def init_database():
+    """Схема БД і збережені курси — при кожному старті, не лише через `python app.py`"""
+    db.create_all()
+    upgrade_schema()
+    if app.config.get('RATES_PERSIST'):
+        # Stats convert with the last stored rates instead of the built-in table until a fetch completes
+        restore_rates_from_db()
+
+
+with app.app_context():
+    init_database()
+
 # login_manager = LoginManager()
 # login_manager.init_app(app)
 # login_manager.login_view = 'login'
@@ -67,6 +120,27 @@ app.register_blueprint(rates_bp)
 def ping():
     return jsonify({"message": "pong"})
 
+@app.route('/api/_cache', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters of the read cache (only with DIAGNOSTICS_ENDPOINTS)"""
+    if not app.config.get('DIAGNOSTICS_ENDPOINTS'):
+        return jsonify({"msg": "Not found"}), 404
+    return jsonify(read_cache.stats())
+
+@app.route('/api/_metrics', methods=['GET'])
+def metrics_endpoint():
+    """Request/SQL counters and read cache stats in Prometheus text format (only with DIAGNOSTICS_ENDPOINTS)"""
+    if not app.config.get('DIAGNOSTICS_ENDPOINTS'):
+        return jsonify({"msg": "Not found"}), 404
+    cache = read_cache.stats()
+    extra = [
+        ('budget_read_cache_hits_total', 'counter', cache['hits']),
+        ('budget_read_cache_misses_total', 'counter', cache['misses']),
+        ('budget_read_cache_invalidations_total', 'counter', cache['invalidations']),
+        ('budget_read_cache_hit_ratio', 'gauge', cache['hit_ratio']),
+    ]
+    return Response(render_prometheus(extra), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/echo', methods=['POST'])
 def echo():
     data = request.get_json()
@@ -188,17 +262,110 @@ def create_test_user_with_data():
     else:
         print("Test user already exists.")
 
+# MARK: CLI
+@app.cli.command('upgrade-db')
+def upgrade_db():
+    """Create missing tables, columns and indexes in an existing database."""
+    db.create_all()
+    upgrade_schema()
+    click.echo("Database schema is up to date.")
+
+
+@app.cli.group('balances')
+def balances_cli():
+    """Maintain stored wallet balances."""
+
+
+@balances_cli.command('rebuild')
+def balances_rebuild():
+    """Recompute every wallet balance from its transactions."""
+    upgrade_schema()
+    count = rebuild_wallet_balances()
+    click.echo(f"Rebuilt balances for {count} wallets.")
+
+
+@balances_cli.command('verify')
+def balances_verify():
+    """Compare stored wallet balances with their transactions."""
+    upgrade_schema()
+    mismatches = verify_wallet_balances()
+    for wallet_id, stored, actual in mismatches:
+        click.echo(f"Wallet {wallet_id}: stored {stored} != actual {actual}")
+    if mismatches:
+        raise SystemExit(1)
+    click.echo("All wallet balances are consistent.")
+
+
+@app.cli.command('seed')
+@click.option('--users', default=1, show_default=True, help='Users to create.')
+@click.option('--transactions', default=10000, show_default=True, help='Transactions per user.')
+@click.option('--seed', 'random_seed', default=42, show_default=True, help='Random seed (same seed -> same data).')
+@click.option('--batch-size', default=50000, show_default=True, help='Rows per INSERT batch.')
+@click.option('--prefix', default='seed', show_default=True, help='Usernames are <prefix><n>.')
+@click.option('--password', default='test', show_default=True)
+def seed_command(users, transactions, random_seed, batch_size, prefix, password):
+    """Generate users with random transactions for local load testing."""
+    db.create_all()
+    upgrade_schema()
+    taken = User.query.filter(User.username.in_([f'{prefix}{i}' for i in range(users)])).count()
+    if taken:
+        raise click.ClickException(f"{taken} of the '{prefix}*' users already exist; use another --prefix.")
+
+    started = time.perf_counter()
+
+    def progress(inserted, total):
+        click.echo(f"\r{inserted}/{total} transactions ({time.perf_counter() - started:.0f}s)", nl=False)
+
+    seed_database(users=users, transactions=transactions, seed=random_seed, batch_size=batch_size,
+                  prefix=prefix, password=password, progress=progress)
+    click.echo(f"\nSeeded {users} users x {transactions} transactions in {time.perf_counter() - started:.1f}s.")
+
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Recompute the monthly statistics rollups from transactions."""
+    upgrade_schema()
+    count = rebuild_monthly_rollups()
+    click.echo(f"Rebuilt {count} monthly rollup rows.")
+
+
+@app.cli.command('prune-tombstones')
+def prune_tombstones_command():
+    """Delete sync tombstones older than the retention window (clients past it resync fully)."""
+    count = prune_tombstones(datetime.utcnow() - TOMBSTONE_RETENTION)
+    click.echo(f"Pruned {count} tombstones.")
+
+
+@app.cli.group('rates')
+def rates_cli():
+    """Manage stored exchange rate history."""
+
+
+@rates_cli.command('load')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def rates_load(path):
+    """Bulk load historical rates from a CSV with header: date,currency,rate.
+
+    rate is units of the currency per 1 USD; existing (date, currency) rows are overwritten.
+    """
+    db.create_all()
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = ((r['date'], r['currency'], r['rate']) for r in csv.DictReader(f))
+        count = load_exchange_rates(rows)
+    click.echo(f"Loaded {count} exchange rates.")
+
 # Run server
 if __name__ == '__main__':
-    # Enable SQLAlchemy logging only for local run
+    # Statements slower than SLOW_QUERY_MS are logged by instrumentation ('budget.sql');
+    # set SQL_ECHO=1 to log every statement
     import logging
     logging.basicConfig()
-    logging.getLogger('sqlalchemy.engine').setLevel(logging.INFO)
+    if os.environ.get('SQL_ECHO') == '1':
+        logging.getLogger('sqlalchemy.engine').setLevel(logging.INFO)
 
     print("Starting Flask server...")
 
     with app.app_context():
-        db.create_all()
         create_test_user_with_data()
 
     app.run(debug=True, port=5000, host='0.0.0.0')
\ No newline at end of file
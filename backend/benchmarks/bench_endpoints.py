@@ -0,0 +1,48 @@
+"""Латентність, кількість запитів і пам'ять кожного ендпоінта API (див. conftest.py)."""
+import pytest
+
+MONTH = 'start_date=2024-03-01T00:00:00&end_date=2024-03-31T23:59:59'
+YEAR = 'start_date=2023-01-15T00:00:00&end_date=2024-01-14T23:59:59'
+
+READ_ENDPOINTS = {
+    'wallets': '/api/wallets',
+    'categories': '/api/categories',
+    'transactions': '/api/transactions',
+    'transactions compact': '/api/transactions?compact=true',
+    'transactions page': '/api/transactions?limit=100',
+    'transactions month': f'/api/transactions?{MONTH}',
+    'transactions search': '/api/transactions?search=Netflix&limit=100',
+    'transaction bounds': '/api/transactions/bounds',
+    'export csv': '/api/transactions/export?format=csv',
+    'export ndjson': '/api/transactions/export?format=ndjson',
+    'statistics': '/api/statistics?base_currency=USD',
+    'statistics year': f'/api/statistics?base_currency=USD&{YEAR}',
+    'series month': f'/api/statistics/series?interval=month&base_currency=USD&{YEAR}',
+    'series day': f'/api/statistics/series?interval=day&base_currency=USD&{MONTH}',
+    'by category': f'/api/statistics/by-category?base_currency=USD&{YEAR}',
+    'by wallet': f'/api/statistics/by-wallet?base_currency=USD&{YEAR}',
+    'sync full': '/api/sync',
+    'rates': '/api/rates',
+}
+
+
+@pytest.mark.parametrize('name', READ_ENDPOINTS)
+def test_read_endpoint(bench, name):
+    bench(f'GET {name}', 'GET', READ_ENDPOINTS[name])
+
+
+def test_create_transaction(bench, ledger):
+    bench('POST transaction', 'POST', '/api/transactions', json={
+        'amount': 12.5, 'date': '2024-06-01T12:00:00', 'type': 'expense', 'title': 'bench',
+        'wallet_id': ledger.wallet_id, 'category_id': ledger.category_id,
+    })
+
+
+def test_update_transaction(bench, ledger):
+    bench('PUT transaction', 'PUT', '/api/transactions/{ledger.transaction_id}', json={'title': 'bench update'})
+
+
+def test_bulk_insert(bench, ledger):
+    rows = [{'amount': i + 1, 'date': '2024-06-02T12:00:00', 'type': 'expense', 'title': f'bulk {i}',
+             'wallet_id': ledger.wallet_id, 'category_id': ledger.category_id} for i in range(100)]
+    bench('POST bulk 100', 'POST', '/api/transactions/bulk', json=rows)
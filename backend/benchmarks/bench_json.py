@@ -0,0 +1,74 @@
+"""GET /api/transactions: стандартний JSON-провайдер Flask проти FastJSONProvider.
+
+    cd backend && python benchmarks/bench_json.py [--rows 20000] [--repeat 5]
+
+Працює на SQLite в пам'яті; друкує медіану часу відповіді для кожного провайдера
+і окремо час лише серіалізації вже готового списку to_dict().
+"""
+import argparse
+import statistics
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+from ledger import app, logged_in_client, seed_ledger
+from json_provider import FastJSONProvider, orjson
+from models import db, Transaction, serialize_transactions
+
+
+def measure(client, url, repeat):
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url)
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.status_code
+        size = len(response.get_data())
+    return statistics.median(timings), size
+
+
+def measure_dumps(provider, payload, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        provider.response(payload)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    if orjson is None:
+        print('orjson is not installed: FastJSONProvider falls back to the json module.')
+
+    with app.app_context():
+        db.create_all()
+        seed_ledger(args.rows)
+        client = logged_in_client()
+
+        print(f'{args.rows} transactions, median of {args.repeat} requests')
+        results = {}
+        for name, provider in (('default', DefaultJSONProvider), ('fast', FastJSONProvider)):
+            app.json = provider(app)
+            for url in ('/api/transactions', '/api/transactions?compact=true'):
+                measure(client, url, 1)  # warm up
+                elapsed, size = measure(client, url, args.repeat)
+                results[name, url] = elapsed
+                print(f'  {name:8} {url:34} {elapsed * 1000:8.1f} ms  {size / 1024:8.0f} KiB')
+        for url in ('/api/transactions', '/api/transactions?compact=true'):
+            print(f'  speedup {url}: {results["default", url] / results["fast", url]:.2f}x')
+
+        payload = serialize_transactions(Transaction.query.all())
+        with app.test_request_context():
+            default = measure_dumps(DefaultJSONProvider(app), payload, args.repeat)
+            fast = measure_dumps(FastJSONProvider(app), payload, args.repeat)
+        print(f'serialization only: default {default * 1000:.1f} ms, fast {fast * 1000:.1f} ms '
+              f'({default / fast:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""ORM-гідратація проти read-моделей (Row-кортежі) для списку транзакцій і гаманців.
+
+    cd backend && python benchmarks/bench_read_models.py [--rows 100000] [--repeat 3]
+
+Для кожного способу: медіана часу (запит + побудова dict) і пікова пам'ять
+за tracemalloc (окремим прогоном). Кожен прогін починається з порожньої сесії.
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+
+from sqlalchemy.orm import selectinload
+
+from ledger import app, seed_ledger
+from models import db, Transaction, Wallet, serialize_transactions
+from read_models import serialize_transaction_rows, transaction_rows, wallet_dict, wallet_rows
+
+NEWEST_FIRST = (Transaction.date.desc(), Transaction.modified_at.desc(), Transaction.id.desc())
+
+
+def orm_transactions(user_id):
+    query = Transaction.query.filter_by(user_id=user_id).options(
+        selectinload(Transaction.category), selectinload(Transaction.wallet)
+    ).order_by(*NEWEST_FIRST)
+    return serialize_transactions(query.all())
+
+
+def row_transactions(user_id):
+    query = transaction_rows(Transaction.query.filter_by(user_id=user_id)).order_by(*NEWEST_FIRST)
+    return serialize_transaction_rows(query.all(), user_id)
+
+
+def orm_wallets(user_id):
+    return [wallet.to_dict() for wallet in Wallet.query.filter_by(user_id=user_id).all()]
+
+
+def row_wallets(user_id):
+    return [wallet_dict(row) for row in wallet_rows(user_id)]
+
+
+def run(func, user_id, repeat):
+    timings = []
+    for _ in range(repeat):
+        db.session.remove()
+        started = time.perf_counter()
+        func(user_id)
+        timings.append(time.perf_counter() - started)
+
+    # Separate pass: tracemalloc slows allocation down several times
+    db.session.remove()
+    tracemalloc.start()
+    result = func(user_id)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return statistics.median(timings), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        user_id = seed_ledger(args.rows)
+        print(f'{args.rows} transactions, median time of {args.repeat} runs, peak traced memory')
+        for label, orm, rows in (('transactions', orm_transactions, row_transactions),
+                                 ('wallets', orm_wallets, row_wallets)):
+            assert orm(user_id) == rows(user_id)
+            orm_time, orm_peak = run(orm, user_id, args.repeat)
+            row_time, row_peak = run(rows, user_id, args.repeat)
+            print(f'  {label:13} orm  {orm_time * 1000:9.1f} ms {orm_peak / 2**20:8.1f} MiB')
+            print(f'  {label:13} rows {row_time * 1000:9.1f} ms {row_peak / 2**20:8.1f} MiB'
+                  f'   ({orm_time / row_time:.1f}x faster, {orm_peak / row_peak:.1f}x less memory)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Пропускна здатність реєстрації при паралельних POST /api/register.
+
+    cd backend && python benchmarks/bench_signup.py [--threads 8] [--seconds 10] [--fast-hash]
+
+Потоки безперервно реєструють нових користувачів на тимчасовому файлі SQLite
+(з PRAGMA з Config, тобто WAL). Частина запитів (--duplicates) навмисно
+повторює вже зайняте ім'я, щоб перевірити відповідь 409 під конкуренцією.
+Друкує реєстрації за секунду, p50/p95 латентності, SQL-запитів на реєстрацію і
+помилки. Хешування пароля коштує більше за запис у БД; --fast-hash підміняє
+його дешевим, щоб було видно саме витрати на БД.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--duplicates', type=float, default=0.05, help='share of requests reusing a taken username')
+    parser.add_argument('--fast-hash', action='store_true', help='cheap password hashing to isolate DB cost')
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tmp.name, 'signup.db')}")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from ledger import app  # sets up sys.path and the environment
+    from instrumentation import count_queries
+    from models import db
+    from api import auth
+
+    if args.fast_hash:
+        auth.generate_password_hash = lambda password: 'pbkdf2:sha256:1$bench$' + password
+
+    with app.app_context():
+        db.create_all()
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {'created': 0, 'conflicts': 0, 'errors': 0, 'latencies': []}
+
+    def worker(index):
+        client = app.test_client()
+        rng = random.Random(index)
+        serial = 0
+        while not stop.is_set():
+            if serial and rng.random() < args.duplicates:
+                username = f'u{index}_{rng.randrange(serial)}'
+            else:
+                username = f'u{index}_{serial}'
+                serial += 1
+            started = time.perf_counter()
+            rv = client.post('/api/register', json={
+                'username': username, 'email': f'{username}@bench.example', 'password': 'bench',
+            })
+            elapsed = time.perf_counter() - started
+            with lock:
+                if rv.status_code == 201:
+                    stats['created'] += 1
+                    stats['latencies'].append(elapsed)
+                elif rv.status_code == 409:
+                    stats['conflicts'] += 1
+                else:
+                    stats['errors'] += 1
+
+    with app.app_context(), count_queries(all_threads=True) as counter:
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    requests = stats['created'] + stats['conflicts'] + stats['errors']
+    latencies = stats['latencies']
+    print(f"{args.threads} threads for {args.seconds:g} s ({'fast' if args.fast_hash else 'default'} hashing)")
+    print(f"  signups {stats['created'] / args.seconds:8.1f}/s  "
+          f"p50 {statistics.median(latencies) * 1000 if latencies else 0:7.1f} ms  "
+          f"p95 {percentile(latencies, 0.95) * 1000:7.1f} ms")
+    print(f"  {counter.count / max(requests, 1):.1f} queries/request  "
+          f"conflicts {stats['conflicts']}  errors {stats['errors']}")
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
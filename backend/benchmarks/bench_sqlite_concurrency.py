@@ -0,0 +1,116 @@
+"""Пропускна здатність читання, поки йдуть записи: rollback journal проти WAL.
+
+    cd backend && python benchmarks/bench_sqlite_concurrency.py [--rows 20000] [--seconds 10]
+
+Кожен режим запускається окремим процесом на тимчасовому файлі SQLite:
+--writers потоків безперервно створюють транзакції (POST /api/transactions),
+--readers потоків читають сторінку транзакцій і статистику. Друкує кількість
+читань/записів за секунду, p95 латентності читання і помилки.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+MODES = {
+    # SQLite defaults: rollback journal, full fsync on every commit
+    'rollback': {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL'},
+    'wal': {'SQLITE_JOURNAL_MODE': 'WAL', 'SQLITE_SYNCHRONOUS': 'NORMAL'},
+}
+READ_URLS = ('/api/transactions?limit=100', '/api/statistics?base_currency=USD')
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def run_mode(args):
+    """Дочірній процес: засіяти файл БД і навантажити його потоками"""
+    from ledger import app, logged_in_client, seed_ledger
+    from models import db
+
+    with app.app_context():
+        db.create_all()
+        user_id = seed_ledger(args.rows)
+        from models import Category, Wallet
+        wallet_id = Wallet.query.filter_by(user_id=user_id).first().id
+        category_id = Category.query.filter_by(user_id=user_id).first().id
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {'reads': 0, 'writes': 0, 'errors': 0, 'read_latencies': []}
+
+    def writer():
+        client = logged_in_client()
+        while not stop.is_set():
+            rv = client.post('/api/transactions', json={
+                'amount': 9.99, 'date': '2024-06-01T12:00:00', 'type': 'expense', 'title': 'concurrent',
+                'wallet_id': wallet_id, 'category_id': category_id,
+            })
+            with lock:
+                stats['writes' if rv.status_code == 201 else 'errors'] += 1
+
+    def reader(index):
+        client = logged_in_client()
+        while not stop.is_set():
+            started = time.perf_counter()
+            rv = client.get(READ_URLS[index % len(READ_URLS)])
+            elapsed = time.perf_counter() - started
+            with lock:
+                if rv.status_code == 200:
+                    stats['reads'] += 1
+                    stats['read_latencies'].append(elapsed)
+                else:
+                    stats['errors'] += 1
+
+    threads = [threading.Thread(target=writer) for _ in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    print(json.dumps({
+        'reads_per_s': stats['reads'] / args.seconds,
+        'writes_per_s': stats['writes'] / args.seconds,
+        'read_p95_ms': percentile(stats['read_latencies'], 0.95) * 1000,
+        'errors': stats['errors'],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)  # child process
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args)
+        return
+
+    print(f'{args.rows} transactions, {args.readers} readers + {args.writers} writers for {args.seconds:g} s')
+    for mode, pragmas in MODES.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, **pragmas, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--mode', mode, '--rows', str(args.rows),
+                 '--seconds', str(args.seconds), '--readers', str(args.readers), '--writers', str(args.writers)],
+                env=env, check=True, capture_output=True, text=True,
+            ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        print(f"  {mode:9} reads {result['reads_per_s']:8.1f}/s  p95 {result['read_p95_ms']:7.1f} ms  "
+              f"writes {result['writes_per_s']:7.1f}/s  errors {result['errors']}")
+
+
+if __name__ == '__main__':
+    main()
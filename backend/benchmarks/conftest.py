@@ -0,0 +1,208 @@
+"""Набір бенчмарків ендпоінтів на синтетичних журналах (SQLite в пам'яті, без мережі).
+
+    cd backend && python -m pytest benchmarks                      # 1k транзакцій
+    cd backend && python -m pytest benchmarks --ledger-sizes 1k,100k,1M
+    cd backend && python -m pytest benchmarks --bench-save         # оновити baseline.json
+
+Для кожного ендпоінта і розміру журналу: медіана латентності, кількість
+SQL-запитів і пікова пам'ять (tracemalloc, окремим прогоном). Результати
+порівнюються з baseline.json: більше запитів, ніж у baseline, або латентність /
+пам'ять понад --bench-threshold (з невеликим абсолютним допуском) — падіння.
+
+Пам'ять — це пік на боці сервера: тіло відповіді читається чанками й
+відкидається, тож потоковий експорт не рахується як буфер клієнта.
+Латентність залежить від машини: baseline зберігає час калібрувального
+циклу, і очікувані значення масштабуються на відношення швидкості цієї машини
+до тієї, де baseline записано. Це грубе вирівнювання — для точного порівняння
+baseline варто перегенерувати (--bench-save) на тій машині, де він перевіряється.
+"""
+import json
+import os
+import statistics
+import zlib
+import time
+import tracemalloc
+
+import pytest
+
+from ledger import app, logged_in_client, parse_size, seed_ledger  # first: sets up sys.path and the environment
+from instrumentation import count_queries
+from models import db, Category, Transaction, Wallet
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+# Differences below these are noise, whatever the relative change
+LATENCY_SLACK_MS = 5.0
+MEMORY_SLACK_KIB = 256
+
+HOST_KEY = '_host'
+
+_results = {}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('benchmarks')
+    group.addoption('--ledger-sizes', default='1k', help='comma-separated ledger sizes, e.g. 1k,100k,1M')
+    group.addoption('--bench-repeat', type=int, default=7, help='timed requests per endpoint')
+    group.addoption('--bench-threshold', type=float, default=0.5,
+                    help='allowed relative slowdown / memory growth against the baseline')
+    group.addoption('--bench-baseline', default=BASELINE_PATH)
+    group.addoption('--bench-save', action='store_true', help='write the results as the new baseline')
+
+
+def pytest_generate_tests(metafunc):
+    if 'ledger' in metafunc.fixturenames:
+        sizes = [size.strip() for size in metafunc.config.getoption('ledger_sizes').split(',') if size.strip()]
+        metafunc.parametrize('ledger', sizes, indirect=True, scope='session')
+
+
+class Ledger:
+    """Засіяний користувач: розмір, id і сутності для запитів на запис"""
+
+    def __init__(self, label, user_id, username):
+        self.label = label
+        self.user_id = user_id
+        self.username = username
+        self.wallet_id = Wallet.query.filter_by(user_id=user_id).first().id
+        self.category_id = Category.query.filter_by(user_id=user_id).first().id
+        self.transaction_id = Transaction.query.filter_by(user_id=user_id).first().id
+
+
+@pytest.fixture(scope='session')
+def database():
+    with app.app_context():
+        db.create_all()
+        yield db
+        db.session.remove()
+
+
+@pytest.fixture(scope='session')
+def ledger(request, database):
+    label = request.param
+    username = f'bench_{label.lower()}'
+    return Ledger(label, seed_ledger(parse_size(label), username=username), username)
+
+
+@pytest.fixture(scope='session')
+def baseline(pytestconfig):
+    path = pytestconfig.getoption('bench_baseline')
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def calibrate():
+    """Медіана фіксованого CPU-циклу в мс: мірило швидкості машини для латентностей"""
+    payload = json.dumps([{'id': i, 'title': f'row {i}', 'amount': i * 1.5} for i in range(2000)]).encode()
+    timings = []
+    for _ in range(7):
+        started = time.perf_counter()
+        for _ in range(5):
+            zlib.decompress(zlib.compress(payload))
+            json.loads(payload)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+@pytest.fixture(scope='session')
+def host_speed(baseline):
+    """Відношення часу калібрування тут до часу на машині baseline (>1 — ця машина повільніша)"""
+    calibration_ms = calibrate()
+    _results[HOST_KEY] = {'calibration_ms': round(calibration_ms, 3)}
+    base = baseline.get(HOST_KEY, {}).get('calibration_ms')
+    return calibration_ms / base if base else 1.0
+
+
+def _request(client, method, url, **kwargs):
+    response = client.open(url, method=method, **kwargs)
+    assert response.status_code < 400, f'{method} {url}: {response.status_code}'
+    # Drain streamed bodies (export) chunk by chunk without keeping them, so the
+    # measurement covers the server's work, not a client-side copy of the body
+    for _ in response.response:
+        pass
+    response.close()
+    return response
+
+
+@pytest.fixture
+def bench(ledger, baseline, host_speed, pytestconfig):
+    """bench(name, method, url, **kwargs) -> метрики; перевіряє їх проти baseline"""
+    repeat = max(1, pytestconfig.getoption('bench_repeat'))
+    threshold = pytestconfig.getoption('bench_threshold')
+    client = logged_in_client(ledger.username)
+
+    def run(name, method, url, **kwargs):
+        url = url.format(ledger=ledger)
+        _request(client, method, url, **kwargs)  # warm up
+
+        timings = []
+        for _ in range(repeat):
+            with count_queries() as counter:
+                started = time.perf_counter()
+                _request(client, method, url, **kwargs)
+                timings.append(time.perf_counter() - started)
+
+        tracemalloc.start()
+        try:
+            _request(client, method, url, **kwargs)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        metrics = {
+            'median_ms': round(statistics.median(timings) * 1000, 2),
+            'queries': counter.count,
+            'peak_kib': round(peak / 1024),
+        }
+        _results.setdefault(ledger.label, {})[name] = metrics
+        _check_regression(name, metrics, baseline.get(ledger.label, {}).get(name), threshold, host_speed)
+        return metrics
+
+    return run
+
+
+def _check_regression(name, metrics, base, threshold, host_speed=1.0):
+    if not base:
+        return
+    problems = []
+    if metrics['queries'] > base['queries']:
+        problems.append(f"queries {base['queries']} -> {metrics['queries']}")
+    expected_ms = base['median_ms'] * host_speed
+    if metrics['median_ms'] > max(expected_ms * (1 + threshold), expected_ms + LATENCY_SLACK_MS):
+        problems.append(f"median {base['median_ms']} ms (x{host_speed:.2f} for this host) -> {metrics['median_ms']} ms")
+    if metrics['peak_kib'] > max(base['peak_kib'] * (1 + threshold), base['peak_kib'] + MEMORY_SLACK_KIB):
+        problems.append(f"peak memory {base['peak_kib']} KiB -> {metrics['peak_kib']} KiB")
+    if problems:
+        pytest.fail(f'{name} regressed: ' + '; '.join(problems))
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _results or not session.config.getoption('bench_save'):
+        return
+    path = session.config.getoption('bench_baseline')
+    saved = {}
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            saved = json.load(f)
+    for label, endpoints in _results.items():
+        if label == HOST_KEY:
+            saved[HOST_KEY] = endpoints
+        else:
+            saved.setdefault(label, {}).update(endpoints)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(saved, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    terminalreporter.section('benchmarks')
+    for label, endpoints in _results.items():
+        if label == HOST_KEY:
+            terminalreporter.write_line(f"calibration: {endpoints['calibration_ms']} ms")
+            continue
+        terminalreporter.write_line(f'ledger {label}:')
+        for name, m in endpoints.items():
+            terminalreporter.write_line(
+                f"  {name:40} {m['median_ms']:10.2f} ms {m['queries']:5} queries {m['peak_kib']:9} KiB")
@@ -0,0 +1,84 @@
+"""Спільне для бенчмарків: застосунок на SQLite в пам'яті і синтетичний журнал.
+
+Імпортувати до будь-яких модулів застосунку: змінні оточення мають бути
+встановлені до читання config.Config. Курси валют беруться з вбудованої
+таблиці, тож бенчмарки не ходять у мережу.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+os.environ.setdefault('RATES_PERSIST', '0')
+os.environ.setdefault('CACHE_BACKEND', 'none')
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from app import app  # noqa: E402
+from models import (  # noqa: E402
+    db, User, Category, Wallet,
+    create_default_categories_for_user, create_default_wallets_for_user,
+)
+from api import rates  # noqa: E402
+from api.transactions import insert_transactions  # noqa: E402
+
+PASSWORD = 'bench'
+LEDGER_SPAN = timedelta(days=5 * 365)
+SEED_CHUNK_SIZE = 50000
+MERCHANTS = ('Silpo', 'ATB', 'Uber', 'Bolt', 'Netflix', 'Spotify', 'Nova Poshta', 'Rozetka', 'Pharmacy', 'Cafe')
+
+_BUILTIN_RATES = dict(rates.EXCHANGE_RATES)
+rates.configure_rates(source=lambda: dict(_BUILTIN_RATES))
+
+
+def parse_size(label):
+    """'1k' -> 1000, '100k' -> 100000, '1M' -> 1000000, '2500' -> 2500"""
+    label = label.strip()
+    multiplier = {'k': 1000, 'm': 1000000}.get(label[-1:].lower(), 1)
+    return int(float(label[:-1] if multiplier > 1 else label) * multiplier)
+
+
+def seed_ledger(rows, username='bench', extra_wallets=10):
+    """Користувач зі стандартними категоріями, гаманцями в кількох валютах і rows транзакцій.
+
+    Транзакції рівномірно розподілені на LEDGER_SPAN (останні 5 років) і
+    вставляються пачками, тож навіть 1M рядків не тримається в пам'яті цілком.
+    """
+    user = User(username=username, email=f'{username}@example.com', password=generate_password_hash(PASSWORD))
+    db.session.add(user)
+    db.session.flush()
+    create_default_categories_for_user(user.id, commit=False)
+    create_default_wallets_for_user(user.id, commit=False)
+    currencies = sorted(_BUILTIN_RATES)
+    db.session.add_all([
+        Wallet(name=f'Wallet {i}', currency=currencies[i % len(currencies)], user_id=user.id)
+        for i in range(extra_wallets)
+    ])
+    db.session.commit()
+
+    wallet_ids = [w.id for w in Wallet.query.filter_by(user_id=user.id)]
+    category_ids = [c.id for c in Category.query.filter_by(user_id=user.id)]
+    step = LEDGER_SPAN / max(rows, 1)
+    start = datetime(2021, 1, 1)
+    now = datetime.utcnow()
+    for chunk_start in range(0, rows, SEED_CHUNK_SIZE):
+        insert_transactions([{
+            'amount': round(1 + (i * 37 % 5000) / 7, 2),
+            'date': start + step * i,
+            'modified_at': now,
+            'title': f'{MERCHANTS[i % len(MERCHANTS)]} #{i}',
+            'description': 'benchmark row' if i % 3 else None,
+            'type': 'income' if i % 5 == 0 else 'expense',
+            'user_id': user.id,
+            'category_id': category_ids[i % len(category_ids)],
+            'wallet_id': wallet_ids[i * 7 % len(wallet_ids)],
+        } for i in range(chunk_start, min(chunk_start + SEED_CHUNK_SIZE, rows))])
+        db.session.commit()
+    return user.id
+
+
+def logged_in_client(username='bench'):
+    client = app.test_client()
+    client.post('/api/login', json={'username': username, 'password': PASSWORD})
+    return client
@@ -0,0 +1,175 @@
+"""Per-user read-through cache for small, frequently polled GET responses.
+
+Keys contain the user's data version (models.User.data_version), so a write
+from any process makes the old entries unreachable; write handlers also call
+invalidate_user() to free them right away. The backend is pluggable: an
+in-process LRU with TTL by default, or anything with the RedisCache interface.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import make_response, request
+from flask_jwt_extended import get_jwt_identity
+
+from api.conditional import data_version
+
+
+class LRUCache:
+    """Потокобезпечний LRU з TTL у пам'яті процесу"""
+
+    def __init__(self, max_entries=2048, ttl_seconds=300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl_seconds=None):
+        expires_at = time.monotonic() + (ttl_seconds or self.ttl_seconds)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisCache:
+    """Той самий інтерфейс поверх Redis-сумісного клієнта (get/setex/scan_iter/delete)"""
+
+    def __init__(self, client, ttl_seconds=300):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+
+    @classmethod
+    def from_url(cls, url, ttl_seconds=300):
+        import redis  # optional dependency, only needed for CACHE_BACKEND=redis
+        return cls(redis.Redis.from_url(url), ttl_seconds)
+
+    def get(self, key):
+        raw = self.client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl_seconds=None):
+        self.client.setex(key, ttl_seconds or self.ttl_seconds, json.dumps(value))
+
+    def delete_prefix(self, prefix):
+        keys = list(self.client.scan_iter(match=prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+    def clear(self):
+        self.delete_prefix('')
+
+
+class ReadCache:
+    """Кеш відповідей за (user, data version, запит) з лічильниками hit/miss"""
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self._counters = {'hits': 0, 'misses': 0, 'invalidations': 0}
+        self._lock = threading.Lock()
+
+    def configure(self, backend):
+        self.backend = backend
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_ratio'] = round(counters['hits'] / lookups, 4) if lookups else 0.0
+        counters['backend'] = type(self.backend).__name__ if self.backend else None
+        return counters
+
+    def reset_stats(self):
+        with self._lock:
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def get(self, key):
+        value = self.backend.get(key) if self.backend else None
+        self._count('hits' if value is not None else 'misses')
+        return value
+
+    def set(self, key, value):
+        if self.backend:
+            self.backend.set(key, value)
+
+    def invalidate_user(self, user_id):
+        if self.backend:
+            self.backend.delete_prefix(f'u{user_id}:')
+            self._count('invalidations')
+
+
+read_cache = ReadCache()
+
+
+def configure_cache(config):
+    """Вибрати бекенд за CACHE_BACKEND: 'lru' (default) | 'redis' | 'none'"""
+    kind = (config.get('CACHE_BACKEND') or 'lru').lower()
+    ttl = config.get('CACHE_TTL_SECONDS', 300)
+    if kind == 'none':
+        read_cache.configure(None)
+    elif kind == 'redis':
+        read_cache.configure(RedisCache.from_url(config['CACHE_URL'], ttl))
+    else:
+        read_cache.configure(LRUCache(config.get('CACHE_MAX_ENTRIES', 2048), ttl))
+
+
+def invalidate_user_cache(user_id):
+    read_cache.invalidate_user(user_id)
+
+
+def cached_by_user(*extra_key_parts):
+    """Кешувати тіло 200-відповіді GET-ендпоінта для поточного користувача.
+
+    Ключ: користувач, версія його даних, шлях із query string і значення
+    extra_key_parts() (наприклад, покоління курсів валют). Ставити під @jwt_required.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            user_id = int(get_jwt_identity())
+            parts = [str(part()) for part in extra_key_parts]
+            key = ':'.join([f'u{user_id}', f'v{data_version(user_id)}', request.full_path, *parts])
+
+            cached = read_cache.get(key)
+            if cached is not None:
+                response = make_response(cached['body'])
+                response.mimetype = cached['mimetype']
+                response.headers['X-Cache'] = 'hit'
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                read_cache.set(key, {'body': response.get_data(as_text=True), 'mimetype': response.mimetype})
+            response.headers['X-Cache'] = 'miss'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,85 @@
+"""Стиснення відповідей (gzip, brotli якщо встановлений) за Accept-Encoding.
+
+Звичайні відповіді стискаються цілком, якщо тіло не менше COMPRESS_MIN_SIZE.
+Потокові (експорт) стискаються шматками по мірі генерації, без буферизації
+всього тіла. ETag стиснених відповідей стає слабким (W/"..."), бо байти
+відрізняються від нестисненого представлення.
+"""
+import gzip
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html')
+
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _compress_stream(chunks, encoding, level):
+    """Стиснути ітерабельне тіло; кожен шматок дописується з flush, щоб клієнт бачив прогрес"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=min(level, 11))
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def configure_compression(app):
+    """Зареєструвати after_request, що стискає відповіді (COMPRESS_MIN_SIZE, COMPRESS_LEVEL)"""
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    level = app.config.get('COMPRESS_LEVEL', 6)
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code != 200 or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        streamed = response.is_streamed
+        if not streamed and response.content_length is not None and response.content_length < min_size:
+            return response
+        # The representation now depends on Accept-Encoding, even when this client gets it uncompressed
+        response.vary.add('Accept-Encoding')
+        encoding = _choose_encoding()
+        if encoding is None:
+            return response
+
+        if streamed:
+            response.response = _compress_stream(response.iter_encoded(), encoding, level)
+            response.headers.pop('Content-Length', None)
+        else:
+            response.set_data(_compress(response.get_data(), encoding, level))
+        response.headers['Content-Encoding'] = encoding
+
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -10,10 +10,47 @@ class Config:
         'sqlite:///' + os.path.join(basedir, 'instance', 'database.db')
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Applied to every new SQLite connection (see database.py); None skips a pragma
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'cache_size': -int(os.environ.get('SQLITE_CACHE_SIZE_KIB', 64 * 1024)),  # negative = KiB
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    }
+    # Connection pool for file / server databases; server databases also get pre-ping
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
     JWT_TOKEN_LOCATION = ['cookies']
     JWT_ACCESS_COOKIE_PATH = '/'
     JWT_REFRESH_COOKIE_PATH = '/api/refresh'
     JWT_COOKIE_CSRF_PROTECT = False  # True for production!
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=15)
 
-    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=7)
\ No newline at end of file
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=7)
+
+    # Exchange rates: None -> public currency API; or a URL / JSON file path (local stand-in)
+    RATES_SOURCE = os.environ.get('RATES_SOURCE')
+    # Store every refreshed rate table in the exchange_rate table (history for date-accurate stats)
+    RATES_PERSIST = os.environ.get('RATES_PERSIST', '1') != '0'
+
+    # Read cache for wallets/categories/statistics: 'lru' (in-process), 'redis' (CACHE_URL) or 'none'
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'lru')
+    CACHE_URL = os.environ.get('CACHE_URL')
+    CACHE_TTL_SECONDS = int(os.environ.get('CACHE_TTL_SECONDS', 300))
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 2048))
+    # /api/_cache and /api/_metrics expose internals (SQL text, routes): off unless explicitly enabled
+    DIAGNOSTICS_ENDPOINTS = os.environ.get('DIAGNOSTICS_ENDPOINTS', '0') == '1'
+
+    # JSON responses: 'fast' (orjson when installed) or 'default' (Flask's json module)
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'fast')
+
+    # gzip/brotli for JSON and exports at least this large (bytes); streamed exports are always compressed
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+
+    # Log SQL statements slower than this (ms) to 'budget.sql'; per-request totals go to Server-Timing
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))
@@ -0,0 +1,53 @@
+"""Налаштування engine: PRAGMA для SQLite і розміри пулу для серверних БД.
+
+SQLite (файл): WAL, щоб читачі не чекали на запис, synchronous=NORMAL
+(у WAL безпечно для цілісності, втрачається хіба що останній коміт при
+збої живлення), більший кеш сторінок, mmap і busy_timeout замість миттєвого
+"database is locked". Значення — у Config.SQLITE_PRAGMAS; None вимикає PRAGMA.
+"""
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+_sqlite_pragmas = {}
+
+
+def _is_sqlite_memory(url):
+    return url.get_backend_name() == 'sqlite' and (url.database or ':memory:') in ('', ':memory:')
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS для config: пул для файлових/серверних БД, pre-ping для серверних"""
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if _is_sqlite_memory(url):
+        return options  # Flask-SQLAlchemy uses a StaticPool here
+    options.setdefault('pool_size', config.get('DB_POOL_SIZE', 5))
+    options.setdefault('max_overflow', config.get('DB_MAX_OVERFLOW', 10))
+    if url.get_backend_name() != 'sqlite':
+        options.setdefault('pool_pre_ping', True)
+        options.setdefault('pool_recycle', config.get('DB_POOL_RECYCLE', 1800))
+        options.setdefault('pool_timeout', config.get('DB_POOL_TIMEOUT', 30))
+    return options
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection) or not _sqlite_pragmas:
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in _sqlite_pragmas.items():
+            if value is not None:
+                cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+
+def configure_database(app):
+    """Викликати до db.init_app(app): опції engine і PRAGMA для нових SQLite-з'єднань"""
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    _sqlite_pragmas.clear()
+    _sqlite_pragmas.update(app.config.get('SQLITE_PRAGMAS') or {})
+    if not event.contains(Engine, 'connect', _apply_sqlite_pragmas):
+        event.listen(Engine, 'connect', _apply_sqlite_pragmas)
@@ -0,0 +1,230 @@
+"""Метрики SQL-запитів на HTTP-запит: кількість, сумарний час, найповільніші.
+
+Події SQLAlchemy (before/after_cursor_execute) рахують кожен запит до БД.
+Для кожного HTTP-запиту це потрапляє в заголовок Server-Timing (текст
+найповільніших запитів — лише з DIAGNOSTICS_ENDPOINTS), а накопичені
+лічильники (по ендпоінтах) — у GET /api/_metrics у текстовому форматі Prometheus.
+Запити довші за SLOW_QUERY_MS логуються в 'budget.sql'.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('budget.sql')
+
+SLOWEST_PER_REQUEST = 3
+SLOWEST_TRACKED = 10  # distinct statements kept for /api/_metrics
+_ENVIRON_KEY = 'budget.sql_stats'
+_slow_query_seconds = None  # set by configure_instrumentation()
+
+
+class RequestStats:
+    """SQL одного HTTP-запиту"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.slowest = []  # [(seconds, statement)], longest first
+
+    def add(self, seconds, statement):
+        self.queries += 1
+        self.db_seconds += seconds
+        if len(self.slowest) < SLOWEST_PER_REQUEST or seconds > self.slowest[-1][0]:
+            self.slowest.append((seconds, statement))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[SLOWEST_PER_REQUEST:]
+
+
+class Metrics:
+    """Потокобезпечні лічильники для /api/_metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}  # (method, endpoint, status) -> count
+            self.endpoints = {}  # (method, endpoint) -> [seconds, queries, db_seconds]
+            self.slow_queries = 0
+            self.slowest = {}  # statement -> max seconds
+
+    def observe_request(self, method, endpoint, status, seconds, stats):
+        with self._lock:
+            key = (method, endpoint, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            totals = self.endpoints.setdefault((method, endpoint), [0.0, 0, 0.0])
+            totals[0] += seconds
+            totals[1] += stats.queries
+            totals[2] += stats.db_seconds
+            for seconds, statement in stats.slowest:
+                statement = _short_statement(statement)
+                if seconds > self.slowest.get(statement, 0.0):
+                    self.slowest[statement] = seconds
+            if len(self.slowest) > SLOWEST_TRACKED:
+                kept = sorted(self.slowest.items(), key=lambda item: item[1], reverse=True)[:SLOWEST_TRACKED]
+                self.slowest = dict(kept)
+
+    def observe_slow_query(self):
+        with self._lock:
+            self.slow_queries += 1
+
+    def snapshot(self):
+        with self._lock:
+            return (dict(self.requests), {k: list(v) for k, v in self.endpoints.items()},
+                    self.slow_queries, dict(self.slowest))
+
+
+metrics = Metrics()
+
+
+def _short_statement(statement, limit=200):
+    return ' '.join(statement.split())[:limit]
+
+
+class _QueryCounter:
+    """Лічильник для count_queries(); statements — тексти виконаних запитів"""
+
+    def __init__(self, thread_id):
+        self.thread_id = thread_id  # None -> statements from every thread
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+_counters = []
+_counters_lock = threading.Lock()
+
+
+@contextmanager
+def count_queries(all_threads=False):
+    """with count_queries() as counter: ...; counter.count — запити, виконані всередині блоку.
+
+    Рахуються лише запити з поточного потоку (фонові потоки, як-от оновлення
+    курсів, не потрапляють у бюджет); all_threads=True — з усіх потоків.
+    """
+    counter = _QueryCounter(None if all_threads else threading.get_ident())
+    with _counters_lock:
+        _counters.append(counter)
+    try:
+        yield counter
+    finally:
+        with _counters_lock:
+            _counters.remove(counter)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the statement's own context: a statement that raises never reaches
+    # after_cursor_execute and must not leave a start time behind on the connection
+    if context is not None:
+        context._budget_query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_budget_query_started', None)
+    if started is None:
+        return
+    seconds = time.perf_counter() - started
+    thread_id = threading.get_ident()
+    for counter in list(_counters):
+        if counter.thread_id is None or counter.thread_id == thread_id:
+            counter.statements.append(statement)
+    if has_request_context():
+        stats = request.environ.get(_ENVIRON_KEY)
+        if stats is not None:
+            stats.add(seconds, statement)
+    # executemany batches are slow by design; only single statements count as slow queries
+    if _slow_query_seconds is not None and not executemany and seconds >= _slow_query_seconds:
+        metrics.observe_slow_query()
+        logger.warning('Slow query (%.1f ms): %s', seconds * 1000, _short_statement(statement, 500))
+
+
+def _server_timing(stats, total_seconds, statements=False):
+    """Значення Server-Timing; statements=True додає текст найповільніших запитів (лише для діагностики)"""
+    parts = [
+        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"',
+        f'app;dur={(total_seconds - stats.db_seconds) * 1000:.1f}',
+        f'total;dur={total_seconds * 1000:.1f}',
+    ]
+    if not statements:
+        return ', '.join(parts)
+    for index, (seconds, statement) in enumerate(stats.slowest, 1):
+        desc = _short_statement(statement, 80).replace('\\', '').replace('"', "'")
+        parts.append(f'sql{index};dur={seconds * 1000:.1f};desc="{desc}"')
+    return ', '.join(parts)
+
+
+def configure_instrumentation(app):
+    """Підключити лічильники до всіх engine і до запитів app (SLOW_QUERY_MS: None -> не логувати)"""
+    global _slow_query_seconds
+    slow_ms = app.config.get('SLOW_QUERY_MS')
+    _slow_query_seconds = slow_ms / 1000 if slow_ms is not None else None
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_request_stats():
+        request.environ[_ENVIRON_KEY] = RequestStats()
+
+    @app.after_request
+    def add_server_timing(response):
+        stats = request.environ.get(_ENVIRON_KEY)
+        if stats is None:
+            return response
+        total = time.perf_counter() - stats.started
+        # SQL text reveals the schema: only with DIAGNOSTICS_ENDPOINTS, like /api/_metrics
+        response.headers['Server-Timing'] = _server_timing(
+            stats, total, statements=bool(app.config.get('DIAGNOSTICS_ENDPOINTS')))
+        metrics.observe_request(request.method, request.url_rule.rule if request.url_rule else 'unmatched',
+                                response.status_code, total, stats)
+        return response
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def render_prometheus(extra=()):
+    """Текст для /api/_metrics; extra — [(назва, тип, значення)] додаткових метрик (напр. кешу)"""
+    requests, endpoints, slow_queries, slowest = metrics.snapshot()
+    lines = [
+        '# HELP budget_http_requests_total HTTP requests by method, route and status.',
+        '# TYPE budget_http_requests_total counter',
+    ]
+    for (method, endpoint, status), count in sorted(requests.items()):
+        lines.append(f'budget_http_requests_total{{method="{method}",route="{_label(endpoint)}",status="{status}"}} {count}')
+
+    series = (
+        ('budget_http_request_seconds_total', 'Time spent handling requests.', 0),
+        ('budget_db_queries_total', 'SQL statements executed while handling requests.', 1),
+        ('budget_db_seconds_total', 'Time spent in SQL statements while handling requests.', 2),
+    )
+    for name, help_text, index in series:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for (method, endpoint), totals in sorted(endpoints.items()):
+            value = totals[index]
+            value = f'{value:.6f}' if isinstance(value, float) else value
+            lines.append(f'{name}{{method="{method}",route="{_label(endpoint)}"}} {value}')
+
+    lines += [
+        '# HELP budget_db_slow_queries_total SQL statements slower than SLOW_QUERY_MS.',
+        '# TYPE budget_db_slow_queries_total counter',
+        f'budget_db_slow_queries_total {slow_queries}',
+        '# HELP budget_db_slowest_query_seconds Longest observed duration of the slowest statements.',
+        '# TYPE budget_db_slowest_query_seconds gauge',
+    ]
+    for statement, seconds in sorted(slowest.items(), key=lambda item: item[1], reverse=True):
+        lines.append(f'budget_db_slowest_query_seconds{{statement="{_label(statement)}"}} {seconds:.6f}')
+    for name, metric_type, value in extra:
+        lines += [f'# TYPE {name} {metric_type}', f'{name} {value}']
+    return '\n'.join(lines) + '\n'
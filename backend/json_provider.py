@@ -0,0 +1,61 @@
+"""JSON provider на orjson (опційна залежність) для великих відповідей.
+
+Структура відповідей та сама, що й у стандартного провайдера Flask: ключі
+відсортовані, date/datetime, Decimal тощо серіалізуються його ж default().
+Відмінності від DefaultJSONProvider:
+- не-ASCII символи пишуться як UTF-8, а не escape-послідовностями (ensure_ascii ігнорується);
+- NaN/Infinity серіалізуються як null (стандартний пише невалідні NaN/Infinity);
+- loads() відкидає літерали NaN/Infinity і числа, що переповнюють double.
+Без orjson (або з нестандартними аргументами dumps/loads) працює як
+DefaultJSONProvider.
+"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider, що серіалізує через orjson, коли він встановлений"""
+
+    def _options(self, indent=False):
+        # Datetimes go through default() so they keep Flask's HTTP-date format
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _dump_bytes(self, obj, indent=False):
+        return orjson.dumps(obj, default=self.default, option=self._options(indent))
+
+    def dumps(self, obj, **kwargs):
+        indent = kwargs.pop('indent', None)
+        kwargs.pop('separators', None)  # orjson output is always compact
+        if orjson is None or kwargs or indent not in (None, 2):
+            if indent is not None:
+                kwargs['indent'] = indent
+            return super().dumps(obj, **kwargs)
+        return self._dump_bytes(obj, indent=indent == 2).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        # Bytes straight into the response, without a str round trip
+        return self._app.response_class(self._dump_bytes(obj, indent) + b'\n', mimetype=self.mimetype)
+
+
+def configure_json(app):
+    """Увімкнути FastJSONProvider, якщо JSON_PROVIDER != 'default'"""
+    if (app.config.get('JSON_PROVIDER') or 'fast').lower() != 'default':
+        app.json = FastJSONProvider(app)
@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, func, case, inspect, text
 from datetime import datetime
 # from flask_login import UserMixin
 db = SQLAlchemy()
@@ -11,6 +12,8 @@ class User(db.Model):
     username = db.Column(db.String(100), unique=True, nullable=False)
     email = db.Column(db.String(150), unique=True, nullable=False)
     password = db.Column(db.String(256), nullable=False)
+    # Bumped on every write to the user's wallets/categories/transactions (ETag source)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     wallets = db.relationship('Wallet', backref='user', lazy=True, cascade='all, delete-orphan')
     transactions = db.relationship('Transaction', backref='user', lazy=True, cascade='all, delete-orphan')
@@ -22,21 +25,26 @@ class User(db.Model):
 
 # MARK: Wallet
 class Wallet(db.Model):
+    __table_args__ = (
+        db.Index('ix_wallet_user_id', 'user_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(255))
     icon = db.Column(db.String(50), default='💳')
     currency = db.Column(db.String(10), default='USD')
+    # Running balance, maintained by the flush listener below (see apply_balance_deltas)
+    balance = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    modified_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     
-    transactions = db.relationship('Transaction', backref='wallet', lazy='selectin')
+    transactions = db.relationship('Transaction', backref='wallet', lazy=True)
     
     def get_balance(self):
-        """Розрахунок поточного балансу гаманця"""
-        total_incomes = sum(t.amount for t in self.transactions if t.type == 'income')
-        total_expenses = sum(t.amount for t in self.transactions if t.type == 'expense')
-        return total_incomes - total_expenses
+        """Поточний баланс гаманця (збережений, без перебору транзакцій)"""
+        return self.balance or 0.0
     
     def to_dict(self):
         return {
@@ -52,22 +60,39 @@ class Wallet(db.Model):
 
 # MARK: Transaction
 class Transaction(db.Model):
+    # Indexes follow the query shapes in api/: every list/statistics query filters
+    # by user_id (+ date range) and orders by date, modified_at.
+    __table_args__ = (
+        db.Index('ix_transaction_user_date', 'user_id', 'date', 'modified_at'),
+        # Statement import dedup key; its wallet_id prefix also serves per-wallet lookups
+        db.Index('ix_transaction_wallet_dedup', 'wallet_id', 'date', 'amount', 'title'),
+        db.Index('ix_transaction_category_id', 'category_id'),
+        # Delta sync: rows of a user changed since a moment
+        db.Index('ix_transaction_user_modified', 'user_id', 'modified_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
 
-    amount = db.Column(db.Float, nullable=False)
-    date = db.Column(db.DateTime, nullable=False)
+    # active_history: old values are needed to keep Wallet.balance and MonthlyRollup in sync
+    amount = db.column_property(db.Column(db.Float, nullable=False), active_history=True)
+    date = db.column_property(db.Column(db.DateTime, nullable=False), active_history=True)
     modified_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
     title = db.Column(db.String(100))
     description = db.Column(db.String(255))
-    type = db.Column(db.String(20), nullable=False)  # 'expense' або 'income'
+    type = db.column_property(db.Column(db.String(20), nullable=False), active_history=True)  # 'expense' або 'income'
 
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
-    wallet_id = db.Column(db.Integer, db.ForeignKey('wallet.id'), nullable=False)
+    category_id = db.column_property(db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False), active_history=True)
+    wallet_id = db.column_property(db.Column(db.Integer, db.ForeignKey('wallet.id'), nullable=False), active_history=True)
 
-    def to_dict(self):
-        return {
+    def to_dict(self, compact=False, related=None):
+        """compact=True: лише id гаманця/категорії (без вкладених об'єктів).
+
+        related: спільний кеш {('wallet'|'category', id): dict}, щоб кожен
+        гаманець/категорія серіалізувались один раз на запит.
+        """
+        data = {
             'id': self.id,
             'amount': self.amount,
             'date': self.date.isoformat() if self.date else None,
@@ -78,20 +103,30 @@ class Transaction(db.Model):
             'user_id': self.user_id,
             'category_id': self.category_id,
             'wallet_id': self.wallet_id,
-            'category': self.category.to_dict() if self.category else None,
-            'wallet': self.wallet.to_dict() if self.wallet else None
         }
+        if compact:
+            return data
+        if related is None:
+            related = {}
+        data['category'] = _related_dict(related, 'category', self.category)
+        data['wallet'] = _related_dict(related, 'wallet', self.wallet)
+        return data
 
 
 
 # MARK: Category
 class Category(db.Model):
+    __table_args__ = (
+        db.Index('ix_category_user_name', 'user_id', 'name'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
 
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(255))
     icon = db.Column(db.String(50))  # Emoji або іконка
     type = db.Column(db.String(20), nullable=False)  # 'expense' або 'income' або 'both'
+    modified_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
@@ -107,8 +142,89 @@ class Category(db.Model):
             'user_id': self.user_id
         }
 
-def create_default_categories_for_user(user_id):
-    """Створення стандартних категорій для нового користувача"""
+# MARK: ExchangeRate
+class ExchangeRate(db.Model):
+    """Курс валюти на дату у схемі UNITS_PER_USD (скільки одиниць валюти за 1 USD)"""
+    __table_args__ = (
+        db.UniqueConstraint('date', 'currency', name='uq_exchange_rate_date_currency'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False)
+    currency = db.Column(db.String(10), nullable=False)
+    rate = db.Column(db.Float, nullable=False)
+    fetched_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+# MARK: MonthlyRollup
+class MonthlyRollup(db.Model):
+    """Сума й кількість транзакцій за місяць у розрізі (гаманець, категорія, тип).
+
+    Підтримується інкрементально при записах (див. MARK: Monthly rollups),
+    щоб статистика за довгі періоди не читала кожну транзакцію.
+    """
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'month', 'wallet_id', 'category_id', 'type', name='uq_monthly_rollup_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Date, nullable=False)  # first day of the month
+    wallet_id = db.Column(db.Integer, nullable=False)
+    category_id = db.Column(db.Integer, nullable=False)
+    type = db.Column(db.String(20), nullable=False)
+    total = db.Column(db.Float, nullable=False, default=0.0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+# MARK: Tombstone
+class Tombstone(db.Model):
+    """Запис про видалений рядок для дельта-синхронізації (GET /api/sync)"""
+    __table_args__ = (
+        db.Index('ix_tombstone_user_deleted', 'user_id', 'deleted_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    entity = db.Column(db.String(20), nullable=False)  # 'transaction' | 'wallet' | 'category'
+    entity_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+def _related_dict(related, kind, obj):
+    if obj is None:
+        return None
+    key = (kind, obj.id)
+    if key not in related:
+        related[key] = obj.to_dict()
+    return related[key]
+
+
+def serialize_transactions(transactions, compact=False):
+    """Серіалізувати список транзакцій.
+
+    compact=False -> список словників з вкладеними 'wallet'/'category'.
+    compact=True  -> {'transactions': [...], 'wallets': {id: ...}, 'categories': {id: ...}},
+    де кожен гаманець і категорія присутні рівно один раз.
+    """
+    related = {}
+    if not compact:
+        return [t.to_dict(related=related) for t in transactions]
+
+    items = []
+    for t in transactions:
+        items.append(t.to_dict(compact=True))
+        _related_dict(related, 'wallet', t.wallet)
+        _related_dict(related, 'category', t.category)
+    return {
+        'transactions': items,
+        'wallets': {str(obj_id): d for (kind, obj_id), d in related.items() if kind == 'wallet'},
+        'categories': {str(obj_id): d for (kind, obj_id), d in related.items() if kind == 'category'},
+    }
+
+
+def create_default_categories_for_user(user_id, commit=True):
+    """Створення стандартних категорій для нового користувача (commit=False — у транзакції викликача)"""
     default_categories = [
         # Uncategorized (must be first, protected)
         {'name': 'Uncategorized', 'icon': '📂', 'type': 'both', 'description': 'Default category for uncategorized transactions', 'uncategorized': True},
@@ -132,49 +248,421 @@ def create_default_categories_for_user(user_id):
         {'name': 'Other', 'icon': '💵', 'type': 'income', 'description': 'Other incomes'},
     ]
     
+    # Avoid duplicate category names for user: one lookup for all defaults
+    names = {cat_data['name'] for cat_data in default_categories}
+    existing = {name for (name,) in db.session.query(Category.name).filter(
+        Category.user_id == user_id, Category.name.in_(names))}
+    rows = []
     for cat_data in default_categories:
-        # Avoid duplicate category names for user
-        exists = Category.query.filter_by(user_id=user_id, name=cat_data['name']).first()
-        if not exists:
-            category = Category(
-                name=cat_data['name'],
-                icon=cat_data['icon'],
-                type=cat_data['type'],
-                description=cat_data['description'],
-                user_id=user_id
-            )
-            db.session.add(category)
-    db.session.commit()
-    
-def create_default_wallets_for_user(user_id):
+        if cat_data['name'] in existing:
+            continue
+        existing.add(cat_data['name'])
+        rows.append({
+            'name': cat_data['name'],
+            'icon': cat_data['icon'],
+            'type': cat_data['type'],
+            'description': cat_data['description'],
+            'user_id': user_id,
+        })
+    _insert_defaults(Category, user_id, rows)
+    if commit:
+        db.session.commit()
+
+def create_default_wallets_for_user(user_id, commit=True):
     """Створення стандартних гаманців для нового користувача"""
     default_wallets = [
         {'name': 'Cash', 'icon': '💵', 'description': 'Pocket money', 'initial_balance': 0.0, 'currency': 'USD'},
         {'name': 'Bank card', 'icon': '💳', 'description': 'Main card', 'initial_balance': 0.0, 'currency': 'USD'},
     ]
     
-    for wallet_data in default_wallets:
-        wallet = Wallet(
-            name=wallet_data['name'],
-            icon=wallet_data['icon'],
-            description=wallet_data['description'],
-            currency=wallet_data['currency'],
-            user_id=user_id
+    _insert_defaults(Wallet, user_id, [
+        {
+            'name': wallet_data['name'],
+            'icon': wallet_data['icon'],
+            'description': wallet_data['description'],
+            'currency': wallet_data['currency'],
+            'user_id': user_id,
+        }
+        for wallet_data in default_wallets
+    ])
+    if commit:
+        db.session.commit()
+
+
+def _insert_defaults(model, user_id, rows):
+    """Один executemany замість INSERT на кожен об'єкт (ORM на SQLite не групує INSERT ... RETURNING)"""
+    if not rows:
+        return
+    db.session.flush()  # the user row must exist first
+    connection = db.session.connection()
+    connection.execute(model.__table__.insert(), rows)
+    bump_data_versions(connection, [user_id])  # bulk insert bypasses the flush hook
+
+
+# MARK: Wallet balances
+def signed_amount(t_type, amount):
+    """Вплив транзакції на баланс гаманця: income -> +amount, expense -> -amount"""
+    if t_type == 'income':
+        return float(amount or 0)
+    if t_type == 'expense':
+        return -float(amount or 0)
+    return 0.0
+
+
+def apply_balance_deltas(connection, deltas):
+    """Atomically add {wallet_id: delta} to the stored wallet balances."""
+    now = datetime.utcnow()
+    for wallet_id, delta in deltas.items():
+        if wallet_id is None or not delta:
+            continue
+        connection.execute(
+            Wallet.__table__.update()
+            .where(Wallet.__table__.c.id == wallet_id)
+            .values(balance=Wallet.__table__.c.balance + delta, modified_at=now)
         )
-        db.session.add(wallet)
-    
-    db.session.commit()
-
-
-
-
 
 
+_BALANCE_KEYS = ('amount', 'type', 'wallet_id')
+
+
+def _previous_value(state, key):
+    """Value of an attribute as it was in the database before this flush."""
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return state.attrs[key].value
+
+
+def _balance_changed(state):
+    return any(state.attrs[key].history.has_changes() for key in _BALANCE_KEYS)
+
+
+def _add_delta(deltas, wallet_id, delta):
+    if wallet_id is not None and delta:
+        deltas[wallet_id] = deltas.get(wallet_id, 0.0) + delta
+
+
+@event.listens_for(db.session, 'before_flush')
+def _reverse_old_balance_effects(session, flush_context, instances):
+    """Subtract the old effect of deleted/modified transactions while their rows still exist."""
+    deltas = session.info.setdefault('balance_deltas', {})
+    with session.no_autoflush:
+        for obj in session.deleted:
+            if isinstance(obj, Transaction):
+                state = inspect(obj)
+                _add_delta(deltas, _previous_value(state, 'wallet_id'),
+                           -signed_amount(_previous_value(state, 'type'), _previous_value(state, 'amount')))
+        for obj in session.dirty:
+            if isinstance(obj, Transaction) and obj not in session.deleted and _balance_changed(inspect(obj)):
+                state = inspect(obj)
+                _add_delta(deltas, _previous_value(state, 'wallet_id'),
+                           -signed_amount(_previous_value(state, 'type'), _previous_value(state, 'amount')))
+
+
+@event.listens_for(db.session, 'after_flush')
+def _maintain_wallet_balances(session, flush_context):
+    """Keep Wallet.balance in sync with Transaction rows written through the ORM.
+
+    Bulk query deletes/updates bypass this hook; callers must use
+    apply_balance_deltas() or rebuild_wallet_balances() for those.
+    """
+    deltas = session.info.pop('balance_deltas', {})
+
+    for obj in session.new:
+        if isinstance(obj, Transaction):
+            _add_delta(deltas, obj.wallet_id, signed_amount(obj.type, obj.amount))
+
+    for obj in session.dirty:
+        if isinstance(obj, Transaction) and obj not in session.deleted and _balance_changed(inspect(obj)):
+            _add_delta(deltas, obj.wallet_id, signed_amount(obj.type, obj.amount))
+
+    deltas = {wallet_id: delta for wallet_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    apply_balance_deltas(session.connection(), deltas)
+    session.info.setdefault('stale_wallet_ids', set()).update(deltas)
+
+
+@event.listens_for(db.session, 'after_flush_postexec')
+def _expire_stale_wallet_balances(session, flush_context):
+    """Expire cached balances of wallets updated by _maintain_wallet_balances."""
+    wallet_ids = session.info.pop('stale_wallet_ids', None)
+    if not wallet_ids:
+        return
+    for wallet_id in wallet_ids:
+        wallet = session.identity_map.get(inspect(Wallet).identity_key_from_primary_key((wallet_id,)))
+        if wallet is not None:
+            session.expire(wallet, ['balance'])
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _discard_pending_balance_deltas(session, previous_transaction):
+    """A failed flush must not leave its reversals behind for the next one."""
+    session.info.pop('balance_deltas', None)
+    session.info.pop('stale_wallet_ids', None)
+
+
+def compute_wallet_balances(wallet_ids=None, category_id=None):
+    """Розрахувати баланси гаманців з транзакцій (одним GROUP BY запитом)"""
+    signed = case(
+        (Transaction.type == 'income', Transaction.amount),
+        (Transaction.type == 'expense', -Transaction.amount),
+        else_=0.0
+    )
+    query = db.session.query(Transaction.wallet_id, func.coalesce(func.sum(signed), 0.0))
+    if wallet_ids is not None:
+        query = query.filter(Transaction.wallet_id.in_(list(wallet_ids)))
+    if category_id is not None:
+        query = query.filter(Transaction.category_id == category_id)
+    return {wallet_id: float(total) for wallet_id, total in query.group_by(Transaction.wallet_id)}
+
+
+def rebuild_wallet_balances(wallet_ids=None):
+    """Перерахувати збережені баланси з транзакцій. Повертає кількість гаманців."""
+    actual = compute_wallet_balances(wallet_ids)
+    query = Wallet.query
+    if wallet_ids is not None:
+        query = query.filter(Wallet.id.in_(list(wallet_ids)))
+    wallets = query.all()
+    for wallet in wallets:
+        wallet.balance = actual.get(wallet.id, 0.0)
+    db.session.commit()
+    return len(wallets)
+
+
+def verify_wallet_balances(tolerance=0.005):
+    """Повертає список (wallet_id, stored, actual) для гаманців з розбіжністю"""
+    actual = compute_wallet_balances()
+    mismatches = []
+    for wallet_id, stored in db.session.query(Wallet.id, Wallet.balance):
+        expected = actual.get(wallet_id, 0.0)
+        if abs((stored or 0.0) - expected) > tolerance:
+            mismatches.append((wallet_id, stored, expected))
+    return mismatches
+
+
+# MARK: Data version & tombstones
+_TOMBSTONE_ENTITIES = {'Transaction': 'transaction', 'Wallet': 'wallet', 'Category': 'category'}
+
+
+def bump_data_versions(connection, user_ids):
+    """Increment User.data_version for the given users (any write to their data)."""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+    connection.execute(
+        User.__table__.update()
+        .where(User.__table__.c.id.in_(user_ids))
+        .values(data_version=User.__table__.c.data_version + 1)
+    )
+
+
+def _insert_tombstones(connection, deleted):
+    """deleted: [(entity, entity_id, user_id), ...]"""
+    if not deleted:
+        return
+    now = datetime.utcnow()
+    connection.execute(Tombstone.__table__.insert(), [
+        {'user_id': user_id, 'entity': entity, 'entity_id': entity_id, 'deleted_at': now}
+        for entity, entity_id, user_id in deleted
+    ])
+
+
+def record_tombstones(connection, user_id, entity, entity_ids):
+    """Записати tombstones для видалених рядків (для bulk delete, який обходить ORM)."""
+    _insert_tombstones(connection, [(entity, entity_id, user_id) for entity_id in entity_ids])
+
+
+@event.listens_for(db.session, 'before_flush')
+def _capture_deleted_rows(session, flush_context, instances):
+    """Remember owner and id of deleted rows while they can still be loaded."""
+    deleted = session.info.setdefault('deleted_rows', [])
+    with session.no_autoflush:
+        for obj in session.deleted:
+            if isinstance(obj, (Wallet, Category, Transaction)):
+                deleted.append((_TOMBSTONE_ENTITIES[type(obj).__name__], obj.id, obj.user_id))
+
+
+@event.listens_for(db.session, 'after_flush')
+def _bump_data_versions(session, flush_context):
+    """ORM writes to wallets/categories/transactions bump their owner's data version
+    and leave a tombstone for every deleted row.
+
+    Bulk statements bypass this hook; callers must use bump_data_versions()
+    and record_tombstones().
+    """
+    deleted = session.info.pop('deleted_rows', [])
+    user_ids = {
+        obj.user_id
+        for obj in (*session.new, *session.dirty)
+        if isinstance(obj, (Wallet, Category, Transaction))
+        and (obj in session.new or session.is_modified(obj))
+    }
+    user_ids.update(user_id for _, _, user_id in deleted)
+    bump_data_versions(session.connection(), user_ids)
+
+    _insert_tombstones(session.connection(), deleted)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _discard_captured_deletes(session, previous_transaction):
+    session.info.pop('deleted_rows', None)
+
+
+def prune_tombstones(older_than):
+    """Видалити tombstones, старші за older_than (datetime). Повертає кількість."""
+    count = Tombstone.query.filter(Tombstone.deleted_at < older_than).delete()
+    db.session.commit()
+    return count
 
 
+# MARK: Monthly rollups
+_ROLLUP_KEYS = ('amount', 'type', 'wallet_id', 'category_id', 'date')
 
 
+def month_start(moment):
+    """Перший день місяця (date) для date/datetime"""
+    return moment.replace(day=1) if not isinstance(moment, datetime) else moment.date().replace(day=1)
 
 
+def add_rollup_delta(deltas, user_id, wallet_id, category_id, moment, t_type, amount, count):
+    """Додати до deltas внесок транзакції (count=1) або його скасування (count=-1)"""
+    if None in (user_id, wallet_id, category_id, moment, t_type):
+        return
+    key = (user_id, month_start(moment), wallet_id, category_id, t_type)
+    entry = deltas.setdefault(key, [0.0, 0])
+    entry[0] += float(amount or 0.0) * count
+    entry[1] += count
 
 
+def apply_rollup_deltas(connection, deltas):
+    """Upsert {(user_id, month, wallet_id, category_id, type): [total, count]} into the rollups."""
+    rows = [
+        {'user_id': user_id, 'month': month, 'wallet_id': wallet_id, 'category_id': category_id,
+         'type': t_type, 'total': total, 'count': count}
+        for (user_id, month, wallet_id, category_id, t_type), (total, count) in deltas.items()
+        if count or total
+    ]
+    if not rows:
+        return
+    if connection.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    table = MonthlyRollup.__table__
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'month', 'wallet_id', 'category_id', 'type'],
+        set_={'total': table.c.total + stmt.excluded.total, 'count': table.c.count + stmt.excluded.count},
+    )
+    connection.execute(stmt, rows)
+
+
+def _rollup_changed(state):
+    return any(state.attrs[key].history.has_changes() for key in _ROLLUP_KEYS)
+
+
+@event.listens_for(db.session, 'before_flush')
+def _reverse_old_rollup_effects(session, flush_context, instances):
+    """Subtract deleted/modified transactions from their old month while old values are known."""
+    deltas = session.info.setdefault('rollup_deltas', {})
+    with session.no_autoflush:
+        for obj in (*session.deleted, *session.dirty):
+            if not isinstance(obj, Transaction):
+                continue
+            state = inspect(obj)
+            if obj in session.deleted or _rollup_changed(state):
+                wallet_id, category_id, moment, t_type, amount = (
+                    _previous_value(state, key) for key in ('wallet_id', 'category_id', 'date', 'type', 'amount')
+                )
+                add_rollup_delta(deltas, obj.user_id, wallet_id, category_id, moment, t_type, amount, -1)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _maintain_monthly_rollups(session, flush_context):
+    """Add new/modified transactions to their month. Bulk statements must call apply_rollup_deltas()."""
+    deltas = session.info.pop('rollup_deltas', {})
+    for obj in (*session.new, *session.dirty):
+        if isinstance(obj, Transaction) and obj not in session.deleted and (
+                obj in session.new or _rollup_changed(inspect(obj))):
+            add_rollup_delta(deltas, obj.user_id, obj.wallet_id, obj.category_id, obj.date, obj.type, obj.amount, 1)
+    apply_rollup_deltas(session.connection(), deltas)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _discard_pending_rollup_deltas(session, previous_transaction):
+    session.info.pop('rollup_deltas', None)
+
+
+def rebuild_monthly_rollups(user_ids=None):
+    """Перерахувати ролапи з транзакцій (усіх або заданих користувачів). Повертає кількість рядків."""
+    delete = MonthlyRollup.query
+    source = db.session.query(
+        Transaction.user_id, Transaction.date, Transaction.wallet_id, Transaction.category_id,
+        Transaction.type, Transaction.amount
+    )
+    if user_ids is not None:
+        delete = delete.filter(MonthlyRollup.user_id.in_(user_ids))
+        source = source.filter(Transaction.user_id.in_(user_ids))
+    delete.delete(synchronize_session=False)
+
+    deltas = {}
+    for user_id, moment, wallet_id, category_id, t_type, amount in source.execution_options(yield_per=5000):
+        add_rollup_delta(deltas, user_id, wallet_id, category_id, moment, t_type, amount, 1)
+    apply_rollup_deltas(db.session.connection(), deltas)
+    db.session.commit()
+    return len(deltas)
+
+
+# MARK: Schema upgrade
+def _add_missing_columns(columns):
+    """ALTER TABLE ... ADD COLUMN для колонок [(table, column, ddl)], яких ще немає.
+
+    Повертає множину доданих (table, column).
+    """
+    added = set()
+    inspector = inspect(db.engine)
+    existing = {}
+    with db.engine.begin() as conn:
+        for table, column, ddl in columns:
+            if table not in existing:
+                existing[table] = {c['name'] for c in inspector.get_columns(table)}
+            if column not in existing[table]:
+                conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN {column} {ddl}'))
+                added.add((table, column))
+    return added
+
+
+def upgrade_schema():
+    """Привести існуючу SQLite базу до поточної схеми (create_all не додає колонки)"""
+    added = _add_missing_columns([
+        ('wallet', 'balance', 'FLOAT NOT NULL DEFAULT 0'),
+        ('wallet', 'modified_at', 'DATETIME'),
+        ('category', 'modified_at', 'DATETIME'),
+        ('user', 'data_version', 'INTEGER NOT NULL DEFAULT 0'),
+    ])
+    if ('wallet', 'balance') in added:
+        rebuild_wallet_balances()
+
+    # Rows that predate modified_at get the migration time, so clients holding a
+    # sync token receive them in the next delta instead of never (NULL >= x is false)
+    now = datetime.utcnow()
+    with db.engine.begin() as conn:
+        for table in ('wallet', 'category'):
+            conn.execute(text(f'UPDATE "{table}" SET modified_at = :now WHERE modified_at IS NULL'), {'now': now})
+
+    # Rollups table created by create_all() on an existing database starts empty
+    if db.session.query(MonthlyRollup.id).first() is None and db.session.query(Transaction.id).first() is not None:
+        rebuild_monthly_rollups()
+
+    # Superseded by ix_transaction_wallet_dedup
+    with db.engine.begin() as conn:
+        conn.execute(text('DROP INDEX IF EXISTS ix_transaction_wallet_id'))
+
+    # create_all() only creates indexes together with new tables
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
@@ -0,0 +1,104 @@
+"""Легкі read-моделі для GET-ендпоінтів.
+
+Запити вибирають лише потрібні колонки як Row-кортежі: без ORM-об'єктів,
+identity map і lazy-завантажень. Словники мають той самий вигляд, що й
+to_dict() відповідних моделей, тож відповіді API не змінюються.
+"""
+from models import db, Transaction, Wallet, Category
+
+TRANSACTION_COLUMNS = (
+    Transaction.id, Transaction.amount, Transaction.date, Transaction.modified_at,
+    Transaction.title, Transaction.description, Transaction.type,
+    Transaction.user_id, Transaction.category_id, Transaction.wallet_id,
+)
+WALLET_COLUMNS = (
+    Wallet.id, Wallet.name, Wallet.description, Wallet.icon, Wallet.currency, Wallet.user_id, Wallet.balance,
+)
+CATEGORY_COLUMNS = (
+    Category.id, Category.name, Category.description, Category.icon, Category.type, Category.user_id,
+)
+
+
+def wallet_dict(row):
+    """Як Wallet.to_dict()"""
+    return {
+        'id': row.id,
+        'name': row.name,
+        'description': row.description,
+        'icon': row.icon,
+        'currency': row.currency,
+        'user_id': row.user_id,
+        'balance': row.balance or 0.0,
+    }
+
+
+def category_dict(row):
+    """Як Category.to_dict()"""
+    return {
+        'id': row.id,
+        'name': row.name,
+        'description': row.description,
+        'icon': row.icon,
+        'type': row.type,
+        'user_id': row.user_id,
+    }
+
+
+def transaction_dict(row):
+    """Як Transaction.to_dict(compact=True); row — у порядку TRANSACTION_COLUMNS"""
+    # Tuple unpacking is several times cheaper than Row attribute access on large lists
+    id_, amount, when, modified_at, title, description, t_type, user_id, category_id, wallet_id = row
+    return {
+        'id': id_,
+        'amount': amount,
+        'date': when.isoformat() if when else None,
+        'modified_at': modified_at.isoformat() if modified_at else None,
+        'title': title,
+        'description': description,
+        'type': t_type,
+        'user_id': user_id,
+        'category_id': category_id,
+        'wallet_id': wallet_id,
+    }
+
+
+def wallet_rows(user_id):
+    return db.session.query(*WALLET_COLUMNS).filter(Wallet.user_id == user_id).all()
+
+
+def category_rows(user_id):
+    return db.session.query(*CATEGORY_COLUMNS).filter(Category.user_id == user_id).all()
+
+
+def transaction_rows(query):
+    """Той самий запит (фільтри, сортування, limit), але лише з колонками транзакції"""
+    return query.with_entities(*TRANSACTION_COLUMNS)
+
+
+def serialize_transaction_rows(rows, user_id, compact=False):
+    """Як models.serialize_transactions(), але для рядків з transaction_rows().
+
+    Гаманці й категорії користувача читаються двома запитами і серіалізуються
+    один раз на весь список.
+    """
+    wallets = {row.id: wallet_dict(row) for row in wallet_rows(user_id)}
+    categories = {row.id: category_dict(row) for row in category_rows(user_id)}
+
+    if not compact:
+        items = []
+        for row in rows:
+            data = transaction_dict(row)
+            data['category'] = categories.get(data['category_id'])
+            data['wallet'] = wallets.get(data['wallet_id'])
+            items.append(data)
+        return items
+
+    items = [transaction_dict(row) for row in rows]
+    # Only the referenced ones, in order of first use
+    wallet_ids = dict.fromkeys(item['wallet_id'] for item in items if item['wallet_id'] in wallets)
+    category_ids = dict.fromkeys(item['category_id'] for item in items if item['category_id'] in categories)
+    return {
+        'transactions': items,
+        'wallets': {str(wallet_id): wallets[wallet_id] for wallet_id in wallet_ids},
+        'categories': {str(category_id): categories[category_id] for category_id in category_ids},
+    }
@@ -0,0 +1,86 @@
+"""Генератор тестових даних для `flask seed`: N користувачів × M транзакцій.
+
+Випадкові значення генеруються пачками (Random.choices з k=batch) з
+фіксованого seed, тож той самий виклик дає ті самі дані. Кожна пачка з
+batch_size транзакцій вставляється через insert_transactions() (executemany
+без ORM-об'єктів) разом з балансами, місячними ролапами і версіями даних і
+комітиться окремо: перерваний запуск лишає узгоджену базу.
+"""
+import random
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from models import (
+    db, User, Wallet, Category,
+    create_default_categories_for_user, create_default_wallets_for_user,
+)
+from api.transactions import insert_transactions
+
+TITLES = (
+    'Lunch', 'Taxi', 'Salary', 'Gift', 'Groceries', 'Rent', 'Gym', 'Book', 'Concert', 'Investment',
+    'Coffee', 'Utilities', 'Internet', 'Phone', 'Insurance', 'Shopping', 'Medicine', 'Cinema', 'Flight', 'Hotel',
+)
+DESCRIPTIONS = (None, None, 'Paid for', 'Monthly bill', 'Online order', 'Cashback', 'Refund', 'Installment')
+EXTRA_WALLETS = (('Savings', 'UAH'), ('Travel', 'EUR'), ('Broker', 'USD'), ('London', 'GBP'))
+
+
+def _create_users(count, prefix, password):
+    hashed = generate_password_hash(password)  # hashing is slow; every seeded user shares it
+    users = []
+    for index in range(count):
+        username = f'{prefix}{index}'
+        user = User(username=username, email=f'{username}@example.com', password=hashed)
+        db.session.add(user)
+        db.session.flush()
+        create_default_categories_for_user(user.id, commit=False)
+        create_default_wallets_for_user(user.id, commit=False)
+        db.session.add_all([Wallet(name=name, currency=currency, user_id=user.id) for name, currency in EXTRA_WALLETS])
+        db.session.commit()
+        users.append(user.id)
+    return users
+
+
+def _batch_rows(rng, user_id, wallet_ids, category_ids, count, start, span_seconds, now):
+    """count рядків для executemany; значення кожної колонки генеруються одним викликом"""
+    wallets = rng.choices(wallet_ids, k=count)
+    categories = rng.choices(category_ids, k=count)
+    types = rng.choices(('expense', 'income'), weights=(4, 1), k=count)
+    offsets = rng.choices(range(span_seconds), k=count)
+    cents = rng.choices(range(100, 500000), k=count)
+    titles = rng.choices(TITLES, k=count)
+    descriptions = rng.choices(DESCRIPTIONS, k=count)
+    return [
+        {'user_id': user_id, 'wallet_id': wallet_id, 'category_id': category_id, 'type': t_type,
+         'amount': amount / 100, 'date': start + timedelta(seconds=offset), 'modified_at': now,
+         'title': title, 'description': description}
+        for wallet_id, category_id, t_type, offset, amount, title, description
+        in zip(wallets, categories, types, offsets, cents, titles, descriptions)
+    ]
+
+
+def seed_database(users=1, transactions=1000, seed=42, batch_size=50000, prefix='seed', password='test',
+                  start=datetime(2020, 1, 1), years=5, progress=None):
+    """Створити users користувачів по transactions транзакцій. Повертає список id користувачів.
+
+    progress: callable(inserted, total) після кожної пачки.
+    """
+    rng = random.Random(seed)
+    user_ids = _create_users(users, prefix, password)
+    span_seconds = int(timedelta(days=365 * years).total_seconds())
+    now = datetime.utcnow()
+    total = users * transactions
+    inserted = 0
+
+    for user_id in user_ids:
+        wallet_ids = [w for (w,) in db.session.query(Wallet.id).filter(Wallet.user_id == user_id)]
+        category_ids = [c for (c,) in db.session.query(Category.id).filter(Category.user_id == user_id)]
+        for offset in range(0, transactions, batch_size):
+            rows = _batch_rows(rng, user_id, wallet_ids, category_ids,
+                               min(batch_size, transactions - offset), start, span_seconds, now)
+            insert_transactions(rows, chunk_size=len(rows))
+            db.session.commit()  # one batch per transaction keeps the journal small on multi-million row runs
+            inserted += len(rows)
+            if progress is not None:
+                progress(inserted, total)
+    return user_ids
@@ -1,5 +1,16 @@
+import os
 import pytest
+from contextlib import contextmanager
+
+# The engine is created when app is imported, so the test database has to be chosen before that
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+
 from app import app as flask_app, db
+from api import rates
+from instrumentation import count_queries
+
+# Rates for tests come from a local table, never from the public API
+TEST_RATES = dict(rates.EXCHANGE_RATES)
 
 
 @pytest.fixture(scope='session')
@@ -13,16 +24,36 @@ def app():
         'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
         'SQLALCHEMY_TRACK_MODIFICATIONS': False,
         'JWT_COOKIE_CSRF_PROTECT': False,
+        'RATES_PERSIST': False,
     })
 
+    # Static local source and a long TTL: no background refresh reaches the network or
+    # bumps the rates generation (and so the read cache keys) in the middle of a test
+    previous = rates._RATES_SOURCE, rates._RATES_TTL_SECONDS
+    rates.configure_rates(source=lambda: dict(TEST_RATES), ttl_seconds=24 * 60 * 60)
+
     # Create DB schema once per test session
     with flask_app.app_context():
         db.create_all()
+        rates._ensure_rates_uptodate(force=True)  # fresh from the start
         yield flask_app
         db.session.remove()
         db.drop_all()
+    rates.configure_rates(source=previous[0], ttl_seconds=previous[1])
 
 
 @pytest.fixture()
 def client(app):
     return app.test_client()
+
+
+@pytest.fixture()
+def query_budget():
+    """with query_budget(n): ... -- fails if the block runs more than n SQL statements (N+1 guard)."""
+    @contextmanager
+    def budget(max_queries):
+        with count_queries() as counter:
+            yield counter
+        assert counter.count <= max_queries, \
+            f'{counter.count} queries, budget {max_queries}:\n' + '\n'.join(counter.statements)
+    return budget
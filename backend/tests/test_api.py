@@ -1,9 +1,21 @@
+import io
+import json
+import threading
+import time
+
 import pytest
 import requests.exceptions
 from unittest.mock import patch, Mock
 
-from app import _fetch_live_rates_units_per_usd, convert_amount, db
-from models import User
+from app import db
+from api import rates
+from api.rates import _fetch_live_rates_units_per_usd, convert_amount, convert_amounts, conversion_factors
+from datetime import date, timedelta
+
+from cache import read_cache, LRUCache
+from json_provider import FastJSONProvider
+from flask.json.provider import DefaultJSONProvider
+from models import User, ExchangeRate
 
 # MARK: test_ping_and_echo
 def test_ping_and_echo(client):
@@ -413,6 +425,699 @@ def test_wallet_balance_adjustment(client):
     wallet_data2 = next(w for w in rv_wallets2.get_json() if w['id'] == wallet_id)
     assert wallet_data2['balance'] == 100
 
+
+# MARK: test_delete_category_updates_wallet_balance
+def test_delete_category_updates_wallet_balance(client):
+    cookies = register_and_login(client, 'catbaluser', 'catbal@a.com', 'pass')
+
+    wallet_id = client.post('/api/wallets', json={
+        'name': 'CatBal Wallet', 'currency': 'USD', 'initial_balance': 100
+    }, headers={'Cookie': cookies}).get_json()['id']
+    cat_id = client.post('/api/categories', json={
+        'name': 'Doomed', 'type': 'expense'
+    }, headers={'Cookie': cookies}).get_json()['id']
+
+    client.post('/api/transactions', json={
+        'amount': 30, 'date': '2025-10-26T12:00:00', 'type': 'expense',
+        'category_id': cat_id, 'wallet_id': wallet_id, 'title': 'doomed tx'
+    }, headers={'Cookie': cookies})
+
+    wallets = client.get('/api/wallets', headers={'Cookie': cookies}).get_json()
+    assert next(w for w in wallets if w['id'] == wallet_id)['balance'] == 70
+
+    rv = client.delete(f'/api/categories/{cat_id}', headers={'Cookie': cookies})
+    assert rv.status_code == 200
+
+    wallets = client.get('/api/wallets', headers={'Cookie': cookies}).get_json()
+    assert next(w for w in wallets if w['id'] == wallet_id)['balance'] == 100
+
+# MARK: test_bulk_import_transactions
+def test_bulk_import_transactions(client):
+    other = register_and_login(client, 'bulkother', 'bulkother@a.com', 'pass')
+    foreign_wallet = client.get('/api/wallets', headers={'Cookie': other}).get_json()[0]['id']
+    cookies = register_and_login(client, 'bulkuser', 'bulk@a.com', 'pass')
+
+    wallet_id = client.post('/api/wallets', json={'name': 'Bulk W', 'currency': 'USD'},
+                            headers={'Cookie': cookies}).get_json()['id']
+    cat_id = client.get('/api/categories', headers={'Cookie': cookies}).get_json()[0]['id']
+
+    def row(amount, t_type='expense', **extra):
+        return {'amount': amount, 'date': '2025-03-01T10:00:00', 'type': t_type,
+                'category_id': cat_id, 'wallet_id': wallet_id, 'title': 'bulk', **extra}
+
+    rows = [row(10), row(50, 'income'), row(5, 'transfer'), row(1, wallet_id=foreign_wallet), row('abc')]
+    rv = client.post('/api/transactions/bulk', json=rows, headers={'Cookie': cookies})
+    assert rv.status_code == 201
+    data = rv.get_json()
+    assert data['inserted'] == 2
+    assert [e['index'] for e in data['errors']] == [2, 3, 4]
+    assert data['errors'][1]['msg'] == 'Wallet not found'
+
+    # NDJSON stream, including a malformed line
+    body = '\n'.join([json.dumps(row(7)), '{bad', json.dumps(row(3))]) + '\n'
+    rv = client.post('/api/transactions/bulk', data=body, content_type='application/x-ndjson',
+                     headers={'Cookie': cookies})
+    assert rv.status_code == 201
+    assert rv.get_json() == {'inserted': 2, 'errors': [{'index': 1, 'msg': 'Invalid JSON'}]}
+
+    # all_or_nothing rejects the whole batch
+    rv = client.post('/api/transactions/bulk?all_or_nothing=true', json=[row(1), row(None)],
+                     headers={'Cookie': cookies})
+    assert rv.status_code == 400
+    assert rv.get_json()['inserted'] == 0
+
+    assert client.post('/api/transactions/bulk', json={'x': 1}, headers={'Cookie': cookies}).status_code == 400
+
+    txs = client.get(f'/api/transactions?wallet_id={wallet_id}', headers={'Cookie': cookies}).get_json()
+    assert len(txs) == 4
+    wallets = client.get('/api/wallets', headers={'Cookie': cookies}).get_json()
+    assert next(w for w in wallets if w['id'] == wallet_id)['balance'] == pytest.approx(30.0)
+
+# MARK: test_non_finite_amounts_rejected
+def test_non_finite_amounts_rejected(client):
+    cookies = register_and_login(client, 'nanuser', 'nan@a.com', 'pass')
+    wallet_id = client.post('/api/wallets', json={'name': 'NaN W', 'currency': 'USD'},
+                            headers={'Cookie': cookies}).get_json()['id']
+    cat_id = client.get('/api/categories', headers={'Cookie': cookies}).get_json()[0]['id']
+    base = {'date': '2025-03-01T10:00:00', 'type': 'expense', 'category_id': cat_id, 'wallet_id': wallet_id}
+
+    # NDJSON lines go through json.loads, where 1e309 overflows to inf
+    lines = [json.dumps({**base, 'amount': a}) for a in ('nan', 'inf', '-1', 0, 5)]
+    lines.append(json.dumps({**base, 'amount': 1}).replace('"amount": 1', '"amount": 1e309'))
+    rv = client.post('/api/transactions/bulk', data='\n'.join(lines), content_type='application/x-ndjson',
+                     headers={'Cookie': cookies})
+    data = rv.get_json()
+    assert data['inserted'] == 1
+    assert [e['index'] for e in data['errors']] == [0, 1, 2, 3, 5]
+
+    for amount in ('nan', 'Infinity', -3, 0):
+        rv = client.post('/api/transactions', json={**base, 'amount': amount}, headers={'Cookie': cookies})
+        assert rv.status_code == 400
+    tx_id = client.get(f'/api/transactions?wallet_id={wallet_id}', headers={'Cookie': cookies}).get_json()[0]['id']
+    assert client.put(f'/api/transactions/{tx_id}', json={'amount': 'nan'}, headers={'Cookie': cookies}).status_code == 400
+
+    wallets = client.get('/api/wallets', headers={'Cookie': cookies}).get_json()
+    assert next(w for w in wallets if w['id'] == wallet_id)['balance'] == pytest.approx(-5.0)
+
+# MARK: test_import_statement_csv_dedup
+def test_import_statement_csv_dedup(client):
+    cookies = register_and_login(client, 'importuser', 'import@a.com', 'pass')
+    wallet_id = client.post('/api/wallets', json={'name': 'Bank', 'currency': 'UAH'},
+                            headers={'Cookie': cookies}).get_json()['id']
+
+    statement = (
+        'Date;Amount;Payee;Category\n'
+        '01.05.2025;-120,50;Coffee;Food\n'
+        '01.05.2025;-120,50;Coffee;Food\n'
+        '02.05.2025;15000;Employer;Salary\n'
+        '02.05.2025;0,00;Nothing;\n'
+        'not a date;10;Broken;\n'
+    )
+
+    def upload(text):
+        return client.post('/api/transactions/import', data={
+            'wallet_id': str(wallet_id), 'file': (io.BytesIO(text.encode()), 'statement.csv'),
+        }, content_type='multipart/form-data', headers={'Cookie': cookies})
+
+    rv = upload(statement)
+    assert rv.status_code == 201
+    data = rv.get_json()
+    assert (data['inserted'], data['duplicates']) == (3, 0)
+    assert data['errors'] == [{'line': 5, 'msg': 'Zero amount'}, {'line': 6, 'msg': data['errors'][1]['msg']}]
+
+    # Overlapping re-import only adds the new row
+    rv = upload(statement + '03.05.2025;-40;Bus;Transport\n')
+    assert (rv.get_json()['inserted'], rv.get_json()['duplicates']) == (1, 3)
+
+    txs = client.get(f'/api/transactions?wallet_id={wallet_id}', headers={'Cookie': cookies}).get_json()
+    assert len(txs) == 4
+    salary = next(t for t in txs if t['title'] == 'Employer')
+    assert salary['type'] == 'income' and salary['category']['name'] == 'Salary'
+    wallets = client.get('/api/wallets', headers={'Cookie': cookies}).get_json()
+    assert next(w for w in wallets if w['id'] == wallet_id)['balance'] == pytest.approx(15000 - 241 - 40)
+
+    rv = client.post('/api/transactions/import', data={
+        'wallet_id': str(wallet_id), 'file': (io.BytesIO(b'foo,bar\n1,2\n'), 's.csv'),
+    }, content_type='multipart/form-data', headers={'Cookie': cookies})
+    assert rv.status_code == 400
+
+# MARK: test_parse_statement_amount
+def test_parse_statement_amount():
+    from api.statements import parse_statement_amount
+    assert parse_statement_amount('1,234') == 1234.0
+    assert parse_statement_amount('-1,234,567') == -1234567.0
+    assert parse_statement_amount('+1,234') == 1234.0
+    assert parse_statement_amount('120,50') == pytest.approx(120.5)
+    assert parse_statement_amount('0,125') == pytest.approx(0.125)
+    assert parse_statement_amount('1,2345') == pytest.approx(1.2345)
+    assert parse_statement_amount('-1,234.56') == pytest.approx(-1234.56)
+    assert parse_statement_amount('1.234,56') == pytest.approx(1234.56)
+    assert parse_statement_amount('1 234,56') == pytest.approx(1234.56)
+    assert parse_statement_amount('(12.00)') == -12.0
+    for bad in ('', 'abc', 'nan', 'inf'):
+        with pytest.raises(ValueError):
+            parse_statement_amount(bad)
+
+# MARK: test_import_statement_ofx
+@patch('api.statements.READ_CHUNK_SIZE', 16)
+def test_import_statement_ofx(client):
+    cookies = register_and_login(client, 'ofxuser', 'ofx@a.com', 'pass')
+    wallet_id = client.post('/api/wallets', json={'name': 'OFX Bank', 'currency': 'USD'},
+                            headers={'Cookie': cookies}).get_json()['id']
+    ofx = (
+        'OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n'
+        '<STMTTRN>\n<TRNTYPE>DEBIT\n<DTPOSTED>20250510120000.000[-5:EST]\n<TRNAMT>-9.99\n'
+        '<FITID>1\n<NAME>Café Ñandú\n<MEMO>card 1234\n</STMTTRN>\n'
+        '<STMTTRN><TRNTYPE>CREDIT</TRNTYPE><DTPOSTED>20250511</DTPOSTED><TRNAMT>100.00</TRNAMT>'
+        '<NAME>Refund</NAME></STMTTRN>\n'
+        '</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n'
+    )
+    rv = client.post('/api/transactions/import', data={
+        'wallet_id': str(wallet_id), 'file': (io.BytesIO(ofx.encode()), 'statement.qfx'),
+    }, content_type='multipart/form-data', headers={'Cookie': cookies})
+    assert rv.status_code == 201
+    assert rv.get_json() == {'inserted': 2, 'duplicates': 0, 'errors': []}
+
+    txs = client.get(f'/api/transactions?wallet_id={wallet_id}', headers={'Cookie': cookies}).get_json()
+    assert [(t['title'], t['amount'], t['type']) for t in txs] == [('Refund', 100.0, 'income'), ('Café Ñandú', 9.99, 'expense')]
+    assert txs[1]['description'] == 'card 1234'
+    assert txs[1]['date'].startswith('2025-05-10T12:00:00')
+
+# MARK: test_export_transactions
+def test_export_transactions(client):
+    cookies = register_and_login(client, 'exportuser', 'export@a.com', 'pass')
+    wallet_id = client.post('/api/wallets', json={'name': 'Export W', 'currency': 'EUR'},
+                            headers={'Cookie': cookies}).get_json()['id']
+    cat_id = client.get('/api/categories', headers={'Cookie': cookies}).get_json()[0]['id']
+    rows = [{'amount': 10 + i, 'date': f'2025-04-0{i + 1}T09:00:00', 'type': 'expense',
+             'category_id': cat_id, 'wallet_id': wallet_id, 'title': f'exp, {i}'} for i in range(3)]
+    client.post('/api/transactions/bulk', json=rows, headers={'Cookie': cookies})
+
+    rv = client.get('/api/transactions/export?format=csv', headers={'Cookie': cookies})
+    assert rv.status_code == 200
+    assert rv.mimetype == 'text/csv'
+    lines = rv.get_data(as_text=True).splitlines()
+    assert lines[0] == 'id,date,type,amount,currency,wallet,category,title,description'
+    assert len(lines) == 4
+    assert '"exp, 2"' in lines[1] and 'Export W' in lines[1]
+
+    rv = client.get('/api/transactions/export?format=ndjson&start_date=2025-04-02', headers={'Cookie': cookies})
+    items = [json.loads(line) for line in rv.get_data(as_text=True).splitlines()]
+    assert [i['amount'] for i in items] == [12.0, 11.0]
+    assert items[0]['currency'] == 'EUR'
+
+    assert client.get('/api/transactions/export?format=xml', headers={'Cookie': cookies}).status_code == 400
+
+# MARK: test_response_compression
+def test_response_compression(client):
+    import gzip
+    cookies = register_and_login(client, 'gzipuser', 'gzip@a.com', 'pass')
+    wallet_id = client.get('/api/wallets', headers={'Cookie': cookies}).get_json()[0]['id']
+    cat_id = client.get('/api/categories', headers={'Cookie': cookies}).get_json()[0]['id']
+    rows = [{'amount': i + 1, 'date': '2025-05-01T09:00:00', 'type': 'expense',
+             'category_id': cat_id, 'wallet_id': wallet_id, 'title': f'gzip {i}'} for i in range(50)]
+    client.post('/api/transactions/bulk', json=rows, headers={'Cookie': cookies})
+
+    plain = client.get('/api/transactions', headers={'Cookie': cookies})
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+    rv = client.get('/api/transactions', headers={'Cookie': cookies, 'Accept-Encoding': 'gzip'})
+    assert rv.headers['Content-Encoding'] == 'gzip'
+    assert int(rv.headers['Content-Length']) < len(plain.get_data())
+    assert json.loads(gzip.decompress(rv.get_data())) == plain.get_json()
+    # Compressed bytes get a weak ETag that still revalidates
+    etag = rv.headers['ETag']
+    assert etag.startswith('W/')
+    assert client.get('/api/transactions', headers={
+        'Cookie': cookies, 'Accept-Encoding': 'gzip', 'If-None-Match': etag}).status_code == 304
+
+    # Small bodies are sent as is
+    assert 'Content-Encoding' not in client.get('/api/ping', headers={'Accept-Encoding': 'gzip'}).headers
+
+    # Streamed export is compressed on the fly
+    rv = client.get('/api/transactions/export?format=csv', headers={'Cookie': cookies, 'Accept-Encoding': 'gzip'})
+    assert rv.headers['Content-Encoding'] == 'gzip'
+    lines = gzip.decompress(rv.get_data()).decode().splitlines()
+    assert len(lines) == 51
+
+
+@patch('api.rates._RATES_LAST_UPDATED', float('inf'))
+def test_rates_cache_headers(client):
+    rv = client.get('/api/rates')
+    assert rv.headers['Cache-Control'].startswith(f'public, max-age={rates._RATES_TTL_SECONDS},')
+    assert 'Accept-Encoding' in rv.headers['Vary']
+
+
+# MARK: test_register_provisions_in_one_batch
+def test_register_provisions_in_one_batch(client, query_budget):
+    from models import Category, Wallet, create_default_categories_for_user
+    # user + one existence check + one INSERT per table, not a query per default category
+    with query_budget(8):
+        rv = client.post('/api/register', json={'username': 'batched', 'email': 'batched@a.com', 'password': 'pass'})
+    assert rv.status_code == 201
+    user_id = User.query.filter_by(username='batched').one().id
+    categories = Category.query.filter_by(user_id=user_id).count()
+    assert categories >= 5
+    assert Wallet.query.filter_by(user_id=user_id).count() == 2
+
+    create_default_categories_for_user(user_id)  # existing names are skipped
+    assert Category.query.filter_by(user_id=user_id).count() == categories
+
+    rv = client.post('/api/register', json={'username': 'other', 'email': 'batched@a.com', 'password': 'pass'})
+    assert rv.status_code == 409
+
+
+# MARK: test_query_budgets
+def test_query_budgets(client, query_budget):
+    from sqlalchemy.orm import selectinload
+    from models import Transaction, serialize_transactions
+    cookies = register_and_login(client, 'budgetuser', 'budget@a.com', 'pass')
+    wallets = [w['id'] for w in client.get('/api/wallets', headers={'Cookie': cookies}).get_json()]
+    categories = [c['id'] for c in client.get('/api/categories', headers={'Cookie': cookies}).get_json()]
+
+    def add(count):
+        rows = [{'amount': i + 1, 'date': '2025-07-01T09:00:00', 'type': 'expense', 'title': f'budget {i}',
+                 'wallet_id': wallets[i % len(wallets)], 'category_id': categories[i % len(categories)]}
+                for i in range(count)]
+        client.post('/api/transactions/bulk', json=rows, headers={'Cookie': cookies})
+
+    # The number of statements must not grow with the number of rows
+    for count in (2, 30):
+        add(count)
+        with query_budget(4):
+            client.get('/api/transactions', headers={'Cookie': cookies})
+        with query_budget(4):
+            client.get('/api/transactions?compact=true&limit=10', headers={'Cookie': cookies})
+        with query_budget(4):
+            client.get('/api/statistics/by-category', headers={'Cookie': cookies})
+
+    # to_dict() must not lazy-load anything once relations are eager-loaded
+    user_id = User.query.filter_by(username='budgetuser').one().id
+    transactions = Transaction.query.filter_by(user_id=user_id).options(
+        selectinload(Transaction.wallet), selectinload(Transaction.category)).all()
+    with query_budget(0):
+        serialize_transactions(transactions)
+
+
+# MARK: test_server_timing_and_metrics
+def test_server_timing_and_metrics(client, app, monkeypatch):
+    cookies = register_and_login(client, 'timinguser', 'timing@a.com', 'pass')
+    rv = client.get('/api/wallets', headers={'Cookie': cookies})
+    timing = rv.headers['Server-Timing']
+    assert timing.startswith('db;dur=') and 'queries"' in timing and 'total;dur=' in timing
+    # No statement text by default, not even for anonymous requests
+    assert 'sql1' not in timing and 'SELECT' not in timing
+    login = client.post('/api/login', json={'username': 'timinguser', 'password': 'pass'})
+    assert 'SELECT' not in login.headers['Server-Timing']
+
+    assert client.get('/api/_metrics').status_code == 404  # disabled by default
+    monkeypatch.setitem(app.config, 'DIAGNOSTICS_ENDPOINTS', True)
+    timing = client.get('/api/wallets', headers={'Cookie': cookies}).headers['Server-Timing']
+    assert 'sql1;dur=' in timing
+    text = client.get('/api/_metrics').get_data(as_text=True)
+    assert 'budget_http_requests_total{method="GET",route="/api/wallets",status="200"}' in text
+    assert 'budget_db_queries_total{method="GET",route="/api/wallets"}' in text
+    assert 'budget_db_slowest_query_seconds{statement="' in text
+    assert 'budget_read_cache_hits_total' in text
+
+
+# MARK: test_count_queries_ignores_other_threads
+def test_count_queries_ignores_other_threads(app):
+    from sqlalchemy import text
+    from instrumentation import count_queries
+
+    def background():
+        with app.app_context():
+            db.session.execute(text('SELECT 1'))
+
+    with count_queries() as own, count_queries(all_threads=True) as everything:
+        db.session.execute(text('SELECT 2'))
+        thread = threading.Thread(target=background)
+        thread.start()
+        thread.join()
+    assert own.statements == ['SELECT 2']
+    assert everything.count == 2
+
+
+# MARK: test_conditional_get_with_data_version
+def test_conditional_get_with_data_version(client):
+    cookies = register_and_login(client, 'etaguser', 'etag@a.com', 'pass')
+
+    rv = client.get('/api/wallets', headers={'Cookie': cookies})
+    etag = rv.headers['ETag']
+    assert rv.status_code == 200 and etag
+    assert 'no-cache' in rv.headers['Cache-Control']
+
+    rv = client.get('/api/wallets', headers={'Cookie': cookies, 'If-None-Match': etag})
+    assert rv.status_code == 304
+    assert rv.get_data() == b''
+    # One version covers all list endpoints of the user
+    assert client.get('/api/transactions?limit=5', headers={'Cookie': cookies, 'If-None-Match': etag}).status_code == 304
+
+    wallet_id = client.get('/api/wallets', headers={'Cookie': cookies}).get_json()[0]['id']
+    cat_id = client.get('/api/categories', headers={'Cookie': cookies}).get_json()[0]['id']
+    tx = {'amount': 5, 'date': '2025-06-01T10:00:00', 'type': 'expense',
+          'category_id': cat_id, 'wallet_id': wallet_id, 'title': 'etag tx'}
+    client.post('/api/transactions', json=tx, headers={'Cookie': cookies})
+
+    rv = client.get('/api/wallets', headers={'Cookie': cookies, 'If-None-Match': etag})
+    assert rv.status_code == 200
+    assert rv.headers['ETag'] != etag
+    etag = rv.headers['ETag']
+
+    # Bulk inserts bypass the ORM but still bump the version
+    client.post('/api/transactions/bulk', json=[tx], headers={'Cookie': cookies})
+    assert client.get('/api/categories', headers={'Cookie': cookies, 'If-None-Match': etag}).status_code == 200
+
+# MARK: test_delta_sync_with_tombstones
+@patch('api.sync.SYNC_OVERLAP', timedelta(0))
+def test_delta_sync_with_tombstones(client):
+    cookies = register_and_login(client, 'syncuser', 'sync@a.com', 'pass')
+    wallet_id = client.get('/api/wallets', headers={'Cookie': cookies}).get_json()[0]['id']
+    doomed_cat = client.post('/api/categories', json={'name': 'Sync Doomed', 'type': 'expense'},
+                             headers={'Cookie': cookies}).get_json()['id']
+
+    def add_tx(title, category_id):
+        return client.post('/api/transactions', json={
+            'amount': 3, 'date': '2025-07-01T10:00:00', 'type': 'expense',
+            'category_id': category_id, 'wallet_id': wallet_id, 'title': title
+        }, headers={'Cookie': cookies}).get_json()['id']
+
+    kept = add_tx('kept', doomed_cat)
+    rv = client.get('/api/sync', headers={'Cookie': cookies})
+    full = rv.get_json()
+    assert full['full'] is True
+    assert kept in [t['id'] for t in full['transactions']]
+    assert 'wallet' not in full['transactions'][0]
+
+    # Nothing changed -> empty delta
+    delta = client.get(f"/api/sync?since={full['token']}", headers={'Cookie': cookies}).get_json()
+    assert delta['full'] is False
+    assert (delta['transactions'], delta['wallets'], delta['categories']) == ([], [], [])
+    token = delta['token']
+
+    time.sleep(0.01)
+    other_cat = client.get('/api/categories', headers={'Cookie': cookies}).get_json()[0]['id']
+    added = add_tx('added', other_cat)
+    client.put(f'/api/transactions/{added}', json={'title': 'edited'}, headers={'Cookie': cookies})
+    client.delete(f'/api/categories/{doomed_cat}', headers={'Cookie': cookies})
+
+    delta = client.get(f'/api/sync?since={token}', headers={'Cookie': cookies}).get_json()
+    assert [t['title'] for t in delta['transactions']] == ['edited']
+    # Balance changes touch the wallet
+    assert [w['id'] for w in delta['wallets']] == [wallet_id]
+    assert delta['deleted']['transactions'] == [kept]
+    assert delta['deleted']['categories'] == [doomed_cat]
+
+    assert client.get('/api/sync?since=garbage', headers={'Cookie': cookies}).status_code == 400
+
+# MARK: test_read_cache_hits_and_invalidation
+def test_read_cache_hits_and_invalidation(client, app, monkeypatch):
+    assert client.get('/api/_cache').status_code == 404  # disabled by default
+    monkeypatch.setitem(app.config, 'DIAGNOSTICS_ENDPOINTS', True)
+    cookies = register_and_login(client, 'cacheuser', 'cache@a.com', 'pass')
+    read_cache.reset_stats()
+
+    first = client.get('/api/wallets', headers={'Cookie': cookies})
+    second = client.get('/api/wallets', headers={'Cookie': cookies})
+    assert (first.headers['X-Cache'], second.headers['X-Cache']) == ('miss', 'hit')
+    assert first.get_json() == second.get_json()
+    assert client.get('/api/statistics?base_currency=EUR', headers={'Cookie': cookies}).headers['X-Cache'] == 'miss'
+    assert client.get('/api/statistics?base_currency=EUR', headers={'Cookie': cookies}).headers['X-Cache'] == 'hit'
+
+    wallet_id = first.get_json()[0]['id']
+    client.put(f'/api/wallets/{wallet_id}', json={'name': 'Renamed'}, headers={'Cookie': cookies})
+    rv = client.get('/api/wallets', headers={'Cookie': cookies})
+    assert rv.headers['X-Cache'] == 'miss'
+    assert rv.get_json()[0]['name'] == 'Renamed'
+
+    stats = client.get('/api/_cache').get_json()
+    assert (stats['hits'], stats['misses']) == (2, 3)
+    assert stats['invalidations'] == 1
+    assert stats['backend'] == 'LRUCache'
+
+
+def test_lru_cache_eviction_and_ttl():
+    cache = LRUCache(max_entries=2, ttl_seconds=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)  # evicts least recently used 'b'
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (1, None, 3)
+    cache.set('d', 4, ttl_seconds=-1)
+    assert cache.get('d') is None
+    cache.delete_prefix('a')
+    assert cache.get('a') is None
+
+
+# MARK: test_fast_json_provider_matches_default
+def test_fast_json_provider_matches_default(app):
+    from datetime import datetime
+    from decimal import Decimal
+    payload = {'b': [1.5, None, '🍔'], 'a': {'when': datetime(2025, 1, 2, 3, 4, 5), 'day': date(2025, 1, 2)},
+               'amount': Decimal('1.10')}
+    fast, default = FastJSONProvider(app), DefaultJSONProvider(app)
+    assert json.loads(fast.dumps(payload)) == json.loads(default.dumps(payload))
+    assert fast.loads(b'{"x": [1, 2]}') == {'x': [1, 2]}
+    with app.test_request_context():
+        response = fast.response(payload)
+    assert response.mimetype == 'application/json'
+    assert response.get_json() == json.loads(default.dumps(payload))
+    assert isinstance(app.json, FastJSONProvider)
+
+
+# MARK: test_fast_json_provider_differences
+def test_fast_json_provider_differences(app):
+    orjson = pytest.importorskip('orjson')
+    fast, default = FastJSONProvider(app), DefaultJSONProvider(app)
+    # Raw UTF-8 instead of \uXXXX escapes; the decoded value is the same
+    assert fast.dumps({'icon': '🍔'}) == '{"icon":"🍔"}'
+    assert default.dumps({'icon': '🍔'}) == '{"icon": "\\ud83c\\udf54"}'
+    # Non-finite floats become null instead of invalid JSON literals
+    assert fast.dumps([float('nan'), float('inf')]) == '[null,null]'
+    assert default.dumps([float('nan'), float('inf')]) == '[NaN, Infinity]'
+    with pytest.raises(orjson.JSONDecodeError):
+        fast.loads('[NaN]')
+
+# MARK: test_get_transactions_compact
+def test_get_transactions_compact(client):
+    cookies = register_and_login(client, 'compactuser', 'compact@a.com', 'pass')
+
+    wallet_id = client.get('/api/wallets', headers={'Cookie': cookies}).get_json()[0]['id']
+    cat_id = client.get('/api/categories', headers={'Cookie': cookies}).get_json()[0]['id']
+    for amount in (10, 20, 30):
+        client.post('/api/transactions', json={
+            'amount': amount, 'date': '2025-10-26T12:00:00', 'type': 'income',
+            'category_id': cat_id, 'wallet_id': wallet_id, 'title': 'compact tx'
+        }, headers={'Cookie': cookies})
+
+    data = client.get('/api/transactions?compact=true', headers={'Cookie': cookies}).get_json()
+    assert len(data['transactions']) == 3
+    assert all('wallet' not in t and 'category' not in t for t in data['transactions'])
+    assert list(data['wallets'].keys()) == [str(wallet_id)]
+    assert list(data['categories'].keys()) == [str(cat_id)]
+    assert data['wallets'][str(wallet_id)]['balance'] == 60
+
+    # default shape still embeds the related objects
+    full = client.get('/api/transactions', headers={'Cookie': cookies}).get_json()
+    assert full[0]['wallet']['id'] == wallet_id
+
+# MARK: test_get_transactions_keyset_pagination
+def test_get_transactions_keyset_pagination(client):
+    cookies = register_and_login(client, 'pageuser', 'page@a.com', 'pass')
+
+    wallet_id = client.get('/api/wallets', headers={'Cookie': cookies}).get_json()[0]['id']
+    cat_id = client.get('/api/categories', headers={'Cookie': cookies}).get_json()[0]['id']
+    # several rows share a date to exercise the (modified_at, id) tie-breakers
+    dates = ['2025-10-26T12:00:00', '2025-10-26T12:00:00', '2025-10-26T12:00:00',
+             '2025-10-25T09:00:00', '2025-10-24T09:00:00']
+    for i, date in enumerate(dates):
+        client.post('/api/transactions', json={
+            'amount': i + 1, 'date': date, 'type': 'expense',
+            'category_id': cat_id, 'wallet_id': wallet_id, 'title': f'page tx {i}'
+        }, headers={'Cookie': cookies})
+
+    full = client.get('/api/transactions', headers={'Cookie': cookies}).get_json()
+    expected_ids = [t['id'] for t in full]
+
+    seen = []
+    cursor = None
+    while True:
+        url = '/api/transactions?limit=2' + (f'&cursor={cursor}' if cursor else '')
+        rv = client.get(url, headers={'Cookie': cookies})
+        assert rv.status_code == 200
+        page = rv.get_json()
+        assert len(page['transactions']) <= 2
+        seen.extend(t['id'] for t in page['transactions'])
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    assert seen == expected_ids
+
+    # filters combine with pagination
+    page = client.get('/api/transactions?limit=10&start_date=2025-10-25T00:00:00',
+                      headers={'Cookie': cookies}).get_json()
+    assert len(page['transactions']) == 4
+    assert page['next_cursor'] is None
+
+    # a numeric search also matches amounts (titles only contain 0-4)
+    page = client.get('/api/transactions?limit=10&search=5', headers={'Cookie': cookies}).get_json()
+    assert [t['amount'] for t in page['transactions']] == [5]
+
+    rv = client.get('/api/transactions?limit=2&cursor=garbage', headers={'Cookie': cookies})
+    assert rv.status_code == 400
+
+    bounds = client.get('/api/transactions/bounds', headers={'Cookie': cookies}).get_json()
+    assert bounds['first_date'].startswith('2025-10-24')
+    assert bounds['last_date'].startswith('2025-10-26')
+
+# MARK: test_statistics_totals_across_currencies
+@patch.dict('api.rates.EXCHANGE_RATES', {'USD': 1.0, 'UAH': 40.0, 'EUR': 0.8}, clear=True)
+@patch('api.rates._RATES_LAST_UPDATED', float('inf'))
+def test_statistics_totals_across_currencies(client):
+    cookies = register_and_login(client, 'statcuruser', 'statcur@a.com', 'pass')
+
+    usd_id = client.post('/api/wallets', json={'name': 'USD W', 'currency': 'USD'},
+                         headers={'Cookie': cookies}).get_json()['id']
+    uah_id = client.post('/api/wallets', json={'name': 'UAH W', 'currency': 'UAH'},
+                         headers={'Cookie': cookies}).get_json()['id']
+    cat_id = client.get('/api/categories', headers={'Cookie': cookies}).get_json()[0]['id']
+
+    rows = [(usd_id, 'income', 100), (usd_id, 'expense', 30), (uah_id, 'income', 400), (uah_id, 'expense', 80)]
+    for wallet_id, t_type, amount in rows:
+        client.post('/api/transactions', json={
+            'amount': amount, 'date': '2025-10-26T12:00:00', 'type': t_type,
+            'category_id': cat_id, 'wallet_id': wallet_id, 'title': 'stat tx'
+        }, headers={'Cookie': cookies})
+
+    data = client.get('/api/statistics?base_currency=USD', headers={'Cookie': cookies}).get_json()
+    assert data['total_incomes'] == pytest.approx(110.0)
+    assert data['total_expenses'] == pytest.approx(32.0)
+    assert data['balance'] == pytest.approx(78.0)
+
+    data = client.get(f'/api/statistics?base_currency=USD&wallet_id={uah_id}', headers={'Cookie': cookies}).get_json()
+    assert data['total_incomes'] == pytest.approx(10.0)
+
+# MARK: test_statistics_series
+@patch.dict('api.rates.EXCHANGE_RATES', {'USD': 1.0, 'UAH': 40.0, 'EUR': 0.8}, clear=True)
+@patch('api.rates._RATES_LAST_UPDATED', float('inf'))
+def test_statistics_series(client):
+    cookies = register_and_login(client, 'seriesuser', 'series@a.com', 'pass')
+
+    usd_id = client.post('/api/wallets', json={'name': 'S USD', 'currency': 'USD'},
+                         headers={'Cookie': cookies}).get_json()['id']
+    uah_id = client.post('/api/wallets', json={'name': 'S UAH', 'currency': 'UAH'},
+                         headers={'Cookie': cookies}).get_json()['id']
+    cat_id = client.get('/api/categories', headers={'Cookie': cookies}).get_json()[0]['id']
+
+    rows = [
+        (usd_id, 'income', 100, '2025-01-06T10:00:00'),   # Monday
+        (uah_id, 'expense', 400, '2025-01-08T10:00:00'),  # same week, 10 USD
+        (usd_id, 'expense', 5, '2025-01-20T10:00:00'),
+        (usd_id, 'income', 50, '2025-02-03T10:00:00'),
+    ]
+    for wallet_id, t_type, amount, when in rows:
+        client.post('/api/transactions', json={
+            'amount': amount, 'date': when, 'type': t_type,
+            'category_id': cat_id, 'wallet_id': wallet_id, 'title': 'series tx'
+        }, headers={'Cookie': cookies})
+
+    data = client.get('/api/statistics/series?interval=week&base_currency=USD&end_date=2025-02-09T23:59:59',
+                      headers={'Cookie': cookies}).get_json()
+    buckets = data['buckets']
+    assert buckets[0] == {'period': '2025-01-06', 'income': 100.0, 'expense': 10.0, 'net': 90.0, 'net_worth': 90.0}
+    assert [b['period'] for b in buckets] == ['2025-01-06', '2025-01-13', '2025-01-20', '2025-01-27', '2025-02-03']
+    assert buckets[1]['net'] == 0 and buckets[1]['net_worth'] == 90.0
+    assert buckets[-1]['net_worth'] == pytest.approx(135.0)
+
+    data = client.get('/api/statistics/series?interval=month&base_currency=USD'
+                      '&start_date=2025-02-01T00:00:00&end_date=2025-02-28T23:59:59',
+                      headers={'Cookie': cookies}).get_json()
+    assert data['opening_balance'] == pytest.approx(85.0)
+    assert data['buckets'] == [{'period': '2025-02-01', 'income': 50.0, 'expense': 0.0, 'net': 50.0, 'net_worth': 135.0}]
+
+    rv = client.get('/api/statistics/series?interval=year', headers={'Cookie': cookies})
+    assert rv.status_code == 400
+
+# MARK: test_statistics_from_monthly_rollups
+@patch.dict('api.rates.EXCHANGE_RATES', {'USD': 1.0, 'UAH': 40.0, 'EUR': 0.8}, clear=True)
+@patch('api.rates._RATES_LAST_UPDATED', float('inf'))
+def test_statistics_from_monthly_rollups(client):
+    cookies = register_and_login(client, 'rollupuser', 'rollup@a.com', 'pass')
+    wallet_id = client.post('/api/wallets', json={'name': 'R USD', 'currency': 'USD'},
+                            headers={'Cookie': cookies}).get_json()['id']
+    cat_id = client.get('/api/categories', headers={'Cookie': cookies}).get_json()[0]['id']
+
+    ids = {}
+    for day, amount in (('2025-01-10', 1), ('2025-01-20', 2), ('2025-02-14', 4),
+                        ('2025-03-05', 8), ('2025-04-05', 16), ('2025-04-25', 32)):
+        ids[day] = client.post('/api/transactions', json={
+            'amount': amount, 'date': f'{day}T12:00:00', 'type': 'expense',
+            'category_id': cat_id, 'wallet_id': wallet_id, 'title': 'span tx'
+        }, headers={'Cookie': cookies}).get_json()['id']
+
+    # partial January and April on the edges, full February and March from rollups
+    span = 'base_currency=USD&start_date=2025-01-15T00:00:00&end_date=2025-04-10T23:59:59'
+
+    def totals(extra=''):
+        data = client.get(f'/api/statistics?{span}{extra}', headers={'Cookie': cookies}).get_json()
+        return data['total_expenses'], data['expense_count']
+
+    assert totals() == (30.0, 4)
+    assert totals('&search=span') == totals()  # search always reads raw rows
+
+    client.put(f"/api/transactions/{ids['2025-02-14']}", json={'amount': 64}, headers={'Cookie': cookies})
+    client.delete(f"/api/transactions/{ids['2025-03-05']}", headers={'Cookie': cookies})
+    assert totals() == (82.0, 3)
+    assert totals('&search=span') == totals()
+
+    series = client.get(f'/api/statistics/series?interval=month&{span}', headers={'Cookie': cookies}).get_json()
+    assert [b['expense'] for b in series['buckets']] == [2.0, 64.0, 0.0, 16.0]
+
+
+# MARK: test_statistics_by_category_and_wallet
+@patch.dict('api.rates.EXCHANGE_RATES', {'USD': 1.0, 'UAH': 40.0, 'EUR': 0.8}, clear=True)
+@patch('api.rates._RATES_LAST_UPDATED', float('inf'))
+def test_statistics_by_category_and_wallet(client):
+    cookies = register_and_login(client, 'breakdownuser', 'breakdown@a.com', 'pass')
+
+    usd_id = client.post('/api/wallets', json={'name': 'B USD', 'currency': 'USD'},
+                         headers={'Cookie': cookies}).get_json()['id']
+    uah_id = client.post('/api/wallets', json={'name': 'B UAH', 'currency': 'UAH'},
+                         headers={'Cookie': cookies}).get_json()['id']
+    cats = {c['name']: c['id'] for c in client.get('/api/categories', headers={'Cookie': cookies}).get_json()}
+
+    rows = [
+        (usd_id, cats['Food'], 'expense', 20, '2025-03-01T10:00:00'),
+        (uah_id, cats['Food'], 'expense', 400, '2025-03-02T10:00:00'),
+        (usd_id, cats['Transport'], 'expense', 5, '2025-03-03T10:00:00'),
+        (usd_id, cats['Salary'], 'income', 1000, '2025-03-04T10:00:00'),
+        (usd_id, cats['Food'], 'expense', 99, '2025-04-01T10:00:00'),
+    ]
+    for wallet_id, cat_id, t_type, amount, when in rows:
+        client.post('/api/transactions', json={
+            'amount': amount, 'date': when, 'type': t_type,
+            'category_id': cat_id, 'wallet_id': wallet_id, 'title': 'breakdown tx'
+        }, headers={'Cookie': cookies})
+
+    march = 'start_date=2025-03-01T00:00:00&end_date=2025-03-31T23:59:59'
+    data = client.get(f'/api/statistics/by-category?base_currency=USD&type=expense&{march}',
+                      headers={'Cookie': cookies}).get_json()
+    assert data['items'] == [
+        {'category_id': cats['Food'], 'name': 'Food', 'icon': '🍔', 'type': 'expense', 'total': 30.0, 'count': 2},
+        {'category_id': cats['Transport'], 'name': 'Transport', 'icon': '🚗', 'type': 'expense', 'total': 5.0, 'count': 1},
+    ]
+
+    data = client.get(f'/api/statistics/by-wallet?base_currency=USD&{march}',
+                      headers={'Cookie': cookies}).get_json()
+    by_id = {item['wallet_id']: item for item in data['items']}
+    assert by_id[usd_id]['income'] == 1000.0
+    assert by_id[usd_id]['expense'] == 25.0
+    assert by_id[usd_id]['net'] == 975.0
+    assert by_id[uah_id]['expense'] == 10.0
+    assert by_id[uah_id]['count'] == 1
+
 # Створюємо "мок" (імітацію) відповіді, яку повертатиме requests.get
 def create_mock_response(json_data, raise_for_status=None):
     """Створює імітацію об'єкта відповіді requests."""
@@ -427,9 +1132,9 @@ def create_mock_response(json_data, raise_for_status=None):
     return mock_resp
 
 # MARK: test_fetch_rates_happy_path
-@patch('app.requests.get')
-@patch.dict('app.EXCHANGE_RATES', {'USD': 1.0, 'UAH': 40.0, 'EUR': 0.8})
-@patch('app.SUPPORTED_CURRENCIES', ['USD', 'UAH', 'EUR'])
+@patch('api.rates.requests.get')
+@patch.dict('api.rates.EXCHANGE_RATES', {'USD': 1.0, 'UAH': 40.0, 'EUR': 0.8}, clear=True)
+@patch('api.rates.SUPPORTED_CURRENCIES', ['USD', 'UAH', 'EUR'])
 def test_fetch_rates_happy_path(mock_requests_get):
     """Тестує, що функція працює, коли основний URL доступний."""
 
@@ -450,9 +1155,9 @@ def test_fetch_rates_happy_path(mock_requests_get):
 
 
 # MARK: test_fetch_rates_fallback_path
-@patch('app.requests.get')
-@patch.dict('app.EXCHANGE_RATES', {'USD': 1.0, 'UAH': 40.0, 'EUR': 0.8})
-@patch('app.SUPPORTED_CURRENCIES', ['USD', 'UAH', 'EUR'])
+@patch('api.rates.requests.get')
+@patch.dict('api.rates.EXCHANGE_RATES', {'USD': 1.0, 'UAH': 40.0, 'EUR': 0.8}, clear=True)
+@patch('api.rates.SUPPORTED_CURRENCIES', ['USD', 'UAH', 'EUR'])
 def test_fetch_rates_fallback_path(mock_requests_get):
     """Тестує, що функція використовує fallback URL, якщо primary не працює."""
 
@@ -479,7 +1184,7 @@ def test_fetch_rates_fallback_path(mock_requests_get):
 
 
 # MARK: test_fetch_rates_bad_data_shape
-@patch('app.requests.get')
+@patch('api.rates.requests.get')
 def test_fetch_rates_bad_data_shape(mock_requests_get):
     """Тестує, що функція кидає RuntimeError, якщо дані не мають 'usd' ключа."""
 
@@ -491,9 +1196,9 @@ def test_fetch_rates_bad_data_shape(mock_requests_get):
 
 
 # MARK: test_fetch_rates_partial_data
-@patch('app.requests.get')
-@patch.dict('app.EXCHANGE_RATES', {'USD': 1.0, 'UAH': 40.0, 'EUR': 0.8})
-@patch('app.SUPPORTED_CURRENCIES', ['USD', 'UAH', 'EUR'])
+@patch('api.rates.requests.get')
+@patch.dict('api.rates.EXCHANGE_RATES', {'USD': 1.0, 'UAH': 40.0, 'EUR': 0.8}, clear=True)
+@patch('api.rates.SUPPORTED_CURRENCIES', ['USD', 'UAH', 'EUR'])
 def test_fetch_rates_partial_data(mock_requests_get):
     """Тестує, що функція використовує старі дані з EXCHANGE_RATES, якщо API не повернуло валюту."""
 
@@ -509,7 +1214,7 @@ def test_fetch_rates_partial_data(mock_requests_get):
 
 
 # MARK: test_convert_amount_logic
-@patch.dict('app.EXCHANGE_RATES', {'USD': 1.0, 'UAH': 40.0, 'EUR': 0.8})
+@patch.dict('api.rates.EXCHANGE_RATES', {'USD': 1.0, 'UAH': 40.0, 'EUR': 0.8}, clear=True)
 def test_convert_amount_logic():
     """Тестує логіку конвертації валют, використовуючи @patch.dict."""
     
@@ -533,6 +1238,176 @@ def test_convert_amount_logic():
     assert convert_amount(100.0, 'uah', 'usd') == pytest.approx(2.5)
 
 
+# MARK: test_rates_stale_while_revalidate_single_flight
+@patch('api.rates.EXCHANGE_RATES', {'USD': 1.0, 'UAH': 40.0})
+@patch('api.rates._RATES_LAST_UPDATED', 0.0)
+@patch('api.rates._RATES_LAST_ATTEMPT', 0.0)
+def test_rates_stale_while_revalidate_single_flight():
+    """Expired rates are served immediately; concurrent callers trigger one fetch."""
+    release = threading.Event()
+    calls = []
+
+    def slow_source():
+        calls.append(1)
+        release.wait(5)
+        return {'USD': 1.0, 'UAH': 41.0}
+
+    with patch('api.rates._RATES_SOURCE', slow_source):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(rates._ensure_rates_uptodate()))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+
+        # nobody waited for the slow upstream
+        assert len(results) == 8
+        assert all(source == 'stale' and r['UAH'] == 40.0 for r, source, _ in results)
+
+        release.set()
+        deadline = time.time() + 5
+        while rates._refresh_lock.locked() and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert len(calls) == 1
+        current, source, _ = rates._ensure_rates_uptodate()
+        assert source == 'cache'
+        assert current['UAH'] == 41.0
+
+
+# MARK: test_rates_file_source
+def test_rates_file_source(tmp_path, client, monkeypatch):
+    # Every piece of rates state this test touches is restored afterwards
+    monkeypatch.setattr(rates, 'EXCHANGE_RATES', {'USD': 1.0, 'UAH': 40.0, 'EUR': 0.8})
+    monkeypatch.setattr(rates, 'SUPPORTED_CURRENCIES', list(rates.SUPPORTED_CURRENCIES))
+    monkeypatch.setattr(rates, '_RATES_LAST_UPDATED', 0.0)
+    monkeypatch.setattr(rates, '_RATES_LAST_ATTEMPT', 0.0)
+    monkeypatch.setattr(rates, '_RATES_SOURCE', None)
+    monkeypatch.setattr(rates, '_RATES_TTL_SECONDS', rates._RATES_TTL_SECONDS)
+    refreshed = []
+    monkeypatch.setattr(rates, '_RATES_ON_REFRESH', refreshed.append)
+
+    path = tmp_path / 'rates.json'
+    path.write_text(json.dumps({'date': '2025-10-26', 'usd': {'uah': 43.0}}))
+    rates.configure_rates(source=str(path))  # on_refresh is left as it was
+
+    rv = client.get('/api/rates?refresh=true')
+    data = rv.get_json()
+    assert data['source'] == 'live'
+    assert data['rates'] == {'USD': 1.0, 'UAH': 43.0, 'EUR': 0.8}
+    assert refreshed == [data['rates']]
+
+    rv = client.get('/api/rates')
+    assert rv.get_json()['source'] == 'cache'
+
+
+# MARK: test_batch_conversion_matches_convert_amount
+@patch.dict('api.rates.EXCHANGE_RATES', {'USD': 1.0, 'UAH': 40.0, 'EUR': 0.8}, clear=True)
+@patch('api.rates._RATES_LAST_UPDATED', float('inf'))
+def test_batch_conversion_matches_convert_amount():
+    amounts = [100.0, 10.0, 50.0, None, 100.0, 7.0]
+    currencies = ['UAH', 'usd', 'EUR', 'USD', 'PLN', None]
+
+    batch = convert_amounts(amounts, currencies, 'uah')
+    single = [convert_amount(a, c, 'UAH') for a, c in zip(amounts, currencies)]
+    assert batch == pytest.approx(single)
+
+    factors = conversion_factors(['UAH', 'eur', 'USD'], 'usd')
+    assert factors['UAH'] == pytest.approx(1 / 40.0)
+    assert factors['eur'] == pytest.approx(1 / 0.8)
+    assert factors['USD'] == 1.0
+
+# MARK: test_rate_history_lookup
+def test_rate_history_lookup():
+    history = rates.RateHistory([
+        (date(2025, 1, 1), 'UAH', 40.0),
+        (date(2025, 2, 1), 'UAH', 42.0),
+        (date(2025, 1, 1), 'EUR', 0.9),
+    ])
+    assert history.rate_on('uah', date(2024, 12, 1)) == 40.0
+    assert history.rate_on('UAH', date(2025, 1, 31)) == 40.0
+    assert history.rate_on('UAH', date(2025, 2, 1)) == 42.0
+    assert history.rate_on('UAH', date(2026, 1, 1)) == 42.0
+    assert history.rate_on('PLN', date(2025, 1, 1)) is None
+    # Missing currency falls back to the current table
+    assert history.factor('PLN', 'USD', date(2025, 1, 1), {'PLN': 4.0, 'USD': 1.0}) == pytest.approx(0.25)
+
+
+# MARK: test_statistics_use_rate_of_transaction_date
+@patch.dict('api.rates.EXCHANGE_RATES', {'USD': 1.0, 'UAH': 50.0}, clear=True)
+@patch('api.rates._RATES_LAST_UPDATED', float('inf'))
+def test_statistics_use_rate_of_transaction_date(client, app):
+    cookies = register_and_login(client, 'ratehistuser', 'ratehist@a.com', 'pass')
+    uah_id = client.post('/api/wallets', json={'name': 'UAH H', 'currency': 'UAH'},
+                         headers={'Cookie': cookies}).get_json()['id']
+    cat_id = client.get('/api/categories', headers={'Cookie': cookies}).get_json()[0]['id']
+    for day in ('2025-01-15', '2025-02-15'):
+        client.post('/api/transactions', json={
+            'amount': 400, 'date': f'{day}T12:00:00', 'type': 'income',
+            'category_id': cat_id, 'wallet_id': uah_id, 'title': 'hist tx'
+        }, headers={'Cookie': cookies})
+
+    try:
+        count = rates.load_exchange_rates([
+            ('2025-01-01', 'UAH', 40.0),
+            ('2025-02-01', 'UAH', 80.0),
+            ('2025-02-01', 'uah', 100.0),  # same key -> upsert
+        ])
+        assert count == 3
+        assert ExchangeRate.query.filter_by(currency='UAH').count() == 2
+
+        # 400 / 40 + 400 / 100
+        data = client.get('/api/statistics?base_currency=USD', headers={'Cookie': cookies}).get_json()
+        assert data['total_incomes'] == pytest.approx(14.0)
+
+        series = client.get('/api/statistics/series?interval=month&base_currency=USD&start_date=2025-01-01'
+                            '&end_date=2025-02-28', headers={'Cookie': cookies}).get_json()
+        assert [b['income'] for b in series['buckets']] == pytest.approx([10.0, 4.0])
+
+        items = client.get('/api/statistics/by-wallet?base_currency=USD', headers={'Cookie': cookies}).get_json()['items']
+        assert items[[i['wallet_id'] for i in items].index(uah_id)]['income'] == pytest.approx(14.0)
+    finally:
+        ExchangeRate.query.delete()
+        db.session.commit()
+        rates._invalidate_rate_history()
+
+
+# MARK: test_statistics_rate_change_mid_month
+@patch.dict('api.rates.EXCHANGE_RATES', {'USD': 1.0, 'UAH': 50.0}, clear=True)
+@patch('api.rates._RATES_LAST_UPDATED', float('inf'))
+def test_statistics_rate_change_mid_month(client, app):
+    cookies = register_and_login(client, 'midmonthuser', 'midmonth@a.com', 'pass')
+    uah_id = client.post('/api/wallets', json={'name': 'UAH M', 'currency': 'UAH'},
+                         headers={'Cookie': cookies}).get_json()['id']
+    cat_id = client.get('/api/categories', headers={'Cookie': cookies}).get_json()[0]['id']
+    for day in ('2025-01-20', '2025-03-10'):
+        client.post('/api/transactions', json={
+            'amount': 400, 'date': f'{day}T12:00:00', 'type': 'income',
+            'category_id': cat_id, 'wallet_id': uah_id, 'title': 'mid tx'
+        }, headers={'Cookie': cookies})
+
+    try:
+        rates.load_exchange_rates([
+            ('2025-01-01', 'UAH', 40.0),
+            ('2025-01-20', 'UAH', 80.0),  # mid-month: January cannot use one rate per rollup month
+            ('2025-03-01', 'UAH', 100.0),
+        ])
+        assert rates.get_rate_history().changing_months == [date(2025, 1, 1)]
+
+        def incomes(span=''):
+            return client.get(f'/api/statistics?base_currency=USD{span}', headers={'Cookie': cookies}).get_json()['total_incomes']
+
+        # 400 / 80 + 400 / 100, whether January is a full month or a partial edge month
+        assert incomes() == pytest.approx(9.0)
+        assert incomes('&start_date=2024-12-01T00:00:00') == pytest.approx(9.0)
+        assert incomes('&start_date=2025-01-02T00:00:00') == pytest.approx(9.0)
+    finally:
+        ExchangeRate.query.delete()
+        db.session.commit()
+        rates._invalidate_rate_history()
+
+
     # MARK: test_protected_endpoint
 def test_protected_endpoint(client, app):
     """Тестує /api/protected, вкл. випадок з видаленим юзером."""
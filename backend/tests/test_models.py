@@ -1,7 +1,11 @@
 import datetime
 import pytest
+from sqlalchemy import tuple_
 from models import User, Wallet, Transaction, Category, db
 from app import create_default_categories_for_user, create_default_wallets_for_user
+from models import rebuild_wallet_balances, verify_wallet_balances, upgrade_schema
+from models import MonthlyRollup, rebuild_monthly_rollups, serialize_transactions
+from read_models import serialize_transaction_rows, transaction_rows, wallet_dict, wallet_rows
 
 
 # MARK: test_wallet_balance_and_to_dict
@@ -161,3 +165,249 @@ def test_cascade_delete_user_removes_children(app):
         assert db.session.get(Wallet, w_id) is None
         assert db.session.get(Category, c_id) is None
         assert db.session.get(Transaction, t_id) is None
+
+
+# MARK: test_wallet_balance_maintained_on_update_and_delete
+def test_wallet_balance_maintained_on_update_and_delete(app):
+    with app.app_context():
+        u = User(username='u_ledger', email='u_ledger@example.com', password='pw')
+        db.session.add(u)
+        db.session.commit()
+
+        w1 = Wallet(name='L1', currency='USD', user_id=u.id)
+        w2 = Wallet(name='L2', currency='USD', user_id=u.id)
+        c = Category(name='LC', type='both', user_id=u.id)
+        db.session.add_all([w1, w2, c])
+        db.session.commit()
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        t1 = Transaction(amount=100.0, date=now, type='income', user_id=u.id, category_id=c.id, wallet_id=w1.id)
+        t2 = Transaction(amount=30.0, date=now, type='expense', user_id=u.id, category_id=c.id, wallet_id=w1.id)
+        db.session.add_all([t1, t2])
+        db.session.commit()
+        assert w1.get_balance() == pytest.approx(70.0)
+
+        # change amount and type
+        t2.amount = 40.0
+        t2.type = 'income'
+        db.session.commit()
+        assert w1.get_balance() == pytest.approx(140.0)
+
+        # move to another wallet
+        t1.wallet_id = w2.id
+        db.session.commit()
+        assert w1.get_balance() == pytest.approx(40.0)
+        assert w2.get_balance() == pytest.approx(100.0)
+
+        db.session.delete(t2)
+        db.session.commit()
+        assert w1.get_balance() == pytest.approx(0.0)
+        assert verify_wallet_balances() == []
+
+
+# MARK: test_rebuild_and_verify_wallet_balances
+def test_rebuild_and_verify_wallet_balances(app):
+    with app.app_context():
+        u = User(username='u_rebuild', email='u_rebuild@example.com', password='pw')
+        db.session.add(u)
+        db.session.commit()
+
+        w = Wallet(name='R1', currency='USD', user_id=u.id)
+        c = Category(name='RC', type='both', user_id=u.id)
+        db.session.add_all([w, c])
+        db.session.commit()
+
+        t = Transaction(amount=55.5, date=datetime.datetime.now(datetime.timezone.utc), type='income', user_id=u.id, category_id=c.id, wallet_id=w.id)
+        db.session.add(t)
+        db.session.commit()
+
+        # corrupt stored balance
+        w.balance = 1.0
+        db.session.commit()
+        assert any(m[0] == w.id for m in verify_wallet_balances())
+
+        rebuild_wallet_balances([w.id])
+        assert w.get_balance() == pytest.approx(55.5)
+        assert not any(m[0] == w.id for m in verify_wallet_balances())
+
+
+def rollup_state(user_id):
+    rows = MonthlyRollup.query.filter_by(user_id=user_id).filter(MonthlyRollup.count > 0)
+    return {(r.month, r.wallet_id, r.category_id, r.type): (round(r.total, 2), r.count) for r in rows}
+
+
+# MARK: test_monthly_rollups_follow_writes
+def test_monthly_rollups_follow_writes(app):
+    with app.app_context():
+        u = User(username='u_rollup', email='u_rollup@example.com', password='pw')
+        db.session.add(u)
+        db.session.commit()
+
+        w = Wallet(name='RW', currency='USD', user_id=u.id)
+        c1 = Category(name='R1', type='both', user_id=u.id)
+        c2 = Category(name='R2', type='both', user_id=u.id)
+        db.session.add_all([w, c1, c2])
+        db.session.commit()
+
+        jan, feb = datetime.datetime(2025, 1, 15), datetime.datetime(2025, 2, 3)
+        t1 = Transaction(amount=10, date=jan, type='expense', user_id=u.id, category_id=c1.id, wallet_id=w.id)
+        t2 = Transaction(amount=5, date=jan, type='expense', user_id=u.id, category_id=c1.id, wallet_id=w.id)
+        t3 = Transaction(amount=7, date=feb, type='income', user_id=u.id, category_id=c2.id, wallet_id=w.id)
+        db.session.add_all([t1, t2, t3])
+        db.session.commit()
+
+        jan_key = (datetime.date(2025, 1, 1), w.id, c1.id, 'expense')
+        assert rollup_state(u.id)[jan_key] == (15.0, 2)
+
+        # move to another month and category, change amount and type
+        t2.date = feb
+        t2.category_id = c2.id
+        t2.amount = 8
+        t2.type = 'income'
+        db.session.delete(t1)
+        db.session.commit()
+
+        state = rollup_state(u.id)
+        assert jan_key not in state
+        assert state[(datetime.date(2025, 2, 1), w.id, c2.id, 'income')] == (15.0, 2)
+
+        incremental = rollup_state(u.id)
+        rebuild_monthly_rollups([u.id])
+        assert rollup_state(u.id) == incremental
+
+
+# MARK: test_read_models_match_to_dict
+def test_read_models_match_to_dict(app):
+    with app.app_context():
+        u = User(username='u_readmodel', email='u_readmodel@example.com', password='pw')
+        db.session.add(u)
+        db.session.commit()
+        create_default_categories_for_user(u.id)
+        create_default_wallets_for_user(u.id)
+        wallets = Wallet.query.filter_by(user_id=u.id).all()
+        categories = Category.query.filter_by(user_id=u.id).all()
+        for i in range(6):
+            db.session.add(Transaction(
+                amount=i + 0.5, date=datetime.datetime(2025, 1, i + 1), type='expense' if i % 2 else 'income',
+                title=f'rm {i}', user_id=u.id, category_id=categories[i % 3].id, wallet_id=wallets[i % len(wallets)].id))
+        db.session.commit()
+
+        query = Transaction.query.filter_by(user_id=u.id).order_by(Transaction.date.desc(), Transaction.id.desc())
+        rows = transaction_rows(query).all()
+        for compact in (False, True):
+            assert serialize_transaction_rows(rows, u.id, compact=compact) == \
+                serialize_transactions(query.all(), compact=compact)
+        assert [wallet_dict(row) for row in wallet_rows(u.id)] == [w.to_dict() for w in wallets]
+
+
+# MARK: test_sqlite_pragmas_and_engine_options
+def test_sqlite_pragmas_and_engine_options(app, tmp_path):
+    from sqlalchemy import create_engine
+    from database import engine_options
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'pragmas.db'}")
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+        assert conn.exec_driver_sql('PRAGMA synchronous').scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql('PRAGMA busy_timeout').scalar() == app.config['SQLITE_PRAGMAS']['busy_timeout']
+    engine.dispose()
+
+    assert engine_options({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'}) == {}
+    server = engine_options({'SQLALCHEMY_DATABASE_URI': 'postgresql://u@db/budget', 'DB_POOL_SIZE': 20})
+    assert server['pool_size'] == 20 and server['pool_pre_ping'] is True
+    assert 'pool_pre_ping' not in engine_options({'SQLALCHEMY_DATABASE_URI': 'sqlite:///budget.db'})
+
+
+# MARK: test_seed_database_is_deterministic
+def test_seed_database_is_deterministic(app):
+    from seed import seed_database
+    with app.app_context():
+        first = seed_database(users=2, transactions=300, seed=7, batch_size=120, prefix='seed_a')
+        second = seed_database(users=2, transactions=300, seed=7, batch_size=120, prefix='seed_b')
+
+        def ledger(user_id):
+            rows = db.session.query(Transaction.date, Transaction.amount, Transaction.type, Transaction.title).filter(
+                Transaction.user_id == user_id).order_by(Transaction.id)
+            return [tuple(row) for row in rows]
+
+        assert len(ledger(first[0])) == 300
+        assert [ledger(u) for u in first] == [ledger(u) for u in second]
+        assert verify_wallet_balances() == []
+        incremental = rollup_state(first[1])
+        rebuild_monthly_rollups([first[1]])
+        assert rollup_state(first[1]) == incremental
+
+        # An interrupted run leaves whole batches with matching balances and rollups
+        def interrupt(inserted, total):
+            if inserted >= 120:
+                raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            seed_database(users=1, transactions=300, seed=7, batch_size=120, prefix='seed_c', progress=interrupt)
+        db.session.rollback()
+        user_id = User.query.filter_by(username='seed_c0').one().id
+        assert len(ledger(user_id)) == 120
+        assert verify_wallet_balances() == []
+        incremental = rollup_state(user_id)
+        rebuild_monthly_rollups([user_id])
+        assert rollup_state(user_id) == incremental
+
+
+# MARK: test_upgrade_schema_backfills_modified_at
+def test_upgrade_schema_backfills_modified_at(app):
+    from sqlalchemy import text
+    with app.app_context():
+        u = User(username='upgraded', email='upgraded@example.com', password='pw')
+        db.session.add(u)
+        db.session.commit()
+        create_default_categories_for_user(u.id)
+        create_default_wallets_for_user(u.id)
+        # As left by ALTER TABLE ... ADD COLUMN on a database from before modified_at
+        db.session.execute(text('UPDATE wallet SET modified_at = NULL WHERE user_id = :u'), {'u': u.id})
+        db.session.execute(text('UPDATE category SET modified_at = NULL WHERE user_id = :u'), {'u': u.id})
+        db.session.commit()
+
+        before = datetime.datetime.utcnow()
+        upgrade_schema()
+        db.session.expire_all()
+        stamps = [w.modified_at for w in Wallet.query.filter_by(user_id=u.id)]
+        stamps += [c.modified_at for c in Category.query.filter_by(user_id=u.id)]
+        assert stamps and all(stamp is not None and stamp >= before for stamp in stamps)
+
+
+def explain_query_plan(query):
+    """Return SQLite EXPLAIN QUERY PLAN detail lines for an ORM query."""
+    compiled = query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'render_postcompile': True})
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    with db.engine.connect() as conn:
+        return [row[3] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), params)]
+
+
+# MARK: test_hot_queries_use_indexes
+def test_hot_queries_use_indexes(app):
+    """Fails if one of the hot query shapes falls back to a full table scan."""
+    with app.app_context():
+        when = datetime.datetime(2025, 1, 1)
+        newest_first = (Transaction.date.desc(), Transaction.modified_at.desc(), Transaction.id.desc())
+        hot_queries = {
+            'list': Transaction.query.filter_by(user_id=1).order_by(*newest_first),
+            'date range': Transaction.query.filter_by(user_id=1).filter(
+                Transaction.date >= when, Transaction.date <= when).order_by(*newest_first),
+            'keyset page': Transaction.query.filter_by(user_id=1).filter(
+                tuple_(Transaction.date, Transaction.modified_at, Transaction.id) < tuple_(when, when, 10)
+            ).order_by(*newest_first).limit(100),
+            'by wallet': Transaction.query.filter_by(user_id=1).filter(Transaction.wallet_id.in_([1, 2])),
+            'wallet has transactions': Transaction.query.filter_by(wallet_id=1),
+            'category delete': Transaction.query.filter_by(category_id=1),
+            'statement dedup': Transaction.query.filter_by(wallet_id=1).filter(
+                Transaction.date >= when, Transaction.date <= when),
+            'sync delta': Transaction.query.filter_by(user_id=1).filter(Transaction.modified_at >= when),
+            'category by name': Category.query.filter_by(user_id=1, name='Adjust Balance'),
+            'wallets': Wallet.query.filter_by(user_id=1),
+            'monthly rollups': MonthlyRollup.query.filter_by(user_id=1).filter(
+                MonthlyRollup.month >= when.date(), MonthlyRollup.month < when.date()),
+        }
+        for name, query in hot_queries.items():
+            plan = explain_query_plan(query)
+            assert not any(line.startswith('SCAN') for line in plan), f'{name}: {plan}'
+            assert not any('TEMP B-TREE' in line for line in plan), f'{name}: {plan}'
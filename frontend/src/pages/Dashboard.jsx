@@ -25,8 +25,10 @@ function Dashboard({ user }) {
 
   const [statistics, setStatistics] = useState({ total_expenses: 0, total_incomes: 0, balance: 0 });
   const [recentTransactions, setRecentTransactions] = useState([]);
-  const [allTransactions, setAllTransactions] = useState([]); // for calculation
+  const [monthlyByCategory, setMonthlyByCategory] = useState([]);
   const [wallets, setWallets] = useState([]);
+  const [monthlyStatistics, setMonthlyStatistics] = useState({ total_expenses: 0, total_incomes: 0, expense_count: 0, income_count: 0 });
+  const [series, setSeries] = useState(null);
 
   
   const [isLoading, setIsLoading] = useState(false);
@@ -37,53 +39,16 @@ function Dashboard({ user }) {
   console.log('🎨 Dashboard render, user:', user);
 
 
-  // Expenses by category for the current month (from 1st day)
-  const nowDate = new Date();
-  const firstDayOfMonth = new Date(nowDate.getFullYear(), nowDate.getMonth(), 1);
-
-  // Expenses by category (current month)
-  const currentMonthExpenses = allTransactions.filter(t => {
-    if (t.type !== 'expense') return false;
-    const date = new Date(t.date);
-    return date >= firstDayOfMonth && date <= nowDate;
-  });
-  const expenseByCategory = {};
-  currentMonthExpenses.forEach(t => {
-    const catId = t.category?.id || t.category_id || 'uncat';
-    if (!expenseByCategory[catId]) {
-      expenseByCategory[catId] = {
-        name: t.category?.name || 'No category',
-        icon: t.category?.icon || '',
-        amount: 0,
-      };
-    }
-    const fromCur = t.wallet?.currency || 'USD';
-    expenseByCategory[catId].amount += convert(t.amount, fromCur, baseCurrency);
-  });
-  const chartLabels = Object.values(expenseByCategory).map(cat => `${cat.icon ? cat.icon + ' ' : ''}${cat.name}`);
-  const chartData = Object.values(expenseByCategory).map(cat => cat.amount);
-
-  // Incomes by category (current month)
-  const currentMonthIncomes = allTransactions.filter(t => {
-    if (t.type !== 'income') return false;
-    const date = new Date(t.date);
-    return date >= firstDayOfMonth && date <= nowDate;
-  });
-  const incomeByCategory = {};
-  currentMonthIncomes.forEach(t => {
-    const catId = t.category?.id || t.category_id || 'uncat';
-    if (!incomeByCategory[catId]) {
-      incomeByCategory[catId] = {
-        name: t.category?.name || 'No category',
-        icon: t.category?.icon || '',
-        amount: 0,
-      };
-    }
-    const fromCur = t.wallet?.currency || 'USD';
-    incomeByCategory[catId].amount += convert(t.amount, fromCur, baseCurrency);
-  });
-  const incomeChartLabels = Object.values(incomeByCategory).map(cat => `${cat.icon ? cat.icon + ' ' : ''}${cat.name}`);
-  const incomeChartData = Object.values(incomeByCategory).map(cat => cat.amount);
+  // Expenses/incomes by category for the current month (grouped on the server)
+  const toPie = (type) => {
+    const items = monthlyByCategory.filter(item => item.type === type);
+    return {
+      labels: items.map(cat => `${cat.icon ? cat.icon + ' ' : ''}${cat.name || 'No category'}`),
+      data: items.map(cat => cat.total),
+    };
+  };
+  const { labels: chartLabels, data: chartData } = toPie('expense');
+  const { labels: incomeChartLabels, data: incomeChartData } = toPie('income');
 
   // Colors for the chart (random or fixed)
   const chartColors = [
@@ -92,68 +57,36 @@ function Dashboard({ user }) {
   ];
 
 
-  // MARK: Net worth over time (daily cumulative)
-  const computeNetWorthSeries = (transactions) => {
-    if (!transactions || transactions.length === 0) return { labels: [], data: [] };
-
-    // Normalize and sort transactions by date asc
-    const tx = transactions
-      .map(t => ({ ...t, date: new Date(t.date) }))
-      .sort((a, b) => a.date - b.date);
-
-    const start = new Date(tx[0].date);
-    start.setHours(0, 0, 0, 0); // only date part
-
-    // Find the latest transaction date and today, use the max of both
-    const lastTxDate = new Date(tx[tx.length - 1].date);
-    lastTxDate.setHours(0, 0, 0, 0);
-    const today = new Date();
-    today.setHours(0, 0, 0, 0);
-    const lastDate = lastTxDate > today ? lastTxDate : today;
-
-    // Helper to get yyyy-mm-dd key
-    const dayKey = (d) => d.toISOString().slice(0, 10);
-
-    // Aggregate sums per day
-    const sumsByDay = {};
-    tx.forEach(t => {
-      // Normalize date to 00:00:00 for correct grouping
-      const date = new Date(t.date);
-      date.setHours(0, 0, 0, 0);
-      const key = dayKey(date);
-      const sign = t.type === 'expense' ? -1 : 1;
-      const fromCur = t.wallet?.currency || 'USD';
-      const amt = convert(Number(t.amount) || 0, fromCur, baseCurrency);
-      sumsByDay[key] = (sumsByDay[key] || 0) + sign * amt;
-    });
-
-    // Build daily series from start to lastDate (which is max of lastTxDate and today)
-    const labels = [];
-    const data = [];
-    let current = 0;
-    for (let d = new Date(start); d.getTime() <= lastDate.getTime();) {
-      const key = dayKey(d);
-      current += sumsByDay[key] || 0;
-      // push a copy of date string for label
-      const label = d.toLocaleDateString('uk-UA');
-      labels.push(label);
-      data.push(Number(current.toFixed(2)));
-      // increment date by 1 day (without mutating d)
-      d = new Date(d.getTime() + 24 * 60 * 60 * 1000);
-    }
-
-    return { labels, data };
+  // MARK: Net worth over time (daily cumulative, aggregated on the server)
+  const netWorthBuckets = series?.buckets || [];
+  const netWorthSeries = {
+    labels: netWorthBuckets.map(b => new Date(`${b.period}T00:00:00`).toLocaleDateString('uk-UA')),
+    data: netWorthBuckets.map(b => b.net_worth),
   };
 
-  const netWorthSeries = computeNetWorthSeries(allTransactions);
-
 
   // MARK: loadStatistics
   const loadStatistics = useCallback(async () => {
     try {
-      const { response, data } = await api.statistics.get({ base_currency: baseCurrency });
-      if (response.ok) {
-        setStatistics(data);
+      const today = new Date();
+      const monthStart = `${today.getFullYear()}-${String(today.getMonth() + 1).padStart(2, '0')}-01T00:00:00`;
+      const [allTime, month, netWorth, monthByCategory] = await Promise.all([
+        api.statistics.get({ base_currency: baseCurrency }),
+        api.statistics.get({ base_currency: baseCurrency, start_date: monthStart }),
+        api.statistics.series({ base_currency: baseCurrency, interval: 'day' }),
+        api.statistics.byCategory({ base_currency: baseCurrency, start_date: monthStart }),
+      ]);
+      if (allTime.response.ok) {
+        setStatistics(allTime.data);
+      }
+      if (month.response.ok) {
+        setMonthlyStatistics(month.data);
+      }
+      if (netWorth.response.ok) {
+        setSeries(netWorth.data);
+      }
+      if (monthByCategory.response.ok) {
+        setMonthlyByCategory(monthByCategory.data.items || []);
       }
     } catch (err) {
       console.error('Error loading statistics:', err);
@@ -164,10 +97,9 @@ function Dashboard({ user }) {
   // MARK: loadRecentTransactions
   const loadRecentTransactions = useCallback(async () => {
     try {
-      const { response, data } = await api.transactions.getAll();
+      const { response, data } = await api.transactions.getPage({}, null, 5);
       if (response.ok) {
-        setRecentTransactions((data || []).slice(0, 5));
-        setAllTransactions(data || []);
+        setRecentTransactions(data.transactions || []);
       }
     } catch (err) {
       console.error('Error loading transactions:', err);
@@ -214,30 +146,11 @@ function Dashboard({ user }) {
     format(amount, currencyCode);
 
 
-  // MARK: get current month/year
-  const now = new Date();
-  const currentMonth = now.getMonth();
-  const currentYear = now.getFullYear();
-
-  // MARK: filter transactions for current month
-  const monthlyTransactions = allTransactions.filter(t => {
-    const date = new Date(t.date);
-    return date.getMonth() === currentMonth && date.getFullYear() === currentYear;
-  });
-
-  // Counting the number of transactions for the month
-  // const totalCount = monthlyTransactions.length;
-  const incomeCount = monthlyTransactions.filter(t => t.type === 'income').length;
-  const expenseCount = monthlyTransactions.filter(t => t.type === 'expense').length;
-
-  // Calculating the sum of incomes/expenses for the month
-  const monthlyExpenses = monthlyTransactions
-    .filter(t => t.type === 'expense')
-    .reduce((sum, t) => sum + convert(t.amount, t.wallet?.currency || 'USD', baseCurrency), 0);
-
-  const monthlyIncomes = monthlyTransactions
-    .filter(t => t.type === 'income')
-    .reduce((sum, t) => sum + convert(t.amount, t.wallet?.currency || 'USD', baseCurrency), 0);
+  // MARK: current month totals
+  const incomeCount = monthlyStatistics.income_count || 0;
+  const expenseCount = monthlyStatistics.expense_count || 0;
+  const monthlyExpenses = monthlyStatistics.total_expenses || 0;
+  const monthlyIncomes = monthlyStatistics.total_incomes || 0;
 
 
   // MARK: RecentTransactions component
@@ -353,7 +266,7 @@ function Dashboard({ user }) {
               <Heading size="7" align="center" color={statistics.balance >= 0 ? 'jade' : 'tomato'}>
                 {formatAmount(statistics.balance, baseCurrency)}
               </Heading>
-              <Text align="center" color="gray" size="2">{allTransactions.length} transactions</Text>
+              <Text align="center" color="gray" size="2">{(statistics.expense_count || 0) + (statistics.income_count || 0)} transactions</Text>
             </Flex>
           </Card>
 
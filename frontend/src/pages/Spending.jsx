@@ -23,66 +23,23 @@ const CHART_COLORS = [
 ];
 
 
-// MARK: filterTransactions
-const filterTransactions = (transactions, filters) => {
-  return transactions.filter(t => {
-    // Types
-    if (filters.type && filters.type.length && !filters.type.includes(t.type)) return false;
-
-    // Categories (handle nested or id fields)
-    if (filters.category_id && filters.category_id.length) {
-      const catId = String(t.category?.id ?? t.category_id ?? '');
-      if (!filters.category_id.includes(catId)) return false;
-    }
-
-    // Wallets
-    if (filters.wallet_id && filters.wallet_id.length) {
-      const walId = String(t.wallet?.id ?? t.wallet_id ?? '');
-      if (!filters.wallet_id.includes(walId)) return false;
-    }
-
-    // Dates (t.date expected ISO or YYYY-MM-DD)
-    if (filters.start_date) {
-      const d = new Date(t.date);
-      const s = new Date(filters.start_date);
-      s.setHours(0, 0, 0, 0);
-      if (d < s) return false;
-    }
-    if (filters.end_date) {
-      const d = new Date(t.date);
-      const e = new Date(filters.end_date);
-      e.setHours(23, 59, 59, 999);
-      if (d > e) return false;
-    }
-    return true;
-  });
-};
-
-
-// MARK: computeTotals
-const computeTotals = (filtered, convert, baseCurrency) => {
-  let expenses = 0;
-  let incomes = 0;
-  let expenseCount = 0;
-  let incomeCount = 0;
-  for (const t of filtered) {
-    const fromCur = t.wallet?.currency || 'USD';
-    const amt = convert(Number(t.amount) || 0, fromCur, baseCurrency);
-    if (t.type === 'expense') {
-      expenses += amt;
-      expenseCount += 1;
-    } else if (t.type === 'income') {
-      incomes += amt;
-      incomeCount += 1;
-    }
-  }
+// MARK: toServerFilters
+// Page filters (YYYY-MM-DD dates) -> statistics endpoint params
+const toServerFilters = (filters) => ({
+  type: filters.type,
+  category_id: filters.category_id,
+  wallet_id: filters.wallet_id,
+  start_date: filters.start_date ? `${filters.start_date}T00:00:00` : '',
+  end_date: filters.end_date ? `${filters.end_date}T23:59:59` : '',
+});
+
+
+// MARK: toNetWorthSeries
+const toNetWorthSeries = (series) => {
+  const buckets = series?.buckets || [];
   return {
-    expenses: Number(expenses.toFixed(2)),
-    incomes: Number(incomes.toFixed(2)),
-    balance: Number((incomes - expenses).toFixed(2)),
-    expenseCount,
-    incomeCount,
-    totalCount: filtered.length,
+    labels: buckets.map(b => new Date(`${b.period}T00:00:00`).toLocaleDateString('uk-UA')),
+    data: buckets.map(b => b.net_worth),
   };
 };
 
@@ -90,9 +47,11 @@ const computeTotals = (filtered, convert, baseCurrency) => {
 // MARK: Spending
 function Spending() {
   // MARK: state
-  const [transactions, setTransactions] = useState([]);
   const [categories, setCategories] = useState([]);
   const [wallets, setWallets] = useState([]);
+  const [statistics, setStatistics] = useState(null);
+  const [series, setSeries] = useState(null);
+  const [byCategory, setByCategory] = useState([]);
   const [loading, setLoading] = useState(false);
 
   // MARK: filters (use single filters object for TransactionFilters)
@@ -104,18 +63,16 @@ function Spending() {
     end_date: '',
   });
 
-  const { baseCurrency, convert, format } = useCurrency();
+  const { baseCurrency, format } = useCurrency();
 
 
   // MARK: loadData (combined loading function)
   const loadData = useCallback(async () => {
     try {
-      const [txRes, catRes, walRes] = await Promise.all([
-        api.transactions.getAll(),
+      const [catRes, walRes] = await Promise.all([
         api.categories.getAll(),
         api.wallets.getAll(),
       ]);
-      if (txRes.response.ok) setTransactions(txRes.data || []);
       if (catRes.response.ok) setCategories(catRes.data || []);
       if (walRes.response.ok) setWallets(walRes.data || []);
     } catch (err) {
@@ -124,93 +81,72 @@ function Spending() {
   }, []);
 
 
+  // MARK: loadStatistics (totals, net worth and category sums are aggregated on the server)
+  const loadStatistics = useCallback(async () => {
+    try {
+      const query = { ...toServerFilters(filters), base_currency: baseCurrency };
+      const [statsRes, seriesRes, categoryRes] = await Promise.all([
+        api.statistics.get(query),
+        api.statistics.series({ ...query, interval: 'day' }),
+        api.statistics.byCategory(query),
+      ]);
+      if (statsRes.response.ok) setStatistics(statsRes.data);
+      if (seriesRes.response.ok) setSeries(seriesRes.data);
+      if (categoryRes.response.ok) setByCategory(categoryRes.data.items || []);
+    } catch (err) {
+      console.error('Error loading statistics:', err);
+    }
+  }, [filters, baseCurrency]);
+
+
   // MARK: useEffect
+  useEffect(() => {
+    loadData();
+  }, [loadData]);
+
   useEffect(() => {
     const run = async () => {
       setLoading(true);
       try {
-        await loadData();
+        await loadStatistics();
       } finally {
         setLoading(false);
       }
     };
     run();
-  }, [loadData]);
-
-
-  // MARK: filtered
-  const filtered = useMemo(() => filterTransactions(transactions || [], filters), [transactions, filters]);
+  }, [loadStatistics]);
 
 
   // MARK: totals
-  const totals = useMemo(() => computeTotals(filtered, convert, baseCurrency), [filtered, convert, baseCurrency]);
+  const totals = useMemo(() => {
+    const expenseCount = statistics?.expense_count || 0;
+    const incomeCount = statistics?.income_count || 0;
+    return {
+      expenses: statistics?.total_expenses || 0,
+      incomes: statistics?.total_incomes || 0,
+      balance: statistics?.balance || 0,
+      expenseCount,
+      incomeCount,
+      totalCount: expenseCount + incomeCount,
+    };
+  }, [statistics]);
 
 
   // MARK: buildCategoryPie
   const buildCategoryPie = useCallback((type) => {
-    const items = filtered.filter(t => t.type === type);
-    const map = {};
-    for (const t of items) {
-      const id = String(t.category?.id ?? t.category_id ?? 'uncat');
-      const name = t.category?.name || 'No category';
-      const icon = t.category?.icon || '';
-      const fromCur = t.wallet?.currency || 'USD';
-      const amt = convert(Number(t.amount) || 0, fromCur, baseCurrency);
-      if (!map[id]) map[id] = { name, icon, amount: 0 };
-      map[id].amount += amt;
-    }
-    const labels = Object.values(map).map(cat => `${cat.icon ? cat.icon + ' ' : ''}${cat.name}`);
-    const data = Object.values(map).map(cat => Number(cat.amount.toFixed(2)));
+    const items = byCategory.filter(item => item.type === type);
+    const labels = items.map(cat => `${cat.icon ? cat.icon + ' ' : ''}${cat.name || 'No category'}`);
+    const data = items.map(cat => cat.total);
     const colors = CHART_COLORS.slice(0, data.length);
     return { labels, data, colors };
-  }, [filtered, convert, baseCurrency]);
+  }, [byCategory]);
 
   const expensePie = buildCategoryPie('expense');
   const incomePie = buildCategoryPie('income');
 
   
-  // MARK: computeNetWorthSeries (net worth series)
-  const computeNetWorthSeries = useCallback((txList) => {
-    if (!txList || txList.length === 0) return { labels: [], data: [] };
-    const tx = txList
-      .map(t => ({ ...t, date: new Date(t.date) }))
-      .sort((a, b) => a.date - b.date);
-    const start = new Date(tx[0].date);
-    start.setHours(0, 0, 0, 0);
-
-    // Find the latest transaction date and today, use the max of both
-    const lastTxDate = new Date(tx[tx.length - 1].date);
-    lastTxDate.setHours(0, 0, 0, 0);
-    const today = new Date();
-    today.setHours(0, 0, 0, 0);
-    const lastDate = lastTxDate > today ? lastTxDate : today;
-
-    // day key helper
-    const dayKey = (d) => d.toISOString().slice(0, 10);
-    const sumsByDay = {};
-    tx.forEach(t => {
-      const date = new Date(t.date);
-      date.setHours(0, 0, 0, 0);
-      const key = dayKey(date);
-      const sign = t.type === 'expense' ? -1 : 1;
-      const fromCur = t.wallet?.currency || 'USD';
-      const amt = convert(Number(t.amount) || 0, fromCur, baseCurrency);
-      sumsByDay[key] = (sumsByDay[key] || 0) + sign * amt;
-    });
-    const labels = [];
-    const data = [];
-    let current = 0;
-    for (let d = new Date(start); d.getTime() <= lastDate.getTime();) {
-      const key = dayKey(d);
-      current += sumsByDay[key] || 0;
-      labels.push(new Date(d).toLocaleDateString('uk-UA'));
-      data.push(Number(current.toFixed(2)));
-      d = new Date(d.getTime() + 24 * 60 * 60 * 1000);
-    }
-    return { labels, data };
-  }, [convert, baseCurrency]);
-
-  const netWorthSeries = useMemo(() => computeNetWorthSeries(filtered), [filtered, computeNetWorthSeries]);
+  // MARK: netWorthSeries
+  const netWorthSeries = useMemo(() => toNetWorthSeries(series), [series]);
 
 
   // MARK: render
@@ -36,60 +36,44 @@ function useDebouncedValue(value, delay = 300) {
   return debounced;
 }
 
-// MARK: filterTransactions
-function filterTransactions(transactions, { filters, selectedMonth, searchQuery }) {
-  const debouncedQuery = searchQuery.trim().toLowerCase();
-  if (debouncedQuery) {
-    return transactions.filter(tx =>
-      tx.title?.toLowerCase().includes(debouncedQuery) ||
-      tx.description?.toLowerCase().includes(debouncedQuery) ||
-      tx.amount?.toString().includes(debouncedQuery)
-    );
+// MARK: buildServerFilters
+// Month/search/filter state -> query params for the paginated transactions endpoint
+function buildServerFilters({ filters, selectedMonth, searchQuery }) {
+  const query = {
+    type: filters.type,
+    category_id: filters.category_id,
+    wallet_id: filters.wallet_id,
+  };
+  const search = searchQuery.trim();
+  if (search) {
+    // Search runs across the whole history
+    query.search = search;
+  } else {
+    const mm = String(selectedMonth.month).padStart(2, '0');
+    const lastDay = new Date(selectedMonth.year, selectedMonth.month, 0).getDate();
+    query.start_date = `${selectedMonth.year}-${mm}-01T00:00:00`;
+    query.end_date = `${selectedMonth.year}-${mm}-${String(lastDay).padStart(2, '0')}T23:59:59`;
   }
-  return transactions.filter(tx => {
-    const d = new Date(tx.date);
-    // Month filter
-    if (!(d.getFullYear() === selectedMonth.year && (d.getMonth() + 1) === selectedMonth.month)) return false;
-    // Type filter (multi)
-    if (filters.type && filters.type.length && !filters.type.includes(tx.type)) return false;
-    // Category filter (multi)
-    if (filters.category_id && filters.category_id.length && !filters.category_id.includes(String(tx.category_id))) return false;
-    // Wallet filter (multi)
-    if (filters.wallet_id && filters.wallet_id.length && !filters.wallet_id.includes(String(tx.wallet_id))) return false;
-    // Date range
-    if (filters.start_date && new Date(tx.date) < new Date(filters.start_date)) return false;
-    if (filters.end_date && new Date(tx.date) > new Date(filters.end_date)) return false;
-    return true;
-  });
-}
-
-// MARK: calculateSummary
-function calculateSummary(transactions, convert, baseCurrency) {
-  return transactions.reduce(
-    (acc, tx) => {
-      const fromCur = tx.wallet?.currency || 'USD';
-      const value = convert(tx.amount, fromCur, baseCurrency);
-      if (tx.type === 'expense') acc.expense += value;
-      else if (tx.type === 'income') acc.income += value;
-      return acc;
-    },
-    { expense: 0, income: 0, balance: 0 }
-  );
+  // Explicit date range narrows the window (ISO strings compare lexicographically)
+  if (filters.start_date) {
+    const start = `${filters.start_date}T00:00:00`;
+    if (!query.start_date || start > query.start_date) query.start_date = start;
+  }
+  if (filters.end_date) {
+    const end = `${filters.end_date}T23:59:59`;
+    if (!query.end_date || end < query.end_date) query.end_date = end;
+  }
+  return query;
 }
 
 // MARK: getAvailableMonths
-function getAvailableMonths(transactions) {
-  if (!transactions.length) {
+function getAvailableMonths(bounds) {
+  if (!bounds?.first_date) {
     const now = new Date();
     return [{ year: now.getFullYear(), month: now.getMonth() + 1 }];
   }
-  let minDate = new Date();
-  let maxTxDate = new Date(0);
-  transactions.forEach(tx => {
-    const d = new Date(tx.date);
-    if (d < minDate) minDate = d;
-    if (d > maxTxDate) maxTxDate = d;
-  });
+  let minDate = new Date(bounds.first_date);
+  const maxTxDate = new Date(bounds.last_date);
   minDate = new Date(minDate.getFullYear(), minDate.getMonth(), 1);
   const now = new Date();
   const maxDate = (maxTxDate > now)
@@ -105,25 +89,83 @@ function getAvailableMonths(transactions) {
   return months.sort((a, b) => a.year !== b.year ? a.year - b.year : a.month - b.month);
 }
 
+const PAGE_SIZE = 100;
+
 // MARK: useTransactionsData
-function useTransactionsData() {
-  const [allTransactions, setAllTransactions] = useState([]);
+function useTransactionsData(serverFilters, baseCurrency) {
+  const [transactions, setTransactions] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [summary, setSummary] = useState({ expense: 0, income: 0, balance: 0 });
+  const [bounds, setBounds] = useState(null);
   const [categories, setCategories] = useState([]);
   const [wallets, setWallets] = useState([]);
   const [isLoading, setIsLoading] = useState(false);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [error, setError] = useState(null);
+  // Responses for an outdated filter set are dropped
+  const requestIdRef = useRef(0);
+  const filtersKey = JSON.stringify(serverFilters);
 
-  const loadAllTransactions = useCallback(async () => {
+  const loadFirstPage = useCallback(async () => {
+    const requestId = ++requestIdRef.current;
+    const query = JSON.parse(filtersKey);
+    setIsLoading(true);
     try {
-      const { response, data } = await api.transactions.getAll({});
+      const [pageResult, statsResult] = await Promise.all([
+        api.transactions.getPage(query, null, PAGE_SIZE),
+        api.statistics.get({ ...query, base_currency: baseCurrency }),
+      ]);
+      if (requestId !== requestIdRef.current) return;
+      if (pageResult.response.ok) {
+        setTransactions(pageResult.data.transactions);
+        setNextCursor(pageResult.data.next_cursor);
+      } else {
+        setError('Error loading transactions');
+      }
+      if (statsResult.response.ok) {
+        setSummary({
+          expense: statsResult.data.total_expenses,
+          income: statsResult.data.total_incomes,
+          balance: statsResult.data.balance,
+        });
+      }
+    } catch (error) {
+      setError('❌ Error loading transactions');
+      console.error(error);
+    } finally {
+      if (requestId === requestIdRef.current) setIsLoading(false);
+    }
+  }, [filtersKey, baseCurrency]);
+
+  const loadMore = useCallback(async () => {
+    if (!nextCursor || isLoadingMore) return;
+    const requestId = requestIdRef.current;
+    setIsLoadingMore(true);
+    try {
+      const { response, data } = await api.transactions.getPage(JSON.parse(filtersKey), nextCursor, PAGE_SIZE);
+      if (requestId !== requestIdRef.current) return;
       if (response.ok) {
-        setAllTransactions(data);
+        setTransactions(prev => [...prev, ...data.transactions]);
+        setNextCursor(data.next_cursor);
       } else {
         setError('Error loading transactions');
       }
     } catch (error) {
       setError('❌ Error loading transactions');
       console.error(error);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  }, [filtersKey, nextCursor, isLoadingMore]);
+
+  const loadBounds = useCallback(async () => {
+    try {
+      const { response, data } = await api.transactions.getBounds();
+      if (response.ok) {
+        setBounds(data);
+      }
+    } catch (error) {
+      console.error(error);
     }
   }, []);
 
@@ -155,44 +197,39 @@ function useTransactionsData() {
     }
   }, []);
 
-  const loadData = useCallback(async () => {
-    setIsLoading(true);
-    setError(null);
-    await Promise.all([
-      loadAllTransactions(),
-      loadCategories(),
-      loadWallets(),
-    ]);
-    setIsLoading(false);
-  }, [loadAllTransactions, loadCategories, loadWallets]);
+  useEffect(() => {
+    loadCategories();
+    loadWallets();
+    loadBounds();
+  }, [loadCategories, loadWallets, loadBounds]);
 
   useEffect(() => {
-    loadData();
-  }, [loadData]);
+    loadFirstPage();
+  }, [loadFirstPage]);
+
+  const reloadTransactions = useCallback(() => {
+    loadBounds();
+    loadFirstPage();
+  }, [loadBounds, loadFirstPage]);
 
   return {
-    allTransactions,
+    transactions,
+    summary,
+    bounds,
     categories,
     wallets,
     isLoading,
+    isLoadingMore,
+    hasMore: !!nextCursor,
+    loadMore,
     error,
-    reload: loadData,
-    reloadTransactions: loadAllTransactions,
+    reloadTransactions,
   };
 }
 
 // MARK: Transactions
 function Transactions() {
 
-  const {
-    allTransactions,
-    categories,
-    wallets,
-    isLoading,
-    error,
-    reloadTransactions,
-  } = useTransactionsData();
-
   const [filters, setFilters] = useState({
     type: ['expense', 'income'],
     category_id: [],
@@ -217,23 +254,45 @@ function Transactions() {
   const tabsListRef = useRef(null);
   const tabRefs = useRef({});
 
-  const { baseCurrency, convert, format } = useCurrency();
+  const { baseCurrency, format } = useCurrency();
 
-
-  // Filter transactions by selected month and filters
-  const filteredTransactions = filterTransactions(allTransactions, {
+  // Month, filters and search are applied by the server; pages load on scroll
+  const serverFilters = buildServerFilters({
     filters,
     selectedMonth,
     searchQuery: debouncedSearchQuery,
   });
 
-  // Summary
-  const summaryObj = calculateSummary(filteredTransactions, convert, baseCurrency);
-  summaryObj.balance = summaryObj.income - summaryObj.expense;
-  const summary = summaryObj;
+  const {
+    transactions,
+    summary,
+    bounds,
+    categories,
+    wallets,
+    isLoading,
+    isLoadingMore,
+    hasMore,
+    loadMore,
+    error,
+    reloadTransactions,
+  } = useTransactionsData(serverFilters, baseCurrency);
+
+  // Infinite scroll: load the next page when the sentinel below the list becomes visible
+  const sentinelRef = useRef(null);
+  useEffect(() => {
+    const node = sentinelRef.current;
+    if (!node || !hasMore || typeof IntersectionObserver === 'undefined') return;
+    const observer = new IntersectionObserver((entries) => {
+      if (entries[0].isIntersecting) loadMore();
+    }, { rootMargin: '400px' });
+    observer.observe(node);
+    return () => observer.disconnect();
+  }, [hasMore, loadMore]);
+
+  const shownCount = `${transactions.length}${hasMore ? '+' : ''}`;
 
   // Available months
-  const availableMonths = getAvailableMonths(allTransactions);
+  const availableMonths = getAvailableMonths(bounds);
   const [tabValue, setTabValue] = useState(() => {
     const m = availableMonths.find(m => m.year === selectedMonth.year && m.month === selectedMonth.month);
     return m ? `${m.year}-${String(m.month).padStart(2, '0')}` : '';
@@ -412,7 +471,7 @@ function Transactions() {
           </Flex>
 
           {/* Show Tabs and summary only if search is empty */}
-            {!debouncedSearchQuery.trim() && !isLoading && (
+            {!debouncedSearchQuery.trim() && bounds && (
               <>
                 {/* MARK: month selector */}
                 <Tabs.Root
@@ -482,6 +541,16 @@ function Transactions() {
                     </Flex>
                   </div>
                 </Card>
+
+                {/* MARK: export */}
+                <Flex justify="end" gap="2">
+                  <Button asChild variant="soft" size="1">
+                    <a href={api.transactions.exportUrl(serverFilters, 'csv')} download>Export CSV</a>
+                  </Button>
+                  <Button asChild variant="soft" size="1">
+                    <a href={api.transactions.exportUrl(serverFilters, 'ndjson')} download>Export NDJSON</a>
+                  </Button>
+                </Flex>
               </>
             )}
 
@@ -489,16 +558,24 @@ function Transactions() {
           <Flex direction="column" gap="4">
             {debouncedSearchQuery.trim() && (
               <Text size="3" color="gray">
-                Found {filteredTransactions.length} transaction{filteredTransactions.length !== 1 ? 's' : ''} matching "{debouncedSearchQuery.trim()}"
+                Found {shownCount} transaction{transactions.length !== 1 || hasMore ? 's' : ''} matching "{debouncedSearchQuery.trim()}"
               </Text>
             )}
             <TransactionList
-              transactions={filteredTransactions}
+              transactions={transactions}
               onEdit={handleEdit}
               onDelete={() => {}}
               isLoading={isLoading}
             />
 
+            {/* Infinite scroll sentinel */}
+            <div ref={sentinelRef} />
+            {isLoadingMore && (
+              <Flex justify="center">
+                <Text size="2" color="gray">Loading more…</Text>
+              </Flex>
+            )}
+
 
             <Flex direction="column" justify="center" align="center" mt="2" gap="3" style={{ height: 120 }}>
               <Text size="5" className="show-on-mobile">
@@ -509,7 +586,7 @@ function Transactions() {
               </Text>
               {/* Badge with transaction count */}
               <Badge color="gray" className="show-on-mobile">
-                {filteredTransactions.length} transactions
+                {shownCount} transactions
               </Badge>
             </Flex>
 
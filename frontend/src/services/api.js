@@ -32,21 +32,38 @@ const logError = (method, endpoint, error) => {
   });
 };
 
+// MARK: ETag Cache
+// Last body + ETag per GET endpoint; the server answers 304 while the user's data is unchanged
+const etagCache = new Map();
+
 // MARK: Fetch with Logging
 // Base function for making requests with automatic token refresh
 const fetchWithLogging = async (endpoint, options = {}, retry = true, onLogout = null) => {
   const method = options.method || 'GET';
   const requestData = options.body ? JSON.parse(options.body) : null;
+  const cached = method === 'GET' ? etagCache.get(endpoint) : undefined;
 
   logRequest(method, endpoint, requestData);
 
   try {
-    const response = await fetch(`${API_BASE_URL}${endpoint}`, {
+    let response = await fetch(`${API_BASE_URL}${endpoint}`, {
       ...options,
+      headers: cached ? { ...options.headers, 'If-None-Match': cached.etag } : options.headers,
       credentials: 'include'
     });
 
-    const data = await response.json().catch(() => null);
+    let data;
+    if (response.status === 304 && cached) {
+      // Not modified: reuse the cached body as a regular 200 response
+      data = cached.data;
+      response = new Response(null, { status: 200, statusText: 'Not Modified', headers: response.headers });
+    } else {
+      data = await response.json().catch(() => null);
+      const etag = response.headers.get('ETag');
+      if (method === 'GET' && response.ok && etag) {
+        etagCache.set(endpoint, { etag, data });
+      }
+    }
     logResponse(method, endpoint, response, data);
 
     // If token expired (401) and this is not a refresh request — try to refresh token and retry
@@ -79,6 +96,30 @@ const fetchWithLogging = async (endpoint, options = {}, retry = true, onLogout =
   }
 };
 
+// MARK: Transaction Filters
+// Multi-value filters (arrays) are sent comma-separated
+const buildTransactionParams = (filters = {}) => {
+  const params = new URLSearchParams();
+  ['category_id', 'wallet_id', 'type', 'start_date', 'end_date', 'search'].forEach((key) => {
+    const value = filters[key];
+    if (Array.isArray(value) ? value.length : value) params.append(key, value);
+  });
+  return params;
+};
+
+// MARK: Compact Transactions
+// Rebuild nested wallet/category objects from the compact side tables
+const expandCompactTransactions = (data) => {
+  if (!data || !Array.isArray(data.transactions)) return data;
+  const wallets = data.wallets || {};
+  const categories = data.categories || {};
+  return data.transactions.map((t) => ({
+    ...t,
+    wallet: wallets[t.wallet_id] || null,
+    category: categories[t.category_id] || null
+  }));
+};
+
 const api = {
   // MARK: Authentication
   auth: {
@@ -103,6 +144,7 @@ const api = {
 
     logout: async () => {
       console.log('🚪 User logout');
+      etagCache.clear();
       return await fetchWithLogging('/logout', {
         method: 'POST'
       });
@@ -164,19 +206,51 @@ const api = {
   transactions: {
     getAll: async (filters = {}) => {
       console.log('� Fetching transactions with filters:', filters);
-      const params = new URLSearchParams();
-      if (filters.category_id) params.append('category_id', filters.category_id);
-      if (filters.wallet_id) params.append('wallet_id', filters.wallet_id);
-      if (filters.type) params.append('type', filters.type);
-      if (filters.start_date) params.append('start_date', filters.start_date);
-      if (filters.end_date) params.append('end_date', filters.end_date);
-
-      const endpoint = params.toString() ? `/transactions?${params}` : '/transactions';
-      return await fetchWithLogging(endpoint, {
+      const params = buildTransactionParams(filters);
+      params.append('compact', 'true');
+
+      const endpoint = `/transactions?${params}`;
+      const result = await fetchWithLogging(endpoint, {
+        method: 'GET'
+      });
+      return { ...result, data: expandCompactTransactions(result.data) };
+    },
+
+    // Keyset pagination: returns { transactions, next_cursor }
+    getPage: async (filters = {}, cursor = null, limit = 100) => {
+      console.log('📄 Fetching transactions page:', filters, cursor);
+      const params = buildTransactionParams(filters);
+      params.append('compact', 'true');
+      params.append('limit', limit);
+      if (cursor) params.append('cursor', cursor);
+
+      const result = await fetchWithLogging(`/transactions?${params}`, {
+        method: 'GET'
+      });
+      if (!result.response.ok || !result.data) return result;
+      return {
+        ...result,
+        data: {
+          transactions: expandCompactTransactions(result.data),
+          next_cursor: result.data.next_cursor
+        }
+      };
+    },
+
+    getBounds: async () => {
+      console.log('📅 Fetching transaction date bounds');
+      return await fetchWithLogging('/transactions/bounds', {
         method: 'GET'
       });
     },
 
+    // Streamed file download (cookie auth), same filters as getAll
+    exportUrl: (filters = {}, format = 'csv') => {
+      const params = buildTransactionParams(filters);
+      params.append('format', format);
+      return `${API_BASE_URL}/transactions/export?${params.toString()}`;
+    },
+
     create: async (transactionData) => {
       console.log('➕ Creating transaction:', transactionData);
       return await fetchWithLogging('/transactions', {
@@ -203,19 +277,66 @@ const api = {
     }
   },
 
+  // MARK: Sync
+  sync: {
+    // Changes since token (omit for a full snapshot); apply `deleted` first, then upsert by id
+    pull: async (token = null) => {
+      console.log('🔄 Sync pull:', token ? 'delta' : 'full');
+      const params = token ? `?since=${encodeURIComponent(token)}` : '';
+      return await fetchWithLogging(`/sync${params}`, {
+        method: 'GET'
+      });
+    },
+  },
+
   // MARK: Statistics
   statistics: {
     get: async (filters = {}) => {
       console.log('📊 Fetching statistics with filters:', filters);
-      const params = new URLSearchParams();
-      if (filters.start_date) params.append('start_date', filters.start_date);
-      if (filters.end_date) params.append('end_date', filters.end_date);
+      const params = buildTransactionParams(filters);
       if (filters.base_currency) params.append('base_currency', filters.base_currency);
 
       const endpoint = params.toString() ? `/statistics?${params}` : '/statistics';
       return await fetchWithLogging(endpoint, {
         method: 'GET'
       });
+    },
+
+    // Buckets of income/expense/net worth: { interval, base_currency, opening_balance, buckets }
+    series: async (filters = {}) => {
+      console.log('📈 Fetching statistics series with filters:', filters);
+      const params = buildTransactionParams(filters);
+      if (filters.interval) params.append('interval', filters.interval);
+      if (filters.base_currency) params.append('base_currency', filters.base_currency);
+
+      const endpoint = params.toString() ? `/statistics/series?${params}` : '/statistics/series';
+      return await fetchWithLogging(endpoint, {
+        method: 'GET'
+      });
+    },
+
+    // Grouped sums: { base_currency, items: [{ category_id, name, icon, type, total, count }] }
+    byCategory: async (filters = {}) => {
+      console.log('🍩 Fetching statistics by category with filters:', filters);
+      const params = buildTransactionParams(filters);
+      if (filters.base_currency) params.append('base_currency', filters.base_currency);
+
+      const endpoint = params.toString() ? `/statistics/by-category?${params}` : '/statistics/by-category';
+      return await fetchWithLogging(endpoint, {
+        method: 'GET'
+      });
+    },
+
+    // Grouped sums: { base_currency, items: [{ wallet_id, name, icon, currency, income, expense, net, count }] }
+    byWallet: async (filters = {}) => {
+      console.log('👛 Fetching statistics by wallet with filters:', filters);
+      const params = buildTransactionParams(filters);
+      if (filters.base_currency) params.append('base_currency', filters.base_currency);
+
+      const endpoint = params.toString() ? `/statistics/by-wallet?${params}` : '/statistics/by-wallet';
+      return await fetchWithLogging(endpoint, {
+        method: 'GET'
+      });
     }
   },
 